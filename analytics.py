@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+# 출처 코드와 화면 표시 이름 (출처가 없는 기존 문제는 UNKNOWN_LABEL로 표시)
+SOURCE_AI = "ai"
+SOURCE_MANUAL = "manual"
+SOURCE_IMPORT = "import"
+SOURCE_LABELS = {SOURCE_AI: "AI 생성", SOURCE_MANUAL: "직접 출제", SOURCE_IMPORT: "가져오기"}
+UNKNOWN_LABEL = "알 수 없음"
+# 생성일별 차트의 기본 기간 (일)
+DEFAULT_DAYS = 30
+
+# 문제 저장/삭제 시 트리거로 증분 갱신하는 집계 테이블
+# (과목 x 유형 x 난이도 집계는 question_bank의 question_facets 사용)
+SCHEMA = """
+-- (출처, 제공업체)별 문제 수 (값이 없으면 빈 문자열)
+CREATE TABLE IF NOT EXISTS stats_sources (
+    source TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (source, provider)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_stats_sources_insert AFTER INSERT ON questions BEGIN
+    INSERT INTO stats_sources VALUES (COALESCE(NEW.source, ''), COALESCE(NEW.provider, ''), 1)
+    ON CONFLICT(source, provider) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_sources_delete AFTER DELETE ON questions BEGIN
+    UPDATE stats_sources SET count = count - 1
+    WHERE source = COALESCE(OLD.source, '') AND provider = COALESCE(OLD.provider, '');
+    DELETE FROM stats_sources
+    WHERE source = COALESCE(OLD.source, '') AND provider = COALESCE(OLD.provider, '') AND count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_sources_update AFTER UPDATE OF source, provider ON questions BEGIN
+    UPDATE stats_sources SET count = count - 1
+    WHERE source = COALESCE(OLD.source, '') AND provider = COALESCE(OLD.provider, '');
+    DELETE FROM stats_sources
+    WHERE source = COALESCE(OLD.source, '') AND provider = COALESCE(OLD.provider, '') AND count <= 0;
+    INSERT INTO stats_sources VALUES (COALESCE(NEW.source, ''), COALESCE(NEW.provider, ''), 1)
+    ON CONFLICT(source, provider) DO UPDATE SET count = count + 1;
+END;
+
+-- 생성일(YYYY-MM-DD)별 문제 수
+CREATE TABLE IF NOT EXISTS stats_daily (
+    day TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_stats_daily_insert AFTER INSERT ON questions BEGIN
+    INSERT INTO stats_daily VALUES (substr(NEW.created_at, 1, 10), 1)
+    ON CONFLICT(day) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_daily_delete AFTER DELETE ON questions BEGIN
+    UPDATE stats_daily SET count = count - 1 WHERE day = substr(OLD.created_at, 1, 10);
+    DELETE FROM stats_daily WHERE day = substr(OLD.created_at, 1, 10) AND count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_daily_update AFTER UPDATE OF created_at ON questions BEGIN
+    UPDATE stats_daily SET count = count - 1 WHERE day = substr(OLD.created_at, 1, 10);
+    DELETE FROM stats_daily WHERE day = substr(OLD.created_at, 1, 10) AND count <= 0;
+    INSERT INTO stats_daily VALUES (substr(NEW.created_at, 1, 10), 1)
+    ON CONFLICT(day) DO UPDATE SET count = count + 1;
+END;
+"""
+
+
+def create_schema(conn):
+    """집계 테이블과 트리거 생성 (집계 테이블이 없던 DB는 기존 문제로 한 번만 집계)"""
+    existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'stats_daily'").fetchone()
+    conn.executescript(SCHEMA)
+    if not existed:
+        conn.execute("""
+            INSERT INTO stats_sources
+            SELECT COALESCE(source, ''), COALESCE(provider, ''), COUNT(*) FROM questions
+            GROUP BY 1, 2
+        """)
+        conn.execute("""
+            INSERT INTO stats_daily
+            SELECT substr(created_at, 1, 10), COUNT(*) FROM questions
+            GROUP BY 1
+        """)
+
+
+def source_label(source, provider=""):
+    """출처와 제공업체 표시 이름 (예: 'AI 생성 · gemini')"""
+    label = SOURCE_LABELS.get(source, UNKNOWN_LABEL if not source else source)
+    return f"{label} · {provider}" if provider else label
+
+
+def summary(conn, days=DEFAULT_DAYS, today=None):
+    """집계 테이블만 읽어 대시보드용 통계 반환 (문제 수와 무관하게 일정한 시간)
+
+    daily는 오늘을 포함한 최근 days일의 (날짜, 문제 수) 목록이며 문제가 없는 날은 0입니다.
+    """
+    today = today or datetime.now().date()
+    start = today - timedelta(days=days - 1)
+    facets = [tuple(row) for row in conn.execute(
+        "SELECT subject, type, difficulty, count FROM question_facets"
+    )]
+    sources = [tuple(row) for row in conn.execute(
+        "SELECT source, provider, count FROM stats_sources ORDER BY count DESC"
+    )]
+    counts = dict(conn.execute(
+        "SELECT day, count FROM stats_daily WHERE day >= ? AND day <= ?",
+        (start.isoformat(), today.isoformat())
+    ).fetchall())
+    daily = []
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        daily.append((day, counts.get(day, 0)))
+    return {
+        'total': sum(row[3] for row in facets),
+        'facets': facets,
+        'sources': sources,
+        'daily': daily
+    }
@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from config import data_path
+from core import OUTPUT_BANK, api_keys_from_env, batch_title, make_batch_params, run_batch_job
+from jobs import JobManager
+
+# 일괄 생성 HTTP API 기본 주소 (다른 컴퓨터에서 접근하려면 --host 0.0.0.0)
+API_HOST = os.environ.get("EXAM_BOT_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("EXAM_BOT_API_PORT", "8600"))
+# 지정하면 모든 요청에 'Authorization: Bearer <토큰>' 헤더 필요
+API_TOKEN = os.environ.get("EXAM_BOT_API_TOKEN")
+# 요청 본문(매니페스트) 최대 크기
+MAX_BODY = 1024 * 1024
+BATCH_KIND = "batch"
+OUTPUT_JSONL = "jsonl"
+
+_BATCH_PATH = re.compile(r'^/batches/(\d+)(/questions|/cancel)?$')
+
+
+def _job_view(job):
+    """응답에 담을 작업 정보"""
+    return {
+        'id': job['id'],
+        'title': job['title'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'message': job['message'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'params': job['params'],
+        'result': job['result']
+    }
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """일괄 생성 HTTP API
+
+    POST /batches                   매니페스트로 일괄 생성 작업 등록 (202, {"id": 작업 ID})
+    GET  /batches                   최근 일괄 생성 작업 목록
+    GET  /batches/<id>              작업 상태, 진행률, 항목별 결과
+    GET  /batches/<id>/questions    생성되어 기록된 문제 (?offset=N 이후)
+    POST /batches/<id>/cancel       작업 취소 (이미 끝난 작업이면 409)
+    GET  /health                    서버 상태
+    """
+    protocol_version = "HTTP/1.1"
+    jobs = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', "application/json; charset=utf-8")
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message):
+        self._send_json(status, {'error': message})
+
+    def _authorized(self):
+        if not API_TOKEN or self.headers.get('Authorization') == f"Bearer {API_TOKEN}":
+            return True
+        self._error(401, "인증 토큰이 올바르지 않습니다.")
+        return False
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            raise ValueError("요청 본문이 너무 큽니다")
+        try:
+            return json.loads(self.rfile.read(length) or b'null')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON 형식 오류: {e}") from e
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send_json(200, {'status': "ok"})
+            return
+        if url.path == "/batches":
+            self._send_json(200, {'batches': self.jobs.list(limit=100, kind=BATCH_KIND)})
+            return
+        match = _BATCH_PATH.match(url.path)
+        job = self.jobs.get(int(match.group(1))) if match and match.group(2) != "/cancel" else None
+        if job is None or job['kind'] != BATCH_KIND:
+            self._error(404, "작업을 찾을 수 없습니다.")
+            return
+        if match.group(2) == "/questions":
+            try:
+                offset = int((parse_qs(url.query).get('offset') or ['0'])[0] or 0)
+            except ValueError:
+                offset = -1
+            if offset < 0:
+                self._error(400, "offset은 0 이상의 정수여야 합니다.")
+                return
+            questions = self.jobs.items(job['id'], offset)
+            self._send_json(200, {'offset': offset, 'next_offset': offset + len(questions), 'questions': questions})
+            return
+        self._send_json(200, _job_view(job))
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        path = urlsplit(self.path).path
+        if path == "/batches":
+            self._create_batch()
+            return
+        match = _BATCH_PATH.match(path)
+        job = self.jobs.get(int(match.group(1))) if match and match.group(2) == "/cancel" else None
+        if job is None or job['kind'] != BATCH_KIND:
+            self._error(404, "작업을 찾을 수 없습니다.")
+            return
+        if not self.jobs.cancel(job['id']):
+            self._error(409, "이미 끝난 작업입니다.")
+            return
+        self._send_json(202, {'id': job['id'], 'status': self.jobs.get(job['id'])['status']})
+
+    def _create_batch(self):
+        try:
+            manifest = self._read_json()
+            if isinstance(manifest, dict) and manifest.get('output', OUTPUT_BANK) not in (OUTPUT_BANK, OUTPUT_JSONL):
+                raise ValueError(f"output은 '{OUTPUT_BANK}' 또는 '{OUTPUT_JSONL}'이어야 합니다")
+            params = make_batch_params(manifest)
+        except (ValueError, TypeError, KeyError) as e:
+            self._error(400, f"매니페스트 형식 오류: {e}" if not isinstance(e, ValueError) else str(e))
+            return
+        api_keys = api_keys_from_env()
+        if params['ai_provider'] not in api_keys:
+            self._error(400, f"서버에 {params['ai_provider']} API 키가 설정되어 있지 않습니다.")
+            return
+        if params['output'] == OUTPUT_JSONL:
+            # 요청자가 서버의 임의 경로에 쓰지 못하도록 파일 이름은 서버가 정함
+            os.makedirs(data_path("exports"), exist_ok=True)
+            params['output'] = data_path(os.path.join(
+                "exports", f"batch-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.jsonl"
+            ))
+        job_id = self.jobs.submit(BATCH_KIND, batch_title(params), params, run_batch_job, api_keys)
+        self._send_json(202, {'id': job_id, 'status_url': f"/batches/{job_id}"})
+
+
+def start_api_server(port=API_PORT, host=API_HOST, jobs=None):
+    """일괄 생성 HTTP API 서버를 백그라운드 스레드에서 시작
+
+    HTTP API로 등록한 일괄 생성 작업이 Streamlit 앱의 작업 목록에 섞이지 않도록
+    기본으로 별도 작업 DB(api_jobs.db)를 사용합니다.
+    """
+    jobs = jobs or JobManager(data_path("api_jobs.db"))
+    handler = type("BoundApiHandler", (ApiHandler,), {'jobs': jobs})
+    server = ThreadingHTTPServer((host, int(port)), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="api-server").start()
+    return server
@@ -0,0 +1,197 @@
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # zstd 압축은 zstandard 패키지가 있을 때만 지원
+    zstandard = None
+
+from analytics import SOURCE_IMPORT
+from config import data_path
+from dedup import DEFAULT_THRESHOLD, find_near_duplicates
+from response_parser import JsonObjectStream
+
+# 내보내기 형식: 이름 -> (파일 확장자, 압축 방식)
+EXPORT_FORMATS = {
+    "JSON Lines": (".jsonl", None),
+    "JSON Lines (gzip)": (".jsonl.gz", "gzip"),
+    "JSON": (".json", None)
+}
+if zstandard is not None:
+    EXPORT_FORMATS["JSON Lines (zstd)"] = (".jsonl.zst", "zstd")
+
+IMPORT_BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+
+QUESTION_TYPES = ['객관식', '주관식', 'O/X']
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def open_compressed_writer(fileobj, compression=None):
+    """압축 방식에 맞는 바이너리 쓰기 스트림 반환"""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode='wb')
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd 압축을 사용하려면 zstandard 패키지를 설치해주세요.")
+        return zstandard.ZstdCompressor().stream_writer(fileobj, closefd=False)
+    return fileobj
+
+
+def write_questions(questions, fileobj, fmt="JSON Lines"):
+    """문제를 하나씩 직렬화해 스트림에 기록하고 기록한 문제 수 반환"""
+    _, compression = EXPORT_FORMATS[fmt]
+    writer = open_compressed_writer(fileobj, compression)
+    count = 0
+    try:
+        if fmt == "JSON":
+            writer.write(b"[\n")
+        for question in questions:
+            line = json.dumps(question, ensure_ascii=False)
+            if fmt == "JSON":
+                line = ("" if count == 0 else ",\n") + line
+            else:
+                line += "\n"
+            writer.write(line.encode('utf-8'))
+            count += 1
+        if fmt == "JSON":
+            writer.write(b"\n]\n")
+    finally:
+        if writer is not fileobj:
+            writer.close()
+    return count
+
+
+def export_to_file(bank, fmt="JSON Lines", path=None):
+    """문제 은행 전체를 파일로 내보내고 (경로, 문제 수) 반환
+
+    문제를 일정 개수씩 읽어 바로 기록하므로 문제 수와 무관하게 메모리 사용량이 일정합니다.
+    """
+    extension, _ = EXPORT_FORMATS[fmt]
+    if path is None:
+        os.makedirs(data_path("exports"), exist_ok=True)
+        path = data_path(os.path.join("exports", f"questions-{datetime.now():%Y%m%d-%H%M%S}{extension}"))
+    with open(path, 'wb') as f:
+        count = write_questions(bank.iter_all(), f, fmt)
+    return path, count
+
+
+def open_decompressed_reader(fileobj):
+    """매직 바이트로 gzip/zstd 압축 여부를 판단해 압축을 푼 바이너리 스트림 반환 (seek 가능한 파일)"""
+    position = fileobj.tell()
+    head = fileobj.read(4)
+    fileobj.seek(position)
+    if head.startswith(_GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if head.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError("zstd 압축 파일을 읽으려면 zstandard 패키지를 설치해주세요.")
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=False)
+    return fileobj
+
+
+def iter_records(fileobj):
+    """JSON Lines 또는 JSON 배열 파일에서 레코드를 하나씩 yield (압축 자동 인식)
+
+    '['로 시작하면 JSON 배열, 아니면 JSON Lines로 읽습니다. 읽지 못한 줄이나 구간은
+    예외 대신 ('error', 설명) 튜플로 전달되어 나머지 레코드는 계속 불러옵니다.
+    """
+    text = io.TextIOWrapper(open_decompressed_reader(fileobj), encoding='utf-8-sig')
+    try:
+        first = text.read(1)
+        while first.isspace():
+            first = text.read(1)
+
+        if first == '[':
+            # JSON 배열(기존 내보내기 형식)은 증분 파서로 객체 단위로 읽음
+            parser = JsonObjectStream()
+            chunk = first
+            while chunk:
+                yield from parser.feed(chunk)
+                chunk = text.read(READ_SIZE)
+            yield from parser.close()
+            for error in parser.errors:
+                yield ('error', f"{error['start']}번째 글자: {error['reason']}")
+            return
+
+        line_no = 0
+        for line in _prepend(first, text):
+            line_no += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ('error', f"{line_no}번째 줄: {e}")
+    finally:
+        # 호출한 쪽의 파일은 닫지 않음
+        text.detach()
+
+
+def _prepend(first, text):
+    yield first + text.readline()
+    yield from text
+
+
+def validate_question(record):
+    """불러온 레코드를 문제 dict로 검증/정리 (잘못된 경우 ValueError)"""
+    if not isinstance(record, dict):
+        raise ValueError("객체가 아닙니다")
+    q_type = record.get('type')
+    if q_type not in QUESTION_TYPES:
+        raise ValueError(f"알 수 없는 문제 유형: {q_type}")
+    for field in ('subject', 'difficulty', 'question'):
+        if not record.get(field):
+            raise ValueError(f"{field} 항목이 없습니다")
+    if q_type == '객관식' and (not isinstance(record.get('options'), list) or not record.get('correct_answer')):
+        raise ValueError("객관식 문제에 선택지 또는 정답이 없습니다")
+    if q_type == 'O/X' and record.get('correct_answer') not in ('O', 'X'):
+        raise ValueError("O/X 문제의 정답은 O 또는 X여야 합니다")
+    if q_type == '주관식' and not record.get('answer'):
+        raise ValueError("주관식 문제에 정답이 없습니다")
+    # 기존 ID는 버리고 문제 은행에서 새로 발급, 출처가 없으면 가져온 문제로 기록
+    question = {k: v for k, v in record.items() if k != 'id'}
+    question.setdefault('source', SOURCE_IMPORT)
+    return question
+
+
+def import_records(bank, records, batch_size=IMPORT_BATCH_SIZE, threshold=DEFAULT_THRESHOLD,
+                   skip_duplicates=True, on_progress=None):
+    """레코드를 검증해 batch_size개씩 문제 은행에 저장하고 결과 통계 반환
+
+    on_progress(stats)는 배치를 저장할 때마다 호출됩니다.
+    """
+    stats = {'imported': 0, 'invalid': 0, 'duplicates': 0, 'errors': []}
+
+    def flush(batch):
+        if skip_duplicates:
+            duplicates = {item['index'] for item in find_near_duplicates(batch, bank, threshold)}
+            stats['duplicates'] += len(duplicates)
+            batch = [q for i, q in enumerate(batch) if i not in duplicates]
+        bank.add_many(batch)
+        stats['imported'] += len(batch)
+        if on_progress:
+            on_progress(stats)
+
+    batch = []
+    for record in records:
+        try:
+            if isinstance(record, tuple):
+                raise ValueError(record[1])
+            batch.append(validate_question(record))
+        except ValueError as e:
+            stats['invalid'] += 1
+            if len(stats['errors']) < 20:
+                stats['errors'].append(str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return stats
@@ -0,0 +1,548 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from clients import get_anthropic_client, get_openai_client
+from config import data_path
+from core import (
+    MODEL_SETTINGS, anthropic_request_body, anthropic_usage, build_questions, create_prompt, openai_request_body,
+    parse_ai_response, write_output
+)
+from dedup import find_near_duplicates
+from generation import chunk_additional_info, split_into_chunks
+from question_bank import get_question_bank
+from response_parser import describe_parse_errors
+from telemetry import estimate_cost, get_metrics_store
+
+# 일괄 처리 API 가격 (동기 호출 가격 대비 비율, OpenAI Batch API와 Anthropic Message Batches 모두 50%)
+BATCH_PRICE_RATIO = 0.5
+# 일괄 처리 하나에 담을 수 있는 최대 요청 수
+MAX_REQUESTS = {'openai': 50000, 'anthropic': 100000}
+# 제공업체에 처리 상태를 묻는 간격 (초)
+POLL_INTERVAL = float(os.environ.get("EXAM_BOT_BATCH_POLL_SECONDS", "30"))
+# 결과를 읽으면서 문제가 이만큼 모이면 유사 중복 검사 후 문제 은행/파일에 기록
+WRITE_BATCH_SIZE = 500
+
+# 일괄 처리 상태
+SUBMITTING = "submitting"
+SUBMITTED = "submitted"   # 제공업체에서 처리 중
+ENDED = "ended"           # 처리가 끝나 결과를 수집할 수 있음
+COLLECTED = "collected"   # 결과를 문제 은행/파일에 기록함
+FAILED = "failed"
+CANCELLED = "cancelled"
+STATUS_LABELS = {
+    SUBMITTING: "제출 중", SUBMITTED: "처리 중", ENDED: "수집 대기", COLLECTED: "완료", FAILED: "실패",
+    CANCELLED: "취소됨"
+}
+
+# 요청(묶음)별 결과 상태
+REQUEST_PENDING = "pending"
+REQUEST_SAVED = "saved"
+REQUEST_FAILED = "failed"
+
+# 처음 만든 뒤에 추가된 provider_batch_requests 열 (기존 DB는 ALTER TABLE로 추가)
+ADDED_COLUMNS = {'cached_tokens': "INTEGER"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS provider_batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    remote_id TEXT,
+    status TEXT NOT NULL,
+    remote_status TEXT,
+    params TEXT NOT NULL,
+    request_count INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    -- 처리량 계산용 시각 (epoch 초)
+    submitted_ts REAL,
+    ended_ts REAL,
+    collected_ts REAL
+);
+
+-- 묶음 요청별 매니페스트 항목과 수집 결과 (수집이 중단돼도 이미 기록한 요청은 다시 기록하지 않음)
+CREATE TABLE IF NOT EXISTS provider_batch_requests (
+    batch_id INTEGER NOT NULL,
+    custom_id TEXT NOT NULL,
+    item_index INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    questions INTEGER NOT NULL DEFAULT 0,
+    saved INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    error TEXT,
+    -- prompt_tokens 중 제공업체 프롬프트 캐시에서 읽은 토큰
+    cached_tokens INTEGER,
+    PRIMARY KEY (batch_id, custom_id)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_provider_batch_requests_delete AFTER DELETE ON provider_batches BEGIN
+    DELETE FROM provider_batch_requests WHERE batch_id = OLD.id;
+END;
+"""
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class OpenAIBatches:
+    """OpenAI Batch API (요청 JSONL 파일 업로드 → /v1/batches 생성 → 결과/오류 파일)"""
+
+    def __init__(self, api_key):
+        self.client = get_openai_client(api_key)
+
+    def submit(self, requests):
+        lines = [
+            json.dumps({'custom_id': custom_id, 'method': "POST", 'url': "/v1/chat/completions",
+                        'body': openai_request_body(prompt)}, ensure_ascii=False)
+            for custom_id, prompt in requests
+        ]
+        upload = self.client.files.create(file=("requests.jsonl", "\n".join(lines).encode('utf-8')), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, remote_id):
+        batch = self.client.batches.retrieve(remote_id)
+        counts = batch.request_counts
+        # 기한이 지난(expired) 일괄 처리도 끝난 요청의 결과는 받을 수 있음
+        state = {'completed': ENDED, 'expired': ENDED, 'failed': FAILED, 'cancelled': CANCELLED}.get(
+            batch.status, SUBMITTED
+        )
+        error = None
+        if batch.errors and batch.errors.data:
+            error = "; ".join(e.message or e.code or "" for e in batch.errors.data)
+        return {
+            'state': state, 'remote_status': batch.status, 'error': error,
+            'completed': (counts.completed + counts.failed) if counts else 0,
+            'failed': counts.failed if counts else 0
+        }
+
+    def results(self, remote_id):
+        batch = self.client.batches.retrieve(remote_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            # 결과 파일을 한 번에 메모리에 올리지 않고 줄 단위로 읽음
+            with self.client.files.with_streaming_response.content(file_id) as response:
+                for line in response.iter_lines():
+                    if line.strip():
+                        yield self._result(json.loads(line))
+
+    @staticmethod
+    def _result(record):
+        response = record.get('response') or {}
+        body = response.get('body') or {}
+        if response.get('status_code') == 200 and body.get('choices'):
+            usage = body.get('usage') or {}
+            return (record['custom_id'], body['choices'][0]['message']['content'], None,
+                    usage.get('prompt_tokens'), usage.get('completion_tokens'),
+                    (usage.get('prompt_tokens_details') or {}).get('cached_tokens'))
+        error = record.get('error') or body.get('error') or {}
+        return record['custom_id'], None, error.get('message') or f"HTTP {response.get('status_code')}", None, None, None
+
+    def cancel(self, remote_id):
+        self.client.batches.cancel(remote_id)
+
+
+class AnthropicBatches:
+    """Anthropic Message Batches API"""
+
+    def __init__(self, api_key):
+        self.client = get_anthropic_client(api_key)
+
+    def submit(self, requests):
+        batch = self.client.messages.batches.create(requests=[
+            {'custom_id': custom_id, 'params': anthropic_request_body(prompt)} for custom_id, prompt in requests
+        ])
+        return batch.id
+
+    def status(self, remote_id):
+        batch = self.client.messages.batches.retrieve(remote_id)
+        counts = batch.request_counts
+        failed = counts.errored + counts.canceled + counts.expired
+        return {
+            'state': ENDED if batch.processing_status == "ended" else SUBMITTED,
+            'remote_status': batch.processing_status, 'error': None,
+            'completed': counts.succeeded + failed, 'failed': failed
+        }
+
+    def results(self, remote_id):
+        # SDK가 결과 JSONL을 스트리밍으로 읽어 한 줄씩 돌려줌
+        for entry in self.client.messages.batches.results(remote_id):
+            result = entry.result
+            if result.type == "succeeded":
+                message = result.message
+                text = "".join(block.text for block in message.content if block.type == "text")
+                prompt_tokens, cached_tokens, completion_tokens = anthropic_usage(message.usage)
+                yield entry.custom_id, text, None, prompt_tokens, completion_tokens, cached_tokens
+            elif result.type == "errored":
+                yield entry.custom_id, None, result.error.error.message, None, None, None
+            else:
+                yield entry.custom_id, None, f"요청이 처리되지 않았습니다 ({result.type})", None, None, None
+
+    def cancel(self, remote_id):
+        self.client.messages.batches.cancel(remote_id)
+
+
+# 일괄 처리 API를 지원하는 제공업체
+BATCH_BACKENDS = {'openai': OpenAIBatches, 'anthropic': AnthropicBatches}
+
+
+class BatchStore:
+    """제출한 일괄 처리의 제공업체 ID와 요청별 수집 상태를 SQLite에 기록
+
+    프로세스가 끝나도 기록이 남으므로 나중에 같은 ID로 상태 확인과 결과 수집을 이어갈 수 있습니다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_path("provider_batches.db")
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(provider_batch_requests)")}
+            for column, definition in ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE provider_batch_requests ADD COLUMN {column} {definition}")
+
+    def _connect(self):
+        # 스레드마다 별도 연결 사용
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, provider, params, requests):
+        """제출 전 기록 생성 (requests: [(custom_id, 항목 번호, 묶음 크기), ...])"""
+        with self._connect() as conn:
+            batch_id = conn.execute(
+                "INSERT INTO provider_batches (provider, model, status, params, request_count, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (provider, MODEL_SETTINGS[provider]['model'], SUBMITTING, json.dumps(params, ensure_ascii=False),
+                 len(requests), _now())
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO provider_batch_requests (batch_id, custom_id, item_index, size) VALUES (?, ?, ?, ?)",
+                [(batch_id, *request) for request in requests]
+            )
+        return batch_id
+
+    def update(self, batch_id, **fields):
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE provider_batches SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                (*fields.values(), batch_id)
+            )
+
+    def get(self, batch_id):
+        row = self._connect().execute("SELECT * FROM provider_batches WHERE id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record['params'] = json.loads(record['params'])
+        return record
+
+    def list(self, limit=50):
+        """최근 일괄 처리 목록 (매니페스트 제외, 수집한 문제 수 포함)"""
+        return [dict(row) for row in self._connect().execute(
+            "SELECT id, provider, model, remote_id, status, remote_status, request_count, completed, failed, "
+            "error, created_at, (SELECT COALESCE(SUM(saved), 0) FROM provider_batch_requests "
+            "WHERE batch_id = provider_batches.id) AS saved FROM provider_batches ORDER BY id DESC LIMIT ?",
+            (limit,)
+        )]
+
+    def pending_requests(self, batch_id):
+        """아직 기록하지 않은 요청 {custom_id: (항목 번호, 묶음 크기)}"""
+        return {
+            row['custom_id']: (row['item_index'], row['size'])
+            for row in self._connect().execute(
+                "SELECT custom_id, item_index, size FROM provider_batch_requests WHERE batch_id = ? AND status = ?",
+                (batch_id, REQUEST_PENDING)
+            )
+        }
+
+    def finish_requests(self, batch_id, rows):
+        """요청별 수집 결과 기록
+
+        rows: [(custom_id, 상태, 문제 수, 기록한 문제 수, 입력 토큰, 출력 토큰, 캐시에서 읽은 입력 토큰, 오류), ...]
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE provider_batch_requests SET status = ?, questions = ?, saved = ?, prompt_tokens = ?, "
+                "completion_tokens = ?, cached_tokens = ?, error = ? WHERE batch_id = ? AND custom_id = ?",
+                [(*row[1:], batch_id, row[0]) for row in rows]
+            )
+
+    def item_totals(self, batch_id):
+        """매니페스트 항목별 요청/생성/기록 문제 수와 토큰 사용량"""
+        return [dict(row) for row in self._connect().execute(
+            """SELECT item_index, COUNT(*) AS requests, SUM(size) AS requested, SUM(questions) AS generated,
+                   SUM(saved) AS saved, SUM(status = ?) AS failed_requests, SUM(status = ?) AS pending_requests,
+                   COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+                   COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+                   COALESCE(SUM(cached_tokens), 0) AS cached_tokens
+               FROM provider_batch_requests WHERE batch_id = ? GROUP BY item_index ORDER BY item_index""",
+            (REQUEST_FAILED, REQUEST_PENDING, batch_id)
+        )]
+
+    def delete(self, batch_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM provider_batches WHERE id = ?", (batch_id,))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_batch_store():
+    """프로세스 전체에서 공유하는 일괄 처리 기록 저장소 반환"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BatchStore()
+    return _store
+
+
+def batch_requests(params):
+    """일괄 생성 파라미터의 모든 묶음 요청 [(custom_id, 항목 번호, 묶음 크기, 프롬프트), ...]
+
+    묶음 나누기와 프롬프트는 동기 생성(run_generation_job)과 같습니다.
+    """
+    requests = []
+    for item_index, item in enumerate(params['items']):
+        sizes = split_into_chunks(item['num_questions'], item['chunk_size'])
+        for index, size in enumerate(sizes):
+            prompt = create_prompt(
+                item['question_type'], item['subject'], item['difficulty'], size,
+                chunk_additional_info(item['additional_info'], index, len(sizes)), index * item['chunk_size']
+            )
+            requests.append((f"item{item_index + 1}-chunk{index + 1}", item_index, size, prompt))
+    return requests
+
+
+def _backend(record, api_keys):
+    provider = record['provider']
+    if provider not in api_keys:
+        raise ValueError(f"{provider} API 키가 설정되어 있지 않습니다")
+    return BATCH_BACKENDS[provider](api_keys[provider])
+
+
+def submit_batch(params, api_keys, store=None):
+    """매니페스트의 모든 묶음 요청을 제공업체 일괄 처리 API에 한 번에 제출하고 기록 ID 반환
+
+    params는 make_batch_params의 결과입니다. 제공업체 ID는 바로 기록되므로 이 프로세스가 끝나도
+    run_batch(기록 ID)로 이어서 결과를 받을 수 있습니다.
+    """
+    provider = params['ai_provider']
+    if provider not in BATCH_BACKENDS:
+        raise ValueError(f"일괄 처리 API는 {', '.join(BATCH_BACKENDS)}만 지원합니다")
+    requests = batch_requests(params)
+    if len(requests) > MAX_REQUESTS[provider]:
+        raise ValueError(f"요청 {len(requests)}개는 {provider} 일괄 처리 한도({MAX_REQUESTS[provider]}개)를 넘습니다. "
+                         f"chunk_size를 늘리거나 매니페스트를 나눠주세요")
+    store = store or get_batch_store()
+    batch_id = store.create(provider, params, [request[:3] for request in requests])
+    try:
+        remote_id = _backend(store.get(batch_id), api_keys).submit(
+            [(custom_id, prompt) for custom_id, _, _, prompt in requests]
+        )
+    except Exception as e:
+        store.update(batch_id, status=FAILED, error=str(e))
+        raise RuntimeError(f"일괄 처리 제출 실패: {e}") from e
+    store.update(batch_id, remote_id=remote_id, status=SUBMITTED, submitted_ts=time.time())
+    return batch_id
+
+
+def poll_batch(batch_id, api_keys, store=None):
+    """제공업체에서 처리 상태를 받아 기록하고 갱신된 기록 반환 (처리 중이 아니면 그대로 반환)"""
+    store = store or get_batch_store()
+    record = store.get(batch_id)
+    if record is None:
+        raise ValueError(f"일괄 처리 기록을 찾을 수 없습니다: {batch_id}")
+    if record['status'] != SUBMITTED:
+        return record
+    status = _backend(record, api_keys).status(record['remote_id'])
+    fields = {
+        'status': status['state'], 'remote_status': status['remote_status'],
+        'completed': status['completed'], 'failed': status['failed']
+    }
+    if status['error']:
+        fields['error'] = status['error']
+    if status['state'] != SUBMITTED:
+        fields['ended_ts'] = time.time()
+    store.update(batch_id, **fields)
+    return store.get(batch_id)
+
+
+def cancel_batch(batch_id, api_keys, store=None):
+    """제공업체에 취소를 요청하고 취소됨으로 기록 (이미 끝난 일괄 처리는 그대로 둠)"""
+    store = store or get_batch_store()
+    record = store.get(batch_id)
+    if record is None:
+        raise ValueError(f"일괄 처리 기록을 찾을 수 없습니다: {batch_id}")
+    if record['status'] in (SUBMITTING, SUBMITTED):
+        if record['remote_id']:
+            _backend(record, api_keys).cancel(record['remote_id'])
+        store.update(batch_id, status=CANCELLED, ended_ts=time.time())
+    return store.get(batch_id)
+
+
+def collect_batch(batch_id, api_keys, store=None, on_progress=None):
+    """끝난 일괄 처리의 결과를 스트리밍으로 읽어 파싱하고 문제 은행 또는 JSON Lines 파일에 기록
+
+    WRITE_BATCH_SIZE개씩 유사 중복을 검사해 기록하고 기록한 요청을 표시하므로, 중간에 멈춰도
+    다시 호출하면 남은 요청만 이어서 기록합니다. on_progress(진행률, 메시지)로 진행 상황을 알립니다.
+    """
+    store = store or get_batch_store()
+    record = store.get(batch_id)
+    if record is None:
+        raise ValueError(f"일괄 처리 기록을 찾을 수 없습니다: {batch_id}")
+    if record['status'] != ENDED:
+        raise ValueError(f"결과를 수집할 수 없는 상태입니다: {STATUS_LABELS.get(record['status'], record['status'])}")
+    params = record['params']
+    items = params['items']
+    pending = store.pending_requests(batch_id)
+    total = len(pending)
+    metrics = get_metrics_store()
+    # (custom_id, 항목 번호, AI가 반환한 문제 dict)
+    buffer = []
+    finished = {}
+
+    def flush():
+        duplicates = set()
+        if buffer and params['skip_duplicates']:
+            report = find_near_duplicates([data for _, _, data in buffer], get_question_bank(), params['dedup_threshold'])
+            duplicates = {entry['index'] for entry in report}
+        questions = []
+        for i, (custom_id, item_index, data) in enumerate(buffer):
+            if i not in duplicates:
+                questions += build_questions(items[item_index], [data])
+                finished[custom_id][2] += 1
+        write_output(params['output'], questions)
+        store.finish_requests(batch_id, [(custom_id, *row) for custom_id, row in finished.items()])
+        buffer.clear()
+        finished.clear()
+
+    done = 0
+    results = _backend(record, api_keys).results(record['remote_id'])
+    for custom_id, text, error, prompt_tokens, completion_tokens, cached_tokens in results:
+        if custom_id not in pending:
+            continue
+        item_index, size = pending.pop(custom_id)
+        done += 1
+        if error is None:
+            questions_data, parse_errors = parse_ai_response(text, items[item_index]['question_type'])
+            metrics.record_parse(record['provider'], len(questions_data), len(parse_errors))
+            if not questions_data:
+                error = f"응답을 파싱하지 못했습니다. {describe_parse_errors(parse_errors)}"
+        if error is not None:
+            finished[custom_id] = [REQUEST_FAILED, 0, 0, prompt_tokens, completion_tokens, cached_tokens, error]
+        else:
+            finished[custom_id] = [REQUEST_SAVED, len(questions_data), 0, prompt_tokens, completion_tokens, cached_tokens, None]
+            buffer += [(custom_id, item_index, data) for data in questions_data]
+        if len(buffer) >= WRITE_BATCH_SIZE:
+            flush()
+        if on_progress and total:
+            on_progress(done / total, f"결과 {done}/{total}개 기록 중")
+    flush()
+    # 결과 파일에 없는 요청(제공업체가 처리하지 못한 요청)은 실패로 표시
+    store.finish_requests(batch_id, [
+        (custom_id, REQUEST_FAILED, 0, 0, None, None, None, "결과가 없습니다.") for custom_id in pending
+    ])
+    store.update(batch_id, status=COLLECTED, collected_ts=time.time())
+    return batch_summary(batch_id, store)
+
+
+def batch_summary(batch_id, store=None):
+    """일괄 처리 결과 요약 (항목별 결과, 처리량, 일괄 처리 비용과 같은 요청을 동기 호출했을 때의 비용)"""
+    store = store or get_batch_store()
+    record = store.get(batch_id)
+    if record is None:
+        raise ValueError(f"일괄 처리 기록을 찾을 수 없습니다: {batch_id}")
+    params = record['params']
+    items = []
+    for totals in store.item_totals(batch_id):
+        item = params['items'][totals['item_index']]
+        items.append({
+            'subject': item['subject'],
+            'question_type': item['question_type'],
+            'difficulty': item['difficulty'],
+            'requested': totals['requested'],
+            'generated': totals['generated'],
+            'saved': totals['saved'],
+            'failed_requests': totals['failed_requests'],
+            'prompt_tokens': totals['prompt_tokens'],
+            'completion_tokens': totals['completion_tokens'],
+            'cached_tokens': totals['cached_tokens']
+        })
+    prompt_tokens = sum(item['prompt_tokens'] for item in items)
+    completion_tokens = sum(item['completion_tokens'] for item in items)
+    cached_tokens = sum(item['cached_tokens'] for item in items)
+    sync_cost = estimate_cost(record['model'], prompt_tokens, completion_tokens, cached_tokens)
+    finished_ts = record['collected_ts'] or record['ended_ts']
+    elapsed = finished_ts - record['submitted_ts'] if finished_ts and record['submitted_ts'] else None
+    saved = sum(item['saved'] for item in items)
+    return {
+        'id': record['id'],
+        'provider': record['provider'],
+        'model': record['model'],
+        'remote_id': record['remote_id'],
+        'status': record['status'],
+        'items': items,
+        'requests': record['request_count'],
+        'failed_requests': sum(item['failed_requests'] for item in items),
+        'requested': sum(item['requested'] for item in items),
+        'generated': sum(item['generated'] for item in items),
+        'saved': saved,
+        'output': params['output'],
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'cached_tokens': cached_tokens,
+        'cost_usd': sync_cost * BATCH_PRICE_RATIO if sync_cost is not None else None,
+        'sync_cost_usd': sync_cost,
+        'elapsed': elapsed,
+        'questions_per_sec': saved / elapsed if elapsed else None
+    }
+
+
+def run_batch(ctx, batch_id, api_keys, poll_interval=POLL_INTERVAL, store=None):
+    """제출한 일괄 처리가 끝날 때까지 poll_interval초마다 상태를 확인하고 결과를 기록한 뒤 요약 반환
+
+    ctx는 작업 컨텍스트(JobContext/LocalJobContext)입니다. 작업이 취소되면 확인만 멈추고(JobCancelled)
+    제공업체 쪽 일괄 처리는 그대로 두므로 같은 기록 ID로 다시 실행하면 이어서 진행합니다.
+    """
+    store = store or get_batch_store()
+    record = poll_batch(batch_id, api_keys, store)
+    while record['status'] == SUBMITTED:
+        ctx.progress(
+            0.9 * record['completed'] / max(record['request_count'], 1),
+            f"제공업체 처리 중 ({record['remote_status'] or '대기'}): "
+            f"요청 {record['completed']}/{record['request_count']}개 완료"
+        )
+        deadline = time.monotonic() + poll_interval
+        while time.monotonic() < deadline:
+            ctx.check_cancelled()
+            time.sleep(min(0.2, max(deadline - time.monotonic(), 0)))
+        record = poll_batch(batch_id, api_keys, store)
+    if record['status'] == ENDED:
+        ctx.check_cancelled()
+        ctx.progress(0.9, "결과를 기록하고 있습니다...")
+        summary = collect_batch(
+            batch_id, api_keys, store, on_progress=lambda fraction, message: ctx.progress(0.9 + 0.1 * fraction, message)
+        )
+    else:
+        summary = batch_summary(batch_id, store)
+    summary['error'] = record['error']
+    return summary
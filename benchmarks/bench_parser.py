@@ -0,0 +1,93 @@
+"""AI 응답 파서 처리량 벤치마크
+
+여러 MB 크기의 합성 응답(산문, 코드 블록, 후행 쉼표, 깨진 객체, 잘린 끝부분 포함)을 만들어
+한 번에 파싱할 때와 스트리밍 조각으로 나누어 넣을 때의 처리량을 측정합니다.
+
+    python benchmarks/bench_parser.py --size-mb 4
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_parser import JsonObjectStream, parse_json_objects  # noqa: E402
+
+
+def make_question(i):
+    return {
+        'question': f"{i}번 문제: 함수 f(x) = x² - {i % 9}x + 3의 최솟값은? {{중괄호}} \"인용\"",
+        'options': [f"선택지 {i}-{j}" for j in range(4)],
+        'correct_answer': random.choice(['①', '②', '③', '④']),
+        'explanation': "f(x)를 완전제곱식으로 바꾸면 꼭짓점에서 최솟값을 가집니다. " * 3
+    }
+
+
+def synthetic_response(size_bytes, seed=0):
+    """size_bytes 이상 크기의 합성 응답과 그 안의 온전한 문제 수 반환"""
+    random.seed(seed)
+    parts = ["다음은 요청하신 문제입니다.\n```json\n[\n"]
+    size = 0
+    valid = 0
+    i = 0
+    while size < size_bytes:
+        text = json.dumps(make_question(i), ensure_ascii=False)
+        roll = random.random()
+        if roll < 0.05:
+            text = text[:-1] + ",}"          # 후행 쉼표 (복구 가능)
+            valid += 1
+        elif roll < 0.08:
+            text = text.replace('"answer"', '"answer', 1).replace('"correct_answer"', '"correct_answer', 1)  # 깨진 객체
+        else:
+            valid += 1
+        parts.append(text + ",\n")
+        if random.random() < 0.02:
+            parts.append("```\n중간 설명 문장 [참고] } 괄호가 섞인 산문\n```json\n")
+        size += len(text.encode('utf-8'))
+        i += 1
+    parts.append("]\n```\n")
+    parts.append(json.dumps(make_question(i), ensure_ascii=False)[:60])  # 잘린 끝부분
+    return "".join(parts), valid
+
+
+def measure(label, func, text, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - started)
+    megabytes = len(text.encode('utf-8')) / 1024 / 1024
+    print(f"{label:<24} {best * 1000:8.1f} ms  {megabytes / best:7.1f} MB/s")
+    return result
+
+
+def parse_streaming(text, piece=64):
+    parser = JsonObjectStream()
+    objects = []
+    for start in range(0, len(text), piece):
+        objects.extend(parser.feed(text[start:start + piece]))
+    objects.extend(parser.close())
+    return objects, parser.errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=4.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text, valid = synthetic_response(int(args.size_mb * 1024 * 1024))
+    print(f"응답 크기 {len(text.encode('utf-8')) / 1024 / 1024:.1f} MB, 온전한 문제 {valid}개")
+
+    objects, errors = measure("parse_json_objects", parse_json_objects, text, args.repeat)
+    print(f"  복구 {len(objects)}개, 실패 구간 {len(errors)}개")
+    objects, errors = measure("stream feed (64자 조각)", parse_streaming, text, args.repeat)
+    print(f"  복구 {len(objects)}개, 실패 구간 {len(errors)}개")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""앱 시작 시간 벤치마크
+
+새 프로세스에서 앱 모듈을 가져오는 시간과, 메뉴(탭)별 첫 화면을 그리는 시간(콜드 스타트)과
+같은 세션에서 다시 그리는 시간을 측정합니다. 각 측정은 별도 프로세스에서 실행하며, 측정이 끝난 뒤
+제공업체 SDK 등 무거운 패키지가 불러와졌는지도 함께 표시합니다.
+
+    python benchmarks/bench_startup.py --questions 1000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP = os.path.join(ROOT, "test_creator.py")
+TABS = ["AI 문제 생성", "작업 목록", "수동 문제 출제", "문제 은행", "문제 통계", "시험지 생성", "채점", "요청 모니터링", "설정"]
+# 앱이 가져오는 모듈 (test_creator.py의 import 순서)
+APP_MODULES = [
+    "analytics", "bank_io", "core", "clients", "dedup", "exam_builder", "exam_render", "generation", "grading",
+    "jobs", "providers", "question_bank", "rate_limiter", "response_cache", "response_parser", "telemetry"
+]
+# 특정 기능을 실제로 사용할 때만 불러와야 하는 패키지
+HEAVY_MODULES = ["openai", "anthropic", "requests", "reportlab", "docx", "pandas"]
+
+
+def loaded_heavy_modules():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def child_imports():
+    """streamlit과 앱 모듈 가져오기 시간 (ms)"""
+    timings = {}
+    started = time.perf_counter()
+    import streamlit  # noqa: F401
+    timings['streamlit'] = (time.perf_counter() - started) * 1000
+    for name in APP_MODULES:
+        started = time.perf_counter()
+        __import__(name)
+        timings[name] = (time.perf_counter() - started) * 1000
+    return {'timings': timings, 'heavy': loaded_heavy_modules()}
+
+
+def child_render(tab):
+    """한 메뉴의 첫 화면과 재실행 시간 (ms)"""
+    from streamlit.testing.v1 import AppTest
+
+    # AppTest 자체의 실행 비용을 빼기 위해 빈 스크립트 실행 시간을 먼저 측정
+    baseline = AppTest.from_string("import streamlit as st\nst.write('')", default_timeout=120)
+    started = time.perf_counter()
+    baseline.run()
+    baseline_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    baseline.run()
+    baseline_rerun_ms = (time.perf_counter() - started) * 1000
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.session_state["menu"] = tab
+    started = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    at.run()
+    rerun_ms = (time.perf_counter() - started) * 1000
+    return {
+        'first': max(0.0, first_ms - baseline_ms),
+        'rerun': max(0.0, rerun_ms - baseline_rerun_ms),
+        'errors': [e.message for e in at.exception],
+        'heavy': loaded_heavy_modules()
+    }
+
+
+def run_child(args, env):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", *args],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def seed_bank(count, bank=None, start=0):
+    """측정용 문제 은행에 합성 문제 저장 (start는 첫 문제 번호, 이미 저장한 문제에 이어서 추가할 때 사용)"""
+    from question_bank import QuestionBank
+
+    types = ['객관식', '주관식', 'O/X']
+    questions = []
+    for i in range(start, start + count):
+        q_type = types[i % 3]
+        question = {
+            'type': q_type, 'subject': f"과목{i % 5}", 'difficulty': ['쉬움', '보통', '어려움'][i // 3 % 3],
+            'question': f"{i}번 벤치마크 문제: 광합성에서 빛에너지가 화학 에너지로 바뀌는 과정 {i * 7919 % 10007}"
+        }
+        if q_type == '객관식':
+            question.update(options=["가", "나", "다", "라"], correct_answer="①")
+        elif q_type == 'O/X':
+            question['correct_answer'] = "O"
+        else:
+            question['answer'] = "엽록체"
+        questions.append(question)
+    (bank or QuestionBank()).add_many(questions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=1000, help="측정용 문제 은행의 문제 수")
+    parser.add_argument('--data-dir', help="기존 데이터 디렉터리 사용 (지정하면 문제를 추가하지 않음)")
+    parser.add_argument('--child', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child[0] == "imports":
+            result = child_imports()
+        else:
+            result = child_render(args.child[1])
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ, EXAM_BOT_DATA_DIR=args.data_dir or temp_dir)
+        if not args.data_dir:
+            os.environ['EXAM_BOT_DATA_DIR'] = temp_dir
+            seed_bank(args.questions)
+
+        result = run_child(["imports"], env)
+        total = sum(result['timings'].values())
+        print(f"모듈 가져오기 (새 프로세스)     {total:8.1f} ms")
+        for name, elapsed in sorted(result['timings'].items(), key=lambda item: -item[1]):
+            print(f"  {name:<28} {elapsed:8.1f} ms")
+        print(f"  불러온 무거운 패키지: {', '.join(result['heavy']) or '없음'}")
+
+        print(f"\n{'메뉴':<16} {'첫 화면':>10} {'재실행':>10}  불러온 무거운 패키지")
+        for tab in TABS:
+            result = run_child(["render", tab], env)
+            print(f"{tab:<16} {result['first']:8.1f} ms {result['rerun']:8.1f} ms  "
+                  f"{', '.join(result['heavy']) or '없음'}")
+            for error in result['errors']:
+                print(f"  오류: {error}")
+
+
+if __name__ == "__main__":
+    main()
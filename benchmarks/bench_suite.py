@@ -0,0 +1,465 @@
+"""오프라인 성능 벤치마크 모음
+
+로컬 스텁 서버(stub_servers.py)로 OpenAI/Anthropic/Gemini API를 대신해 네트워크와 API 키 없이 실행하며,
+다음 항목을 측정해 JSON 파일로 저장합니다. --compare로 이전 결과 파일과 비교하면 느려진 항목을 표시합니다.
+
+- generation: 제공업체별 일반/스트리밍 묶음 생성 처리량과 첫 문제까지의 시간
+- batch: 같은 매니페스트를 동기 호출(run_batch_job)과 일괄 처리 API(batch_api)로 생성했을 때의 처리량과 예상 비용
+  (스텁 일괄 처리는 --batch-latency초 뒤에 끝나므로 처리량은 이 값에 좌우됨)
+- prompt: 같은 문제 수를 유형별 요청(공통 앞부분 캐시 없음)과 혼합 유형 요청(공통 앞부분 캐시)으로 생성했을 때의
+  문제당 입력/출력 토큰, 캐시 적중 토큰, 예상 비용과 문제당 시간 (스텁은 글자 수를 토큰 수로 셈)
+- parse: 합성 응답(여러 MB)의 parse_ai_response / 스트리밍 파서 처리량
+- bank: 문제 1k/10k/100k개에서 필터, 페이지 조회, 검색, 통계 조회 지연과 "문제 은행" 화면 렌더링 시간
+- exam: 같은 문제 은행에서 구성표 기반 시험지 조립과 형(variant) 생성 시간
+- grading: 4개 형으로 치른 합성 응답 CSV(기본 10만 명 × 30문항)의 읽기와 채점/문항 분석 시간
+
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes 1000,10000 --latency 0.05 --error-rate 0.1
+    python benchmarks/bench_suite.py --compare benchmarks/results/bench-20260101-120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from bench_parser import synthetic_response  # noqa: E402
+from bench_startup import run_child, seed_bank  # noqa: E402
+from stub_servers import BASE_URL_ENV, PROVIDERS, start_stub_servers  # noqa: E402
+
+SECTIONS = ['generation', 'batch', 'prompt', 'parse', 'bank', 'exam', 'grading']
+DEFAULT_SIZES = [1000, 10000, 100000]
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+# --compare에서 이 비율 이상, MIN_DELTA_MS 이상 나빠진 항목을 느려짐으로 표시
+DEFAULT_THRESHOLD = 0.10
+MIN_DELTA_MS = 1.0
+
+
+def timed(func, repeat=5):
+    """func를 repeat번 실행한 시간의 중앙값(ms)과 마지막 결과"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def bench_generation(core, servers, total, chunk_size, concurrency):
+    """제공업체별 일반/스트리밍 생성 처리량"""
+    from generation import generate_in_chunks, stream_in_chunks
+    from response_parser import parse_json_objects
+
+    def make_prompt(size, index, num_chunks):
+        return core.create_prompt("객관식", "과학", "보통", size)
+
+    results = {}
+    for provider in PROVIDERS:
+        generate = getattr(core, f"generate_with_{provider}")
+        stream = getattr(core, f"stream_with_{provider}")
+        # SDK 가져오기와 연결 생성은 측정에서 제외
+        generate("bench", make_prompt(1, 0, 1))
+        list(stream("bench", make_prompt(1, 0, 1)))
+        for mode in ("generate", "stream"):
+            config = servers[provider].config
+            requests_before, errors_before = config.requests, config.errors
+            started = time.perf_counter()
+            if mode == "generate":
+                events = generate_in_chunks(
+                    lambda prompt: generate("bench", prompt), make_prompt, parse_json_objects,
+                    total, chunk_size, concurrency
+                )
+            else:
+                events = stream_in_chunks(lambda prompt: stream("bench", prompt), make_prompt, total, chunk_size, concurrency)
+            questions = 0
+            failed_chunks = 0
+            first_question = None
+            for event in events:
+                if event['type'] == 'question':
+                    questions += 1
+                    if first_question is None:
+                        first_question = time.perf_counter() - started
+                elif event['error']:
+                    failed_chunks += 1
+            elapsed = time.perf_counter() - started
+            results[f"{provider}.{mode}"] = {
+                'questions': questions,
+                'questions_per_sec': questions / elapsed,
+                'elapsed_ms': elapsed * 1000,
+                'first_question_ms': first_question * 1000 if first_question is not None else None,
+                'failed_chunks': failed_chunks,
+                'requests': config.requests - requests_before,
+                'injected_errors': config.errors - errors_before
+            }
+            print(f"  {provider:<10} {mode:<9} {questions:4d}문제 {questions / elapsed:8.1f}문제/s  "
+                  f"첫 문제 {results[f'{provider}.{mode}']['first_question_ms'] or 0:7.1f} ms  실패 묶음 {failed_chunks}")
+    return results
+
+
+def bench_batch(core, data_dir, total, chunk_size, concurrency, poll_interval=0.2):
+    """동기 호출과 일괄 처리 API의 처리량과 비용 비교 (OpenAI/Anthropic)"""
+    from batch_api import BATCH_BACKENDS, BatchStore, run_batch, submit_batch
+    from jobs import LocalJobContext
+
+    store = BatchStore(os.path.join(data_dir, "provider_batches.db"))
+    manifest = {'items': [{'subject': "과학", 'type': "객관식", 'count': total, 'chunk_size': chunk_size,
+                           'concurrency': concurrency}]}
+    results = {}
+    for provider in BATCH_BACKENDS:
+        api_keys = {provider: "bench"}
+        params = core.make_batch_params(
+            manifest, ai_provider=provider, force_fresh=True, skip_duplicates=False,
+            output=os.path.join(data_dir, f"{provider}-sync.jsonl")
+        )
+        started = time.perf_counter()
+        sync = core.run_batch_job(LocalJobContext(), params, api_keys)
+        sync_elapsed = time.perf_counter() - started
+
+        params['output'] = os.path.join(data_dir, f"{provider}-batch.jsonl")
+        batch_id = submit_batch(params, api_keys, store)
+        summary = run_batch(LocalJobContext(), batch_id, api_keys, poll_interval, store)
+        results[provider] = {
+            'sync_questions_per_sec': sync['saved'] / sync_elapsed,
+            'batch_questions_per_sec': summary['questions_per_sec'] or 0.0,
+            'sync_elapsed_ms': sync_elapsed * 1000,
+            'batch_elapsed_ms': (summary['elapsed'] or 0.0) * 1000,
+            'sync_questions': sync['saved'],
+            'batch_questions': summary['saved'],
+            'requests': summary['requests'],
+            'failed_requests': summary['failed_requests'],
+            'sync_cost_usd': summary['sync_cost_usd'],
+            'batch_cost_usd': summary['cost_usd']
+        }
+        print(f"  {provider:<10} 동기 {sync['saved']:4d}문제 {results[provider]['sync_questions_per_sec']:7.1f}문제/s  "
+              f"일괄 처리 {summary['saved']:4d}문제 {results[provider]['batch_questions_per_sec']:7.1f}문제/s  "
+              f"비용 ${summary['sync_cost_usd'] or 0:.4f} → ${summary['cost_usd'] or 0:.4f}")
+    return results
+
+
+def bench_prompt(core, total, chunk_size, concurrency):
+    """유형별 요청(이전 방식)과 공통 앞부분을 캐시하는 혼합 유형 요청의 문제당 토큰/비용/시간 비교"""
+    import threading
+
+    from generation import generate_in_chunks
+    from telemetry import CallRecord, estimate_cost
+
+    def legacy_prompt(prompt):
+        # 구분선을 없애 공통 앞부분도 요청마다 사용자 메시지로 보내던 이전 방식 재현
+        return prompt.replace(core.PROMPT_SEPARATOR, "\n\n", 1)
+
+    def run(provider, plan, make_prompt):
+        generate = getattr(core, f"generate_with_{provider}")
+        model = core.MODEL_SETTINGS[provider]['model']
+        records = []
+        lock = threading.Lock()
+
+        def call(prompt):
+            record = CallRecord(provider, model, "generate", prompt)
+            with record.bound():
+                response = generate("bench", prompt)
+            with lock:
+                records.append(record)
+            return response
+
+        questions = 0
+        started = time.perf_counter()
+        for question_type, count in plan:
+            events = generate_in_chunks(
+                call, lambda size, index, num_chunks: make_prompt(question_type, size, index * chunk_size),
+                lambda text: core.parse_ai_response(text, question_type), count, chunk_size, concurrency
+            )
+            questions += sum(event['type'] == 'question' for event in events)
+        elapsed = time.perf_counter() - started
+        prompt_tokens = sum(r.prompt_tokens or 0 for r in records)
+        cached_tokens = sum(r.cached_tokens or 0 for r in records)
+        completion_tokens = sum(r.completion_tokens or 0 for r in records)
+        per_question = max(questions, 1)
+        return {
+            'questions': questions,
+            'requests': len(records),
+            'prompt_tokens_per_question': prompt_tokens / per_question,
+            'cached_tokens_per_question': cached_tokens / per_question,
+            'completion_tokens_per_question': completion_tokens / per_question,
+            'cost_usd_per_question': (estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens) or 0.0) / per_question,
+            'per_question_ms': elapsed * 1000 / per_question
+        }
+
+    split = core.mixed_type_counts(total)
+    results = {}
+    for provider in PROVIDERS:
+        # SDK 가져오기와 연결 생성은 측정에서 제외
+        getattr(core, f"generate_with_{provider}")("bench", "bench")
+        before = run(provider, list(split.items()),
+                     lambda question_type, size, start: legacy_prompt(
+                         core.create_prompt(question_type, "과학", "보통", size, start=start)
+                     ))
+        after = run(provider, [(core.MIXED_TYPE, total)],
+                    lambda question_type, size, start: core.create_prompt(
+                        question_type, "과학", "보통", size, start=start
+                    ))
+        results[provider] = {'before': before, 'after': after}
+        for label, row in (("유형별", before), ("혼합+캐시", after)):
+            print(f"  {provider:<10} {label:<6} 요청 {row['requests']:3d}회  문제당 입력 {row['prompt_tokens_per_question']:6.0f}"
+                  f" (캐시 {row['cached_tokens_per_question']:6.0f})  출력 {row['completion_tokens_per_question']:5.0f}  "
+                  f"${row['cost_usd_per_question']:.6f}  {row['per_question_ms']:6.1f} ms/문제")
+    return results
+
+
+def bench_parse(core, size_mb, repeat):
+    """AI 응답 파싱 처리량"""
+    from response_parser import JsonObjectStream
+
+    text, valid = synthetic_response(int(size_mb * 1024 * 1024))
+    megabytes = len(text.encode('utf-8')) / 1024 / 1024
+
+    def parse_stream():
+        parser = JsonObjectStream()
+        objects = []
+        for start in range(0, len(text), 64):
+            objects.extend(parser.feed(text[start:start + 64]))
+        objects.extend(parser.close())
+        return objects
+
+    results = {}
+    for name, func in (("parse_ai_response", lambda: core.parse_ai_response(text, "객관식")[0]),
+                       ("stream_feed", parse_stream)):
+        elapsed, objects = timed(func, repeat)
+        results[name] = {
+            'mb': megabytes,
+            'mb_per_sec': megabytes / (elapsed / 1000),
+            'elapsed_ms': elapsed,
+            'questions': len(objects or []),
+            'expected_questions': valid
+        }
+        print(f"  {name:<20} {elapsed:8.1f} ms  {megabytes / (elapsed / 1000):7.1f} MB/s  {len(objects or [])}/{valid}문제")
+    return results
+
+
+def bench_bank(bank, size, data_dir, repeat, render):
+    """문제 수가 size개인 문제 은행의 조회 지연"""
+    page = 20
+    cases = {
+        'count_ms': lambda: bank.count(subject="과목1", question_type="객관식"),
+        'query_first_page_ms': lambda: bank.query(limit=page, subject="과목1"),
+        'query_last_page_ms': lambda: bank.query(
+            limit=page, after_id=bank.page_anchor(max(0, size // 5 - page), subject="과목1"), subject="과목1"
+        ),
+        'search_ms': lambda: bank.search("광합성 에너지", limit=page),
+        'search_count_ms': lambda: bank.search_count("광합성 에너지"),
+        'ids_ms': lambda: bank.ids(subject="과목2", difficulty="보통"),
+        'statistics_ms': lambda: bank.statistics()
+    }
+    results = {}
+    for name, func in cases.items():
+        results[name], _ = timed(func, repeat)
+    if render:
+        env = dict(os.environ, EXAM_BOT_DATA_DIR=data_dir)
+        for tab, key in (("문제 은행", "render_bank"), ("문제 통계", "render_statistics")):
+            rendered = run_child(["render", tab], env)
+            results[f"{key}_first_ms"] = rendered['first']
+            results[f"{key}_rerun_ms"] = rendered['rerun']
+    print("  " + "  ".join(f"{name[:-3]} {value:.1f}" for name, value in results.items()) + "  (ms)")
+    return results
+
+
+def bench_exam(bank, repeat):
+    """구성표 기반 시험지 조립과 형 생성 시간"""
+    from exam_builder import assemble_exams, make_blueprint, make_variants
+
+    blueprint = make_blueprint([
+        {'subject': None, 'type': "객관식", 'difficulty': None, 'count': 15},
+        {'subject': None, 'type': "O/X", 'difficulty': "쉬움", 'count': 5},
+        {'subject': None, 'type': "주관식", 'difficulty': None, 'count': 5}
+    ], subject="과목1", target_difficulty=2.0)
+    results = {}
+    results['assemble_1_ms'], exams = timed(lambda: assemble_exams(bank, blueprint, 1, seed=0), repeat)
+    results['assemble_10_ms'], _ = timed(lambda: assemble_exams(bank, blueprint, 10, seed=0), repeat)
+    questions = bank.get_many(exams[0])
+    results['variants_26_ms'], _ = timed(lambda: make_variants(questions, 26, seed=0), repeat)
+    print("  " + "  ".join(f"{name[:-3]} {value:.1f}" for name, value in results.items()) + "  (ms)")
+    return results
+
+
+def bench_grading(rows, repeat, num_questions=30, num_variants=4):
+    """합성 응답 CSV 읽기와 채점 시간 (학생마다 정답률이 다르게)"""
+    import csv
+    import io
+
+    import numpy as np
+
+    from exam_builder import ANSWER_SYMBOLS, make_variants, variant_questions
+    from grading import grade, load_responses, make_answer_key
+
+    questions = []
+    for i in range(num_questions):
+        question = {'id': i + 1, 'type': "O/X" if i % 5 == 4 else "객관식", 'question': f"문제 {i + 1}"}
+        if question['type'] == "객관식":
+            question['options'] = [f"보기 {j + 1}" for j in range(len(ANSWER_SYMBOLS))]
+            question['correct_answer'] = ANSWER_SYMBOLS[i % len(ANSWER_SYMBOLS)]
+        else:
+            question['correct_answer'] = "OX"[i % 2]
+        questions.append(question)
+    variants = make_variants(questions, num_variants, seed=0)
+    key = make_answer_key({'title': "벤치마크", 'questions': questions}, variants)
+    printed = [variant_questions(questions, variants, v) for v in range(num_variants)]
+
+    rng = np.random.default_rng(0)
+    ability = rng.random(rows)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["학번", "형"] + [str(i + 1) for i in range(num_questions)])
+    for student in range(rows):
+        variant = student % num_variants
+        knows = rng.random(num_questions) < ability[student]
+        guesses = rng.integers(len(ANSWER_SYMBOLS), size=num_questions)
+        answers = [
+            q['correct_answer'] if know else (ANSWER_SYMBOLS[guess] if q['type'] == "객관식" else "OX"[guess % 2])
+            for q, know, guess in zip(printed[variant], knows, guesses)
+        ]
+        writer.writerow([f"S{student:06d}", key['labels'][variant]] + answers)
+    data = output.getvalue().encode('utf-8')
+
+    results = {}
+    results['load_ms'], responses = timed(lambda: load_responses(key, [("responses.csv", io.BytesIO(data))]), repeat)
+    results['grade_ms'], _ = timed(lambda: grade(key, responses), repeat)
+    results['rows_per_sec'] = rows / ((results['load_ms'] + results['grade_ms']) / 1000)
+    print(f"  load {results['load_ms']:.1f}  grade {results['grade_ms']:.1f} (ms)  {results['rows_per_sec']:,.0f} rows/s")
+    return results
+
+
+def flatten(results, prefix=""):
+    """중첩된 결과를 {'section.name.metric': 값} 형태로 펼침"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(previous, current, threshold=DEFAULT_THRESHOLD):
+    """두 결과 파일의 지표 비교 (_ms는 작을수록, _per_sec는 클수록 좋음) 후 느려진 항목 수 반환"""
+    old = flatten(previous['results'])
+    new = flatten(current['results'])
+    regressions = 0
+    print(f"\n{'지표':<52} {'이전':>10} {'현재':>10} {'변화':>8}")
+    for name in sorted(set(old) & set(new)):
+        if name.endswith("_ms"):
+            worse = new[name] > old[name] * (1 + threshold) and new[name] - old[name] >= MIN_DELTA_MS
+        elif name.endswith("_per_sec"):
+            worse = new[name] < old[name] * (1 - threshold)
+        else:
+            continue
+        change = (new[name] - old[name]) / old[name] if old[name] else 0.0
+        regressions += worse
+        print(f"{name:<52} {old[name]:10.1f} {new[name]:10.1f} {change:+7.0%}{'  느려짐' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', default=",".join(SECTIONS), help=f"실행할 항목 ({','.join(SECTIONS)})")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)), help="문제 은행 크기 목록")
+    parser.add_argument('--repeat', type=int, default=5, help="지연 측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument('--no-render', action='store_true', help="화면 렌더링 측정 생략")
+    parser.add_argument('--questions', type=int, default=60, help="제공업체/방식별 생성할 문제 수")
+    parser.add_argument('--chunk-size', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.2, help="스텁 서버 첫 응답 지연 (초)")
+    parser.add_argument('--piece-delay', type=float, default=0.005, help="스텁 서버 스트리밍 조각 간격 (초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="스텁 서버 오류 응답 비율 (0~1)")
+    parser.add_argument('--batch-latency', type=float, default=2.0, help="스텁 서버 일괄 처리 소요 시간 (초)")
+    parser.add_argument('--parse-mb', type=float, default=2.0, help="파싱 측정용 합성 응답 크기 (MB)")
+    parser.add_argument('--grading-rows', type=int, default=100000, help="채점 측정용 합성 응답 행 수")
+    parser.add_argument('--output', help="결과 JSON 경로 (기본: benchmarks/results/bench-<시각>.json)")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="느려짐으로 표시할 변화 비율")
+    args = parser.parse_args()
+    sections = [s.strip() for s in args.only.split(",") if s.strip()]
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 앱 모듈이 가져오기 시점에 읽는 데이터 디렉터리와 제공업체 주소를 먼저 지정
+        os.environ['EXAM_BOT_DATA_DIR'] = os.path.join(temp_dir, "app")
+        servers = start_stub_servers(args.latency, args.piece_delay, args.error_rate, seed=0,
+                                     batch_latency=args.batch_latency)
+        for provider, server in servers.items():
+            os.environ[BASE_URL_ENV[provider]] = server.base_url
+        import core
+
+        results = {}
+        if 'generation' in sections:
+            print(f"[generation] 스텁 지연 {args.latency}s, 오류 비율 {args.error_rate:.0%}")
+            results['generation'] = bench_generation(core, servers, args.questions, args.chunk_size, args.concurrency)
+        if 'batch' in sections:
+            print(f"[batch] 스텁 일괄 처리 {args.batch_latency}s")
+            batch_dir = os.path.join(temp_dir, "batch")
+            os.makedirs(batch_dir)
+            results['batch'] = bench_batch(core, batch_dir, args.questions, args.chunk_size, args.concurrency)
+        if 'prompt' in sections:
+            print(f"[prompt] 문제 {args.questions}개, 요청당 {args.chunk_size}개")
+            results['prompt'] = bench_prompt(core, args.questions, args.chunk_size, args.concurrency)
+        if 'parse' in sections:
+            print(f"[parse] 합성 응답 {args.parse_mb} MB")
+            results['parse'] = bench_parse(core, args.parse_mb, args.repeat)
+        if 'bank' in sections or 'exam' in sections:
+            from question_bank import QuestionBank
+
+            data_dir = os.path.join(temp_dir, "bank")
+            os.makedirs(data_dir)
+            bank = QuestionBank(os.path.join(data_dir, "questions.db"))
+            seeded = 0
+            for size in sorted(sizes):
+                # 작은 크기부터 문제를 이어서 추가
+                seed_bank(size - seeded, bank, start=seeded)
+                seeded = size
+                if 'bank' in sections:
+                    print(f"[bank] 문제 {size}개")
+                    results.setdefault('bank', {})[str(size)] = bench_bank(
+                        bank, size, data_dir, args.repeat, not args.no_render
+                    )
+                if 'exam' in sections:
+                    print(f"[exam] 문제 {size}개")
+                    results.setdefault('exam', {})[str(size)] = bench_exam(bank, args.repeat)
+        if 'grading' in sections:
+            print(f"[grading] 응답 {args.grading_rows}행")
+            results['grading'] = bench_grading(args.grading_rows, args.repeat)
+        for server in servers.values():
+            server.stop()
+
+    report = {
+        'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'args': vars(args),
+        'results': results
+    }
+    path = args.output
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {path}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n느려진 항목 {regressions}개")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
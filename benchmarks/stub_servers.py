@@ -0,0 +1,543 @@
+"""벤치마크용 AI 제공업체 스텁 서버
+
+OpenAI(chat.completions), Anthropic(messages), Gemini(generateContent) API를 흉내 내는 로컬 HTTP 서버입니다.
+프롬프트의 "문제 N개"(혼합 유형은 "객관식 a개, 주관식 b개, O/X c개")를 읽어 유형별 합성 문제를 JSON 배열로 응답하며,
+첫 응답 지연, 스트리밍 조각 간격, 오류(500/429) 비율을 제공업체마다 지정할 수 있습니다.
+실제 API 키나 네트워크 없이 SDK 호출 경로 전체를 측정합니다.
+
+프롬프트 캐시도 흉내 냅니다. 한 번 받은 시스템 프롬프트를 다시 받으면 OpenAI는 prompt_tokens_details.cached_tokens,
+Gemini는 cachedContentTokenCount로 알리고, Anthropic은 cache_control이 있는 시스템 블록만 처음에는
+cache_creation_input_tokens, 이후에는 cache_read_input_tokens로 알립니다. 토큰 수는 글자 수로 셉니다.
+
+OpenAI Batch API(/v1/files, /v1/batches)와 Anthropic Message Batches API(/v1/messages/batches)도 흉내 내며,
+제출한 일괄 처리는 --batch-latency초에 걸쳐 진행된 뒤 끝납니다. 요청별 오류도 --error-rate 비율로 섞습니다.
+
+    python benchmarks/stub_servers.py --latency 0.3 --error-rate 0.05
+    python benchmarks/stub_servers.py --batch-latency 10
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+PROVIDERS = ['openai', 'anthropic', 'gemini']
+# 스트리밍 응답 조각 크기 (글자 수)
+PIECE_SIZE = 40
+STUB_TYPES = ('객관식', '주관식', 'O/X')
+
+
+def _stub_item(q_type, index):
+    item = {
+        'type': q_type,
+        'question': f"스텁 문제 {time.time_ns()}-{index}: 광합성 명반응에서 생성되는 물질은?",
+        'explanation': "명반응에서는 빛에너지로 ATP와 NADPH가 만들어지고 산소가 방출됩니다."
+    }
+    if q_type == '객관식':
+        item.update(options=["ATP와 NADPH", "포도당", "이산화탄소", "물"], correct_answer="①")
+    elif q_type == 'O/X':
+        item.update(question=f"스텁 문제 {time.time_ns()}-{index}: 명반응에서 산소가 방출된다.", correct_answer="O")
+    else:
+        item['answer'] = "ATP와 NADPH"
+    return item
+
+
+def stub_questions(prompt):
+    """프롬프트에서 요청한 유형과 개수만큼 합성 문제 JSON 응답 텍스트 생성"""
+    types = "|".join(re.escape(q_type) for q_type in STUB_TYPES)
+    counts = [(q_type, int(count)) for q_type, count in re.findall(rf'({types}) (\d+)개', prompt)]
+    if not counts:
+        match = re.search(rf'(?:({types}) )?문제 (\d+)개', prompt)
+        counts = [((match.group(1) or '객관식') if match else '객관식', int(match.group(2)) if match else 5)]
+    items = [_stub_item(q_type, i) for q_type, count in counts for i in range(count)]
+    return "다음은 요청하신 문제입니다.\n```json\n" + json.dumps(items, ensure_ascii=False, indent=2) + "\n```"
+
+
+def _pieces(text):
+    return [text[i:i + PIECE_SIZE] for i in range(0, len(text), PIECE_SIZE)]
+
+
+def _prompt_text(body):
+    """OpenAI/Anthropic 요청 본문의 마지막 사용자 메시지 텍스트"""
+    prompt = body['messages'][-1]['content']
+    if isinstance(prompt, list):
+        prompt = "".join(block.get('text', '') for block in prompt)
+    return prompt
+
+
+def _system_text(body):
+    """OpenAI/Anthropic 요청 본문의 시스템 프롬프트 텍스트와 Anthropic cache_control 지정 여부"""
+    system = body.get('system')
+    if system is None:
+        system = "".join(m['content'] for m in body['messages'] if m.get('role') == "system")
+    if isinstance(system, list):
+        return "".join(block.get('text', '') for block in system), any('cache_control' in block for block in system)
+    return system, False
+
+
+def _openai_usage(body, text, cache=None):
+    """OpenAI 사용량 (한 번 본 시스템 프롬프트는 자동 캐시 적중)"""
+    system, prompt = _system_text(body)[0], _prompt_text(body)
+    cached = len(system) if cache is not None and system and cache.hit(system) else 0
+    prompt_tokens = len(system) + len(prompt)
+    return {'prompt_tokens': prompt_tokens, 'completion_tokens': len(text), 'total_tokens': prompt_tokens + len(text),
+            'prompt_tokens_details': {'cached_tokens': cached}}
+
+
+def _anthropic_usage(body, output_tokens, cache=None):
+    """Anthropic 사용량 (cache_control이 있는 시스템 프롬프트는 input_tokens 대신 캐시 저장/읽기 토큰으로 집계)"""
+    system, cacheable = _system_text(body)
+    usage = {'input_tokens': len(_prompt_text(body)), 'output_tokens': output_tokens,
+             'cache_creation_input_tokens': 0, 'cache_read_input_tokens': 0}
+    if not cacheable:
+        usage['input_tokens'] += len(system)
+    elif cache is not None and cache.hit(system):
+        usage['cache_read_input_tokens'] = len(system)
+    else:
+        usage['cache_creation_input_tokens'] = len(system)
+    return usage
+
+
+def _openai_completion(body, cache=None):
+    text = stub_questions(_prompt_text(body))
+    return {
+        'id': "chatcmpl-stub", 'object': "chat.completion", 'created': int(time.time()), 'model': body.get('model', 'stub'),
+        'choices': [{'index': 0, 'message': {'role': "assistant", 'content': text}, 'finish_reason': "stop"}],
+        'usage': _openai_usage(body, text, cache)
+    }
+
+
+def _anthropic_message(body, cache=None):
+    text = stub_questions(_prompt_text(body))
+    return {
+        'id': "msg_stub", 'type': "message", 'role': "assistant", 'model': body.get('model', 'stub'),
+        'content': [{'type': "text", 'text': text}], 'stop_reason': "end_turn", 'stop_sequence': None,
+        'usage': _anthropic_usage(body, len(text), cache)
+    }
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z") if timestamp else None
+
+
+def _multipart_file(content_type, body):
+    """multipart/form-data 본문에서 업로드된 파일 (이름, 내용)"""
+    message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    for part in message.iter_parts():
+        if part.get_filename():
+            return part.get_filename(), part.get_payload(decode=True)
+    return None, b""
+
+
+class StubBatch:
+    """스텁 서버에 제출된 일괄 처리 하나 (생성 후 latency초에 걸쳐 요청이 차례로 끝남)"""
+
+    def __init__(self, batch_id, requests, latency, input_file_id=None):
+        self.id = batch_id
+        self.requests = requests
+        self.latency = latency
+        self.input_file_id = input_file_id
+        self.created = time.time()
+        self.cancelled_at = None
+        self.results = None
+        self.output_file_id = None
+        self.error_file_id = None
+        self.lock = threading.Lock()
+
+    def finished_count(self, now=None):
+        """지금까지 끝난 요청 수"""
+        now = min(now or time.time(), self.cancelled_at or float('inf'))
+        if self.latency <= 0:
+            return len(self.requests)
+        return min(len(self.requests), int(len(self.requests) * (now - self.created) / self.latency))
+
+    @property
+    def ended(self):
+        return self.cancelled_at is not None or self.finished_count() == len(self.requests)
+
+    @property
+    def ended_at(self):
+        if self.cancelled_at is not None:
+            return self.cancelled_at
+        return self.created + max(self.latency, 0) if self.ended else None
+
+
+class PromptCache:
+    """제공업체 프롬프트 캐시 흉내 (한 번 본 시스템 프롬프트는 다음 요청부터 적중)"""
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def hit(self, text):
+        with self._lock:
+            seen = text in self._seen
+            self._seen.add(text)
+            return seen
+
+
+class StubConfig:
+    """스텁 서버 동작 설정과 요청 통계"""
+
+    def __init__(self, latency=0.2, piece_delay=0.005, error_rate=0.0, seed=None, batch_latency=2.0):
+        self.latency = latency
+        self.piece_delay = piece_delay
+        self.error_rate = error_rate
+        self.batch_latency = batch_latency
+        self.requests = 0
+        self.errors = 0
+        self.batches = {}
+        self.files = {}
+        self.prompt_cache = PromptCache()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def next_error(self):
+        """이번 요청에 돌려줄 오류 상태 코드 (정상이면 None)"""
+        with self._lock:
+            self.requests += 1
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                return self._random.choice([429, 500, 503])
+        return None
+
+    def new_id(self, prefix):
+        with self._lock:
+            self._next_id += 1
+            return f"{prefix}{self._next_id:06d}"
+
+    def add_file(self, data):
+        file_id = self.new_id("file-stub")
+        self.files[file_id] = data
+        return file_id
+
+    def add_batch(self, prefix, requests, input_file_id=None):
+        batch = StubBatch(self.new_id(prefix), requests, self.batch_latency, input_file_id)
+        self.batches[batch.id] = batch
+        return batch
+
+    def batch_results(self, batch, make_result):
+        """끝난 일괄 처리의 요청별 결과 [(custom_id, 본문 또는 None(오류), 상태), ...] (처음 한 번만 만듦)"""
+        with self._lock:
+            if batch.results is None:
+                finished = batch.finished_count()
+                batch.results = []
+                for i, (custom_id, body) in enumerate(batch.requests):
+                    if i >= finished:
+                        batch.results.append((custom_id, None, "canceled"))
+                    elif self._random.random() < self.error_rate:
+                        batch.results.append((custom_id, None, "errored"))
+                    else:
+                        # 일괄 처리 요청도 동기 호출과 같은 프롬프트 캐시를 사용
+                        batch.results.append((custom_id, make_result(body, self.prompt_cache), "succeeded"))
+        return batch.results
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    provider = None
+    config = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = urlsplit(self.path).path
+        if "/batches" in path or path.endswith("/files"):
+            self._batch_post(path, raw)
+            return
+        body = json.loads(raw or b'{}')
+        status = self.config.next_error()
+        time.sleep(self.config.latency)
+        if status is not None:
+            self._send_json(status, {'error': {'type': 'stub_error', 'message': f"스텁 오류 {status}"}},
+                            {'Retry-After': '0'} if status == 429 else None)
+            return
+        if self.provider == 'openai':
+            self._openai(body)
+        elif self.provider == 'anthropic':
+            self._anthropic(body)
+        else:
+            self._gemini(body)
+
+    def do_GET(self):
+        self._batch_get(urlsplit(self.path).path)
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_events(self, events):
+        # 연결을 닫아 응답 끝을 알리는 SSE 스트림
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        for name, payload in events:
+            data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+            line = (f"event: {name}\n" if name else "") + f"data: {data}\n\n"
+            self.wfile.write(line.encode('utf-8'))
+            self.wfile.flush()
+            if self.config.piece_delay:
+                time.sleep(self.config.piece_delay)
+
+    def _openai(self, body):
+        if not body.get('stream'):
+            self._send_json(200, _openai_completion(body, self.config.prompt_cache))
+            return
+        text = stub_questions(_prompt_text(body))
+        model = body.get('model', 'stub')
+        chunk = {'id': "chatcmpl-stub", 'object': "chat.completion.chunk", 'created': int(time.time()), 'model': model}
+        events = [(None, dict(chunk, choices=[{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]))
+                  for piece in _pieces(text)]
+        events.append((None, dict(chunk, choices=[{'index': 0, 'delta': {}, 'finish_reason': "stop"}])))
+        if (body.get('stream_options') or {}).get('include_usage'):
+            events.append((None, dict(chunk, choices=[], usage=_openai_usage(body, text, self.config.prompt_cache))))
+        events.append((None, "[DONE]"))
+        self._send_events(events)
+
+    def _anthropic(self, body):
+        if not body.get('stream'):
+            self._send_json(200, _anthropic_message(body, self.config.prompt_cache))
+            return
+        text = stub_questions(_prompt_text(body))
+        message = {
+            'id': "msg_stub", 'type': "message", 'role': "assistant", 'model': body.get('model', 'stub'),
+            'content': [], 'stop_reason': None, 'stop_sequence': None,
+            'usage': _anthropic_usage(body, 1, self.config.prompt_cache)
+        }
+        events = [
+            ('message_start', {'type': "message_start", 'message': message}),
+            ('content_block_start', {'type': "content_block_start", 'index': 0, 'content_block': {'type': "text", 'text': ""}})
+        ]
+        events += [
+            ('content_block_delta', {'type': "content_block_delta", 'index': 0, 'delta': {'type': "text_delta", 'text': piece}})
+            for piece in _pieces(text)
+        ]
+        events += [
+            ('content_block_stop', {'type': "content_block_stop", 'index': 0}),
+            ('message_delta', {'type': "message_delta", 'delta': {'stop_reason': "end_turn", 'stop_sequence': None},
+                               'usage': {'output_tokens': len(text)}}),
+            ('message_stop', {'type': "message_stop"})
+        ]
+        self._send_events(events)
+
+    def _gemini(self, body):
+        prompt = body['contents'][0]['parts'][0]['text']
+        system = "".join(part.get('text', '') for part in (body.get('systemInstruction') or {}).get('parts', []))
+        text = stub_questions(prompt)
+        usage = {'promptTokenCount': len(system) + len(prompt), 'candidatesTokenCount': len(text)}
+        if system and self.config.prompt_cache.hit(system):
+            usage['cachedContentTokenCount'] = len(system)
+        if ':streamGenerateContent' not in self.path:
+            self._send_json(200, {'candidates': [{'content': {'parts': [{'text': text}]}}], 'usageMetadata': usage})
+            return
+        events = [(None, {'candidates': [{'content': {'parts': [{'text': piece}]}}]}) for piece in _pieces(text)]
+        events[-1][1]['usageMetadata'] = usage
+        self._send_events(events)
+
+
+    # 일괄 처리 API
+    def _batch_post(self, path, raw):
+        config = self.config
+        if self.provider == 'openai' and path == "/v1/files":
+            filename, data = _multipart_file(self.headers.get('Content-Type', ""), raw)
+            file_id = config.add_file(data)
+            self._send_json(200, {
+                'id': file_id, 'object': "file", 'bytes': len(data), 'created_at': int(time.time()),
+                'filename': filename or "upload.jsonl", 'purpose': "batch", 'status': "processed"
+            })
+        elif self.provider == 'openai' and path == "/v1/batches":
+            body = json.loads(raw)
+            lines = config.files.get(body.get('input_file_id'), b"").decode('utf-8').splitlines()
+            requests = [(record['custom_id'], record['body']) for record in map(json.loads, filter(str.strip, lines))]
+            if not requests:
+                self._send_json(400, {'error': {'type': "invalid_request_error", 'message': "빈 입력 파일"}})
+                return
+            self._send_json(200, self._openai_batch(config.add_batch("batch_stub", requests, body['input_file_id'])))
+        elif self.provider == 'anthropic' and path == "/v1/messages/batches":
+            requests = [(request['custom_id'], request['params']) for request in json.loads(raw)['requests']]
+            self._send_json(200, self._anthropic_batch(config.add_batch("msgbatch_stub", requests)))
+        elif path.endswith("/cancel") and path.split("/")[-2] in config.batches:
+            batch = config.batches[path.split("/")[-2]]
+            if not batch.ended:
+                batch.cancelled_at = time.time()
+            self._send_json(200, self._openai_batch(batch) if self.provider == 'openai' else self._anthropic_batch(batch))
+        else:
+            self._send_json(404, {'error': {'type': "not_found_error", 'message': path}})
+
+    def _batch_get(self, path):
+        config = self.config
+        parts = path.strip("/").split("/")
+        if self.provider == 'openai' and parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in config.batches:
+            self._send_json(200, self._openai_batch(config.batches[parts[2]]))
+        elif self.provider == 'openai' and parts[:2] == ["v1", "files"] and parts[3:] == ["content"] \
+                and parts[2] in config.files:
+            self._send_bytes(config.files[parts[2]])
+        elif self.provider == 'anthropic' and parts[:3] == ["v1", "messages", "batches"] and len(parts) >= 4 \
+                and parts[3] in config.batches:
+            batch = config.batches[parts[3]]
+            if parts[4:] == ["results"] and batch.ended:
+                self._send_bytes(self._anthropic_results(batch))
+            else:
+                self._send_json(200, self._anthropic_batch(batch))
+        else:
+            self._send_json(404, {'error': {'type': "not_found_error", 'message': path}})
+
+    def _send_bytes(self, data):
+        self.send_response(200)
+        self.send_header('Content-Type', "application/binary")
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _openai_batch(self, batch):
+        finished = batch.finished_count()
+        status = "in_progress"
+        if batch.ended:
+            status = "cancelled" if batch.cancelled_at is not None else "completed"
+            with batch.lock:
+                if batch.results is None:
+                    self._openai_files(batch)
+        failed = sum(1 for _, body, result in batch.results or [] if body is None and result != "canceled")
+        return {
+            'id': batch.id, 'object': "batch", 'endpoint': "/v1/chat/completions", 'errors': None,
+            'input_file_id': batch.input_file_id, 'completion_window': "24h", 'status': status,
+            'output_file_id': batch.output_file_id, 'error_file_id': batch.error_file_id,
+            'created_at': int(batch.created), 'in_progress_at': int(batch.created),
+            'completed_at': int(batch.ended_at) if status == "completed" else None,
+            'cancelled_at': int(batch.cancelled_at) if batch.cancelled_at else None,
+            'request_counts': {'total': len(batch.requests), 'completed': finished - failed, 'failed': failed},
+            'metadata': None
+        }
+
+    def _openai_files(self, batch):
+        """끝난 일괄 처리의 결과 파일(성공)과 오류 파일 생성"""
+        outputs, errors = [], []
+        for custom_id, body, result in self.config.batch_results(batch, _openai_completion):
+            if result == "canceled":
+                continue
+            line = {'id': self.config.new_id("batch_req_"), 'custom_id': custom_id, 'error': None,
+                    'response': {'status_code': 200 if body else 500, 'request_id': "req_stub",
+                                 'body': body or {'error': {'type': "server_error", 'message': "스텁 오류"}}}}
+            (outputs if body else errors).append(json.dumps(line, ensure_ascii=False))
+        if outputs:
+            batch.output_file_id = self.config.add_file("\n".join(outputs).encode('utf-8') + b"\n")
+        if errors:
+            batch.error_file_id = self.config.add_file("\n".join(errors).encode('utf-8') + b"\n")
+
+    def _anthropic_batch(self, batch):
+        finished = batch.finished_count()
+        counts = {'processing': len(batch.requests) - finished, 'succeeded': finished, 'errored': 0,
+                  'canceled': 0, 'expired': 0}
+        if batch.ended:
+            counts = {'processing': 0, 'succeeded': 0, 'errored': 0, 'canceled': 0, 'expired': 0}
+            for _, _, result in self.config.batch_results(batch, _anthropic_message):
+                counts[result] += 1
+        host, port = self.server.server_address[:2]
+        return {
+            'id': batch.id, 'type': "message_batch", 'processing_status': "ended" if batch.ended else "in_progress",
+            'request_counts': counts, 'created_at': _iso(batch.created), 'ended_at': _iso(batch.ended_at),
+            'expires_at': _iso(batch.created + 86400), 'cancel_initiated_at': _iso(batch.cancelled_at),
+            'archived_at': None,
+            'results_url': f"http://{host}:{port}/v1/messages/batches/{batch.id}/results" if batch.ended else None
+        }
+
+    def _anthropic_results(self, batch):
+        lines = []
+        for custom_id, body, result in self.config.batch_results(batch, _anthropic_message):
+            if result == "succeeded":
+                entry = {'type': result, 'message': body}
+            elif result == "errored":
+                entry = {'type': result, 'error': {'type': "error", 'error': {'type': "api_error", 'message': "스텁 오류"}}}
+            else:
+                entry = {'type': result}
+            lines.append(json.dumps({'custom_id': custom_id, 'result': entry}, ensure_ascii=False))
+        return "\n".join(lines).encode('utf-8') + b"\n"
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 연결을 먼저 끊는 경우(스트리밍 취소, 연결 풀 정리)는 무시
+        pass
+
+
+class StubServer:
+    """제공업체 하나를 흉내 내는 스텁 서버 (별도 스레드에서 실행)"""
+
+    def __init__(self, provider, config=None, host="127.0.0.1", port=0):
+        if provider not in PROVIDERS:
+            raise ValueError(f"지원하지 않는 제공업체입니다: {provider}")
+        self.provider = provider
+        self.config = config or StubConfig()
+        handler = type(f"{provider.title()}StubHandler", (StubHandler,), {'provider': provider, 'config': self.config})
+        self._server = _QuietServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """SDK/환경 변수에 넣을 base URL"""
+        host, port = self._server.server_address[:2]
+        suffix = {'openai': "/v1", 'anthropic': "", 'gemini': "/v1beta"}[self.provider]
+        return f"http://{host}:{port}{suffix}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# 각 스텁 서버의 base URL을 지정하는 환경 변수 (clients.py와 각 SDK가 읽음)
+BASE_URL_ENV = {'openai': "OPENAI_BASE_URL", 'anthropic': "ANTHROPIC_BASE_URL", 'gemini': "GEMINI_BASE_URL"}
+
+
+def start_stub_servers(latency=0.2, piece_delay=0.005, error_rate=0.0, seed=None, batch_latency=2.0):
+    """세 제공업체의 스텁 서버를 시작하고 {제공업체: StubServer} 반환"""
+    return {
+        provider: StubServer(provider, StubConfig(latency, piece_delay, error_rate, seed, batch_latency)).start()
+        for provider in PROVIDERS
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.2, help="첫 응답까지의 지연 (초)")
+    parser.add_argument('--piece-delay', type=float, default=0.005, help="스트리밍 조각 사이 지연 (초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="오류 응답 비율 (0~1)")
+    parser.add_argument('--batch-latency', type=float, default=2.0, help="일괄 처리가 끝나기까지의 시간 (초)")
+    args = parser.parse_args()
+
+    servers = start_stub_servers(args.latency, args.piece_delay, args.error_rate, batch_latency=args.batch_latency)
+    for provider, server in servers.items():
+        print(f"{BASE_URL_ENV[provider]}={server.base_url}")
+    print("종료하려면 Ctrl+C")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""AI 시험문제 출제 봇 명령줄 도구 (Streamlit 없이 실행)
+
+매니페스트(JSON)에 적은 과목/유형/난이도/문항 수 조합을 한 번에 생성해 문제 은행이나 JSON Lines 파일에 기록하고,
+같은 일괄 생성을 HTTP로 요청할 수 있는 로컬 API 서버를 실행합니다. API 키는 OPENAI_API_KEY,
+ANTHROPIC_API_KEY, GEMINI_API_KEY 환경 변수에서 읽습니다.
+
+--offline은 모든 요청을 OpenAI Batch API / Anthropic Message Batches로 한 번에 제출합니다(최대 24시간, 비용 50%).
+제출한 일괄 처리는 data/provider_batches.db에 기록되므로 기다리지 않고 끝낸 뒤 offline resume으로 결과를 받을 수 있습니다.
+
+    python cli.py generate manifest.json --provider gemini --routing failover
+    python cli.py generate manifest.json --output questions.jsonl
+    python cli.py generate manifest.json --provider anthropic --offline --no-wait
+    python cli.py offline list
+    python cli.py offline resume 3
+    python cli.py serve --port 8600
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+from api_server import API_HOST, API_PORT, start_api_server
+from batch_api import (
+    BATCH_BACKENDS, COLLECTED, POLL_INTERVAL, STATUS_LABELS, batch_summary, cancel_batch, get_batch_store,
+    poll_batch, run_batch, submit_batch
+)
+from core import (
+    API_KEY_ENV, OUTPUT_BANK, api_keys_from_env, batch_title, make_batch_params, run_batch_job
+)
+from jobs import JobCancelled, LocalJobContext
+from providers import ROUTE_FAILOVER, ROUTE_HEDGE, ROUTE_SINGLE
+
+# 진행 상황 출력 간격 (초)
+PROGRESS_INTERVAL = 1.0
+
+
+def load_manifest(path):
+    """매니페스트 JSON 파일 읽기 ('-'이면 표준 입력)"""
+    if path == "-":
+        return json.load(sys.stdin)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_progress():
+    """진행률과 메시지를 표준 오류에 출력하는 콜백 (메시지가 그대로면 PROGRESS_INTERVAL마다 한 번)"""
+    last = {'at': 0.0, 'message': None}
+
+    def on_progress(fraction, message):
+        now = time.monotonic()
+        if message == last['message'] and now - last['at'] < PROGRESS_INTERVAL:
+            return
+        last.update(at=now, message=message)
+        print(f"[{fraction:6.1%}] {message or ''}", file=sys.stderr)
+    return on_progress
+
+
+def run_in_thread(ctx, func, *args):
+    """작업 함수를 별도 스레드에서 실행하고 (결과, 오류) 반환 (취소되면 결과 None)
+
+    Ctrl+C를 받으면 ctx를 취소하고 작업 함수가 멈출 때까지 기다립니다.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = func(ctx, *args)
+        except JobCancelled:
+            pass
+        except Exception as e:
+            outcome['error'] = e
+
+    worker = threading.Thread(target=target, name="batch")
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+    except KeyboardInterrupt:
+        print("취소하는 중... (진행 중인 요청이 끝나면 종료)", file=sys.stderr)
+        ctx.cancel()
+        worker.join()
+    return outcome.get('result'), outcome.get('error')
+
+
+def print_offline_summary(summary):
+    """일괄 처리 API 결과 요약 출력 (비용은 같은 요청을 동기 호출했을 때와 비교)"""
+    if summary['status'] != COLLECTED:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 1 if summary['error'] else 0
+    for item in summary['items']:
+        if item['failed_requests']:
+            print(f"경고: {item['subject']} {item['question_type']} ({item['difficulty']}) "
+                  f"요청 {item['failed_requests']}개 실패", file=sys.stderr)
+    destination = "문제 은행" if summary['output'] == OUTPUT_BANK else summary['output']
+    print(f"{summary['generated']}/{summary['requested']}문제 생성, {summary['saved']}문제를 {destination}에 기록",
+          file=sys.stderr)
+    if summary['elapsed']:
+        print(f"제출부터 {summary['elapsed']:.1f}초 ({summary['questions_per_sec']:.2f}문제/초)", file=sys.stderr)
+    if summary['cost_usd'] is not None:
+        print(f"예상 비용 ${summary['cost_usd']:.4f} (동기 호출 시 ${summary['sync_cost_usd']:.4f}, "
+              f"토큰 {summary['prompt_tokens']:,} + {summary['completion_tokens']:,}, "
+              f"캐시 입력 {summary['cached_tokens']:,})", file=sys.stderr)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 1 if summary['failed_requests'] or summary['error'] else 0
+
+
+def wait_offline(batch_id, api_keys, poll_interval):
+    ctx = LocalJobContext(f"offline:{batch_id}", on_progress=print_progress())
+    summary, error = run_in_thread(ctx, run_batch, batch_id, api_keys, poll_interval)
+    if error is not None:
+        print(f"작업 실패: {error}", file=sys.stderr)
+        return 1
+    if summary is None:
+        print(f"확인을 멈췄습니다. 제공업체의 일괄 처리는 계속 진행되며 'python cli.py offline resume {batch_id}'로 "
+              "이어서 결과를 받을 수 있습니다.", file=sys.stderr)
+        return 130
+    return print_offline_summary(summary)
+
+
+def run_generate(args):
+    try:
+        params = make_batch_params(
+            load_manifest(args.manifest),
+            ai_provider=args.provider, routing=args.routing, output=args.output,
+            batch_concurrency=args.batch_concurrency, dedup_threshold=args.dedup_threshold,
+            streaming=True if args.stream else None, force_fresh=True if args.force_fresh else None,
+            skip_duplicates=False if args.keep_duplicates else None
+        )
+    except (OSError, ValueError) as e:
+        print(f"매니페스트 오류: {e}", file=sys.stderr)
+        return 2
+    if args.offline and params['ai_provider'] not in BATCH_BACKENDS:
+        print(f"일괄 처리 API는 {', '.join(BATCH_BACKENDS)}만 지원합니다.", file=sys.stderr)
+        return 2
+    api_keys = api_keys_from_env()
+    if params['ai_provider'] not in api_keys:
+        print(f"{API_KEY_ENV[params['ai_provider']]} 환경 변수에 API 키를 설정해주세요.", file=sys.stderr)
+        return 2
+
+    print(batch_title(params), file=sys.stderr)
+    if args.offline:
+        try:
+            batch_id = submit_batch(params, api_keys)
+        except (RuntimeError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"일괄 처리 {batch_id}번을 제출했습니다.", file=sys.stderr)
+        if args.no_wait:
+            print(json.dumps({'id': batch_id}))
+            return 0
+        return wait_offline(batch_id, api_keys, args.poll_interval)
+
+    # Ctrl+C를 받으면 남은 묶음을 요청하지 않고 진행 중인 요청만 마친 뒤 종료
+    ctx = LocalJobContext("cli", on_progress=print_progress())
+    result, error = run_in_thread(ctx, run_batch_job, params, api_keys)
+    if error is not None:
+        print(f"작업 실패: {error}", file=sys.stderr)
+        return 1
+    if result is None:
+        print("작업이 취소되었습니다. 이미 끝난 항목의 문제는 기록되어 있습니다.", file=sys.stderr)
+        return 130
+
+    for warning in result['warnings']:
+        print(f"경고: {warning}", file=sys.stderr)
+    destination = "문제 은행" if result['output'] == OUTPUT_BANK else result['output']
+    print(f"{result['generated']}/{result['requested']}문제 생성, {result['saved']}문제를 {destination}에 기록 "
+          f"({result['elapsed']:.1f}초)", file=sys.stderr)
+    # 결과 요약 JSON은 표준 출력으로 (스크립트에서 사용)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 1 if result['failed_items'] else 0
+
+
+def run_offline(args):
+    store = get_batch_store()
+    if args.action == 'list':
+        for record in store.list():
+            print(f"{record['id']:>5}  {record['created_at']}  {record['provider']:<9} "
+                  f"{STATUS_LABELS.get(record['status'], record['status']):<6} "
+                  f"요청 {record['completed']}/{record['request_count']} (실패 {record['failed']})  "
+                  f"기록 {record['saved']}문제  {record['remote_id'] or ''}")
+        return 0
+    if args.id is None:
+        print("일괄 처리 ID를 지정해주세요.", file=sys.stderr)
+        return 2
+    record = store.get(args.id)
+    if record is None:
+        print(f"일괄 처리 {args.id}번을 찾을 수 없습니다.", file=sys.stderr)
+        return 2
+    api_keys = api_keys_from_env()
+    if record['provider'] not in api_keys:
+        print(f"{API_KEY_ENV[record['provider']]} 환경 변수에 API 키를 설정해주세요.", file=sys.stderr)
+        return 2
+    if args.action == 'cancel':
+        record = cancel_batch(args.id, api_keys)
+        print(f"일괄 처리 {args.id}번: {STATUS_LABELS.get(record['status'], record['status'])}", file=sys.stderr)
+        return 0
+    if args.action == 'status':
+        record = poll_batch(args.id, api_keys)
+        print(f"일괄 처리 {args.id}번: {STATUS_LABELS.get(record['status'], record['status'])} "
+              f"(요청 {record['completed']}/{record['request_count']}개 완료)", file=sys.stderr)
+        return print_offline_summary(dict(batch_summary(args.id), error=record['error']))
+    return wait_offline(args.id, api_keys, args.poll_interval)
+
+
+def run_serve(args):
+    server = start_api_server(args.port, args.host)
+    print(f"http://{args.host}:{server.server_address[1]}/batches", file=sys.stderr)
+    if not api_keys_from_env():
+        print(f"API 키 환경 변수({', '.join(API_KEY_ENV.values())})가 하나도 설정되어 있지 않습니다.", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="매니페스트의 문제를 일괄 생성")
+    generate.add_argument('manifest', help="매니페스트 JSON 파일 ('-'이면 표준 입력)")
+    generate.add_argument('--provider', choices=list(API_KEY_ENV), help="사용할 제공업체 (기본: 매니페스트 또는 gemini)")
+    generate.add_argument('--routing', choices=[ROUTE_SINGLE, ROUTE_FAILOVER, ROUTE_HEDGE],
+                          help="장애 조치/헤징 방식 (키가 설정된 다른 제공업체를 함께 사용)")
+    generate.add_argument('--output', help=f"결과 JSON Lines 파일 (이어쓰기, 기본: {OUTPUT_BANK} = 문제 은행)")
+    generate.add_argument('--batch-concurrency', type=int, help="동시에 생성할 매니페스트 항목 수")
+    generate.add_argument('--dedup-threshold', type=float, help="유사 중복으로 볼 유사도 (0~1)")
+    generate.add_argument('--stream', action='store_true', help="스트리밍 응답 사용")
+    generate.add_argument('--force-fresh', action='store_true', help="응답 캐시 무시")
+    generate.add_argument('--keep-duplicates', action='store_true', help="유사 중복 문제도 기록")
+    generate.add_argument('--offline', action='store_true',
+                          help=f"제공업체 일괄 처리 API로 제출 ({', '.join(BATCH_BACKENDS)}, 비용 50%%, 최대 24시간)")
+    generate.add_argument('--no-wait', action='store_true', help="--offline 제출 후 기다리지 않고 종료")
+    generate.add_argument('--poll-interval', type=float, default=POLL_INTERVAL, help="일괄 처리 상태 확인 간격 (초)")
+    generate.set_defaults(func=run_generate)
+
+    offline = commands.add_parser('offline', help="제출한 일괄 처리 API 작업 조회/이어서 받기/취소")
+    offline.add_argument('action', choices=['list', 'status', 'resume', 'cancel'])
+    offline.add_argument('id', type=int, nargs='?', help="일괄 처리 ID (offline list에서 확인)")
+    offline.add_argument('--poll-interval', type=float, default=POLL_INTERVAL, help="일괄 처리 상태 확인 간격 (초)")
+    offline.set_defaults(func=run_offline)
+
+    serve = commands.add_parser('serve', help="일괄 생성 HTTP API 서버 실행")
+    serve.add_argument('--host', default=API_HOST)
+    serve.add_argument('--port', type=int, default=API_PORT)
+    serve.set_defaults(func=run_serve)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import os
+import random
+import threading
+import time
+
+from telemetry import report_usage
+
+# 제공업체 SDK(openai, anthropic, requests)는 가져오는 데 시간이 오래 걸리므로 모듈 맨 위가 아니라
+# 해당 제공업체를 처음 사용할 때 가져옵니다. 문제 은행 등 다른 화면만 쓰는 세션은 SDK를 불러오지 않습니다.
+
+# 연결/응답 대기 시간 (초)
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 120
+
+# 429/5xx 응답 재시도 설정
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# 동시 요청 수 상한과 맞춘 연결 풀 크기
+POOL_SIZE = 16
+
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+
+# (제공업체, API 키, base_url)별 클라이언트 캐시
+# 모듈은 프로세스당 한 번만 로드되므로 Streamlit 재실행 사이에도 연결 풀이 유지됩니다.
+_clients = {}
+_lock = threading.Lock()
+
+
+def _get_or_create(key, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def get_openai_client(api_key, base_url=None):
+    """재사용 가능한 OpenAI 클라이언트 반환
+
+    SDK 자체 재시도(지수 백오프 + 지터)를 사용하며, base_url 또는 OPENAI_BASE_URL 환경변수로
+    로컬 스텁 서버를 지정할 수 있습니다.
+    """
+    def create():
+        import openai
+        return openai.OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=openai.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            max_retries=MAX_RETRIES
+        )
+
+    return _get_or_create(('openai', api_key, base_url), create)
+
+
+def get_anthropic_client(api_key, base_url=None):
+    """재사용 가능한 Anthropic 클라이언트 반환
+
+    base_url 또는 ANTHROPIC_BASE_URL 환경변수로 로컬 스텁 서버를 지정할 수 있습니다.
+    """
+    def create():
+        import anthropic
+        return anthropic.Anthropic(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=anthropic.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            max_retries=MAX_RETRIES
+        )
+
+    return _get_or_create(('anthropic', api_key, base_url), create)
+
+
+def get_http_session(provider, api_key):
+    """제공업체/API 키별 연결 풀을 가진 requests.Session 반환"""
+    def create():
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    return _get_or_create((provider, api_key, None), create)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """재시도 대기 시간 계산 (Retry-After 우선, 없으면 full jitter 지수 백오프)"""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def post_with_retry(session, url, max_retries=MAX_RETRIES, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs):
+    """타임아웃을 적용해 POST 요청을 보내고 429/5xx/연결 오류 시 백오프 후 재시도 (재시도 횟수는 호출 지표에 기록)"""
+    import requests
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.post(url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+            report_usage(retries=1)
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+            return response
+        retry_after = response.headers.get('Retry-After')
+        response.close()
+        report_usage(retries=1)
+        time.sleep(backoff_delay(attempt, retry_after))
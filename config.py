@@ -0,0 +1,10 @@
+import os
+
+# 문제 은행, 캐시 등 로컬 데이터를 저장할 디렉터리
+DATA_DIR = os.environ.get("EXAM_BOT_DATA_DIR", "data")
+
+
+def data_path(filename):
+    """데이터 디렉터리 안의 파일 경로 반환 (디렉터리가 없으면 생성)"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
@@ -0,0 +1,848 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from analytics import SOURCE_AI
+from bank_io import QUESTION_TYPES, write_questions
+from clients import (
+    GEMINI_BASE_URL, get_anthropic_client, get_http_session, get_openai_client, post_with_retry
+)
+from dedup import DEFAULT_THRESHOLD, find_near_duplicates
+from exam_builder import DIFFICULTY_LEVELS
+from generation import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY,
+    chunk_additional_info, generate_in_chunks, split_into_chunks, stream_in_chunks
+)
+from jobs import JobCancelled
+from providers import ROUTE_FAILOVER, ROUTE_HEDGE, ROUTE_SINGLE, Provider, Router, get_provider_stats
+from question_bank import get_question_bank
+from rate_limiter import estimate_request_tokens, get_rate_limiter
+from response_cache import get_response_cache, make_cache_key
+from response_parser import describe_parse_errors, parse_json_objects
+from telemetry import get_metrics_store, report_usage
+
+# 제공업체별 모델과 샘플링 파라미터 (응답 캐시 키에도 사용)
+MODEL_SETTINGS = {
+    'openai': {'model': "gpt-3.5-turbo", 'temperature': 0.7},
+    'anthropic': {'model': "claude-3-sonnet-20240229", 'max_tokens': 2000},
+    'gemini': {'model': "gemini-pro", 'temperature': 0.7, 'max_tokens': 2000}
+}
+
+
+def create_question(question_type, subject, difficulty, question_text, options=None, answer=None, explanation=None,
+                    source=None, provider=None):
+    """문제 생성 함수 (ID는 문제 은행에 저장할 때 발급, source/provider는 통계용 출처)"""
+    question = {
+        'type': question_type,
+        'subject': subject,
+        'difficulty': difficulty,
+        'question': question_text,
+        'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    if source:
+        question['source'] = source
+    if provider:
+        question['provider'] = provider
+
+    if question_type == '객관식':
+        question['options'] = options
+        question['correct_answer'] = answer
+    elif question_type == '주관식':
+        question['answer'] = answer
+    elif question_type == 'O/X':
+        question['correct_answer'] = answer
+
+    if explanation:
+        question['explanation'] = explanation
+
+    return question
+
+
+# create_prompt로 만들지 않은 프롬프트에 쓰는 시스템 지시문
+SYSTEM_INSTRUCTION = "당신은 전문적인 시험 문제 출제자입니다. 요청된 형식에 맞춰 정확하고 교육적인 문제를 생성해주세요."
+
+
+def openai_request_body(prompt):
+    """OpenAI chat.completions 요청 본문 (동기 호출과 일괄 처리 API가 같은 요청을 보내도록 공유)
+
+    공통 앞부분을 시스템 메시지로 맨 앞에 두어 OpenAI 자동 프롬프트 캐시가 재사용하게 합니다.
+    """
+    prefix, request = split_prompt(prompt)
+    return {
+        'model': MODEL_SETTINGS['openai']['model'],
+        'messages': [
+            {"role": "system", "content": prefix or SYSTEM_INSTRUCTION},
+            {"role": "user", "content": request}
+        ],
+        'temperature': MODEL_SETTINGS['openai']['temperature']
+    }
+
+
+def anthropic_request_body(prompt):
+    """Anthropic messages 요청 본문 (공통 앞부분은 cache_control로 표시한 시스템 프롬프트)"""
+    prefix, request = split_prompt(prompt)
+    body = {
+        'model': MODEL_SETTINGS['anthropic']['model'],
+        'max_tokens': MODEL_SETTINGS['anthropic']['max_tokens'],
+        'messages': [
+            {"role": "user", "content": request}
+        ]
+    }
+    if prefix:
+        body['system'] = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+    return body
+
+
+def gemini_request_body(prompt):
+    """Gemini generateContent 요청 본문 (공통 앞부분은 시스템 지시문, 지원 모델에서 자동 캐시)"""
+    settings = MODEL_SETTINGS['gemini']
+    prefix, request = split_prompt(prompt)
+    body = {
+        "contents": [{"parts": [{"text": request}]}],
+        "generationConfig": {
+            "temperature": settings['temperature'],
+            "maxOutputTokens": settings['max_tokens']
+        }
+    }
+    if prefix:
+        body["systemInstruction"] = {"parts": [{"text": prefix}]}
+    return body
+
+
+def openai_cached_tokens(usage):
+    """OpenAI 사용량 중 프롬프트 캐시에서 읽은 입력 토큰 수 (prompt_tokens에 포함됨)"""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return getattr(details, 'cached_tokens', None)
+
+
+def anthropic_usage(usage):
+    """Anthropic 사용량을 (전체 입력 토큰, 캐시에서 읽은 입력 토큰, 출력 토큰)으로 변환
+
+    input_tokens에는 캐시에 저장/캐시에서 읽은 토큰이 빠져 있으므로 더해서 다른 제공업체와 같은 기준으로 맞춥니다.
+    """
+    cache_write = getattr(usage, 'cache_creation_input_tokens', None) or 0
+    cache_read = getattr(usage, 'cache_read_input_tokens', None) or 0
+    return usage.input_tokens + cache_write + cache_read, cache_read, usage.output_tokens
+
+
+def generate_with_openai(api_key, prompt):
+    """OpenAI API로 문제 생성"""
+    try:
+        client = get_openai_client(api_key)
+        # 원시 응답에서 SDK 재시도 횟수를 읽어 호출 지표에 기록
+        raw = client.chat.completions.with_raw_response.create(
+            **openai_request_body(prompt)
+        )
+        response = raw.parse()
+        report_usage(
+            response.usage.prompt_tokens if response.usage else None,
+            response.usage.completion_tokens if response.usage else None,
+            getattr(raw, 'retries_taken', 0),
+            openai_cached_tokens(response.usage)
+        )
+        return response.choices[0].message.content
+    except Exception as e:
+        raise RuntimeError(f"OpenAI API 오류: {str(e)}") from e
+
+
+def generate_with_anthropic(api_key, prompt):
+    """Anthropic Claude API로 문제 생성"""
+    try:
+        client = get_anthropic_client(api_key)
+        raw = client.messages.with_raw_response.create(
+            **anthropic_request_body(prompt)
+        )
+        response = raw.parse()
+        prompt_tokens, cached_tokens, completion_tokens = anthropic_usage(response.usage)
+        report_usage(prompt_tokens, completion_tokens, getattr(raw, 'retries_taken', 0), cached_tokens)
+        return response.content[0].text
+    except Exception as e:
+        raise RuntimeError(f"Anthropic API 오류: {str(e)}") from e
+
+
+def generate_with_gemini(api_key, prompt):
+    """Google Gemini API로 문제 생성"""
+    try:
+        settings = MODEL_SETTINGS['gemini']
+        url = f"{GEMINI_BASE_URL}/models/{settings['model']}:generateContent?key={api_key}"
+        headers = {'Content-Type': 'application/json'}
+        data = gemini_request_body(prompt)
+
+        session = get_http_session('gemini', api_key)
+        response = post_with_retry(session, url, headers=headers, json=data)
+        response.raise_for_status()
+        result = response.json()
+        usage = result.get('usageMetadata', {})
+        report_usage(usage.get('promptTokenCount'), usage.get('candidatesTokenCount'),
+                     cached_tokens=usage.get('cachedContentTokenCount'))
+        return result['candidates'][0]['content']['parts'][0]['text']
+    except Exception as e:
+        raise RuntimeError(f"Gemini API 오류: {str(e)}") from e
+
+
+def stream_with_openai(api_key, prompt):
+    """OpenAI API 스트리밍 응답 (텍스트 조각 단위로 yield)"""
+    try:
+        client = get_openai_client(api_key)
+        # 마지막 조각으로 토큰 사용량을 받음
+        raw = client.chat.completions.with_raw_response.create(
+            **openai_request_body(prompt),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        report_usage(retries=getattr(raw, 'retries_taken', 0))
+        for chunk in raw.parse():
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if getattr(chunk, 'usage', None):
+                report_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens,
+                             cached_tokens=openai_cached_tokens(chunk.usage))
+    except Exception as e:
+        raise RuntimeError(f"OpenAI API 오류: {str(e)}") from e
+
+
+def stream_with_anthropic(api_key, prompt):
+    """Anthropic Claude API 스트리밍 응답"""
+    try:
+        client = get_anthropic_client(api_key)
+        raw = client.messages.with_raw_response.create(
+            **anthropic_request_body(prompt),
+            stream=True
+        )
+        report_usage(retries=getattr(raw, 'retries_taken', 0))
+        # 입력 토큰은 message_start, 출력 토큰은 message_delta 이벤트로 전달됨
+        for event in raw.parse():
+            if event.type == "message_start":
+                prompt_tokens, cached_tokens, _ = anthropic_usage(event.message.usage)
+                report_usage(prompt_tokens=prompt_tokens, cached_tokens=cached_tokens)
+            elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                yield event.delta.text
+            elif event.type == "message_delta":
+                report_usage(completion_tokens=event.usage.output_tokens)
+    except Exception as e:
+        raise RuntimeError(f"Anthropic API 오류: {str(e)}") from e
+
+
+def stream_with_gemini(api_key, prompt):
+    """Google Gemini API 스트리밍 응답 (streamGenerateContent, SSE)"""
+    try:
+        settings = MODEL_SETTINGS['gemini']
+        url = f"{GEMINI_BASE_URL}/models/{settings['model']}:streamGenerateContent?alt=sse&key={api_key}"
+        headers = {'Content-Type': 'application/json'}
+        data = gemini_request_body(prompt)
+
+        session = get_http_session('gemini', api_key)
+        with post_with_retry(session, url, headers=headers, json=data, stream=True) as response:
+            response.raise_for_status()
+            # SSE 응답은 UTF-8이지만 Content-Type에 charset이 없으면 requests가 ISO-8859-1로 해석하므로 직접 지정
+            response.encoding = 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                result = json.loads(line[len("data:"):])
+                # 사용량은 마지막 조각의 값이 최종 값
+                usage = result.get('usageMetadata', {})
+                report_usage(usage.get('promptTokenCount'), usage.get('candidatesTokenCount'),
+                             cached_tokens=usage.get('cachedContentTokenCount'))
+                for candidate in result.get('candidates', []):
+                    for part in candidate.get('content', {}).get('parts', []):
+                        if part.get('text'):
+                            yield part['text']
+    except Exception as e:
+        raise RuntimeError(f"Gemini API 오류: {str(e)}") from e
+
+
+# 한 번의 요청으로 객관식/주관식/O/X를 함께 생성하는 문제 유형
+MIXED_TYPE = "혼합"
+GENERATION_TYPES = QUESTION_TYPES + [MIXED_TYPE]
+# AI가 "type" 필드에 적을 수 있는 유형 표기
+TYPE_ALIASES = {
+    '객관식': '객관식', 'multiple_choice': '객관식', 'multiple-choice': '객관식', 'mcq': '객관식', '선다형': '객관식',
+    '주관식': '주관식', 'short_answer': '주관식', 'short-answer': '주관식', '단답형': '주관식', '서술형': '주관식',
+    'o/x': 'O/X', 'ox': 'O/X', 'o/x 문제': 'O/X', 'true_false': 'O/X', 'true/false': 'O/X', '진위형': 'O/X'
+}
+
+# 모든 요청에 똑같이 들어가는 프롬프트 앞부분 (출제 지침과 응답 형식)
+# 요청마다 바뀌는 조건은 뒤에 붙이므로 제공업체 프롬프트 캐시(Anthropic cache_control, OpenAI/Gemini 자동 캐시)가
+# 이 부분을 재사용합니다. 내용을 바꾸면 캐시가 처음부터 다시 만들어지므로 요청별 값은 넣지 않습니다.
+PROMPT_PREFIX = """당신은 전문적인 시험 문제 출제자입니다. 요청된 형식에 맞춰 정확하고 교육적인 문제를 생성해주세요.
+
+## 출제 원칙
+- 요청한 과목과 추가 요구사항의 범위 안에서, 교육과정에서 다루는 사실과 개념만 사용합니다.
+- 한 문제는 한 가지 개념이나 능력만 평가하고, 문제끼리 내용이 겹치거나 서로의 답을 알려주지 않게 합니다.
+- 문제 문장은 짧고 분명하게 쓰며, 필요한 조건은 모두 문제 안에 적습니다. 이중 부정은 쓰지 않습니다.
+- 정답은 반드시 하나로 정해져야 하며, 논란이 있거나 시점에 따라 달라지는 내용은 출제하지 않습니다.
+- 객관식 선택지는 4개이며 길이와 형식을 비슷하게 맞춥니다. "모두 정답", "정답 없음" 같은 선택지는 쓰지 않고,
+  오답 선택지는 학생들이 흔히 하는 오개념을 반영해 그럴듯하게 만듭니다. 정답 위치는 ①~④에 고르게 나눕니다.
+- O/X 문제는 참과 거짓이 분명한 하나의 진술로 쓰고, O와 X 정답이 한쪽으로 몰리지 않게 합니다.
+- 주관식 문제는 단어나 짧은 문장으로 답할 수 있게 하고, 정답에 허용할 수 있는 표현이 여럿이면 함께 적습니다.
+- 해설에는 정답인 이유와 주요 오답이 틀린 이유를 1~3문장으로 적습니다.
+
+## 난이도 기준
+- 쉬움: 기본 용어와 사실을 그대로 기억하면 풀 수 있는 문제
+- 보통: 개념을 이해하고 간단히 적용하거나 두 가지 사실을 연결해야 풀 수 있는 문제
+- 어려움: 여러 개념을 종합하거나, 자료를 해석하거나, 여러 단계의 추론이 필요한 문제
+
+## 응답 형식
+문제마다 아래 유형별 JSON 객체 하나로 작성하고, "type" 필드에 유형을 적습니다.
+모든 문제를 JSON 배열 하나로 반환하고, 배열 밖에는 아무것도 쓰지 않습니다.
+
+객관식:
+{"type": "객관식", "question": "문제 내용", "options": ["선택지1", "선택지2", "선택지3", "선택지4"], "correct_answer": "①", "explanation": "해설 내용"}
+
+주관식:
+{"type": "주관식", "question": "문제 내용", "answer": "정답 내용", "explanation": "해설 내용"}
+
+O/X:
+{"type": "O/X", "question": "문제 내용", "correct_answer": "O", "explanation": "해설 내용"}
+"""
+# 요청 부분 앞의 구분선 (split_prompt가 공통 앞부분을 떼어낼 때 사용)
+PROMPT_SEPARATOR = "\n---\n\n"
+
+
+def mixed_type_counts(num_questions, start=0):
+    """혼합 유형 요청의 유형별 문제 수
+
+    작업 전체의 문제 번호 start부터 유형을 번갈아 배정한 것과 같으므로, 묶음마다 앞 묶음들의 문제 수를 넘기면
+    묶음 크기와 관계없이 작업 전체의 유형별 문제 수가 고르게 됩니다.
+    """
+    base, extra = divmod(num_questions, len(QUESTION_TYPES))
+    return {
+        q_type: base + ((i - start) % len(QUESTION_TYPES) < extra) for i, q_type in enumerate(QUESTION_TYPES)
+    }
+
+
+def create_prompt(question_type, subject, difficulty, num_questions, additional_info="", start=0):
+    """프롬프트 생성 (공통 앞부분 PROMPT_PREFIX + 요청별 조건)
+
+    question_type이 MIXED_TYPE이면 한 번의 요청으로 세 유형을 고르게 섞어 받습니다.
+    start는 이 묶음 앞에 있는 문제 수입니다 (mixed_type_counts 참고).
+    """
+    if question_type == MIXED_TYPE:
+        counts = ", ".join(
+            f"{q_type} {count}개" for q_type, count in mixed_type_counts(num_questions, start).items() if count
+        )
+        request = f"다음 조건에 맞는 문제 {num_questions}개를 생성해주세요 ({counts}):"
+    else:
+        request = f"다음 조건에 맞는 {question_type} 문제 {num_questions}개를 생성해주세요:"
+    return PROMPT_PREFIX + PROMPT_SEPARATOR + f"""{request}
+
+- 과목: {subject}
+- 난이도: {difficulty}
+- 추가 요구사항: {additional_info}
+
+{num_questions}개의 문제를 JSON 배열 형태로 반환해주세요."""
+
+
+def split_prompt(prompt):
+    """프롬프트를 (캐시할 공통 앞부분, 요청별 부분)으로 분리 (create_prompt로 만들지 않은 프롬프트는 앞부분 None)"""
+    if prompt.startswith(PROMPT_PREFIX + PROMPT_SEPARATOR):
+        return PROMPT_PREFIX, prompt[len(PROMPT_PREFIX) + len(PROMPT_SEPARATOR):]
+    return None, prompt
+
+
+def question_type_of(q_data, default=None):
+    """AI가 반환한 문제의 유형 ("type" 필드, 없거나 알 수 없으면 default, 그것도 없으면 필드 구성으로 추정)"""
+    q_type = TYPE_ALIASES.get(str(q_data.get('type') or "").strip().lower())
+    if q_type:
+        return q_type
+    if default in QUESTION_TYPES:
+        return default
+    if q_data.get('options'):
+        return '객관식'
+    if str(q_data.get('correct_answer', "")).strip().upper() in ("O", "X"):
+        return 'O/X'
+    return '주관식'
+
+
+def parse_ai_response(response_text, question_type):
+    """AI 응답 파싱 (응답 안의 JSON 객체를 모두 찾아 온전한 문제는 전부 복구)
+
+    (문제 dict 목록, 파싱 오류 목록)을 반환합니다. 오류 설명은 describe_parse_errors로 만듭니다.
+    문제마다 "type" 필드로 유형을 정해 'type'에 기록하므로 혼합 유형 응답도 문제별로 나눠 처리할 수 있습니다.
+    """
+    questions, errors = parse_json_objects(response_text)
+    for q_data in questions:
+        q_data['type'] = question_type_of(q_data, question_type)
+    return questions, errors
+
+
+# 화면 표시 이름별 제공업체
+PROVIDERS = {
+    "OpenAI (GPT)": Provider(
+        'openai', "OpenAI (GPT)", generate_with_openai, stream_with_openai, MODEL_SETTINGS['openai']['model']
+    ),
+    "Anthropic (Claude)": Provider(
+        'anthropic', "Anthropic (Claude)", generate_with_anthropic, stream_with_anthropic,
+        MODEL_SETTINGS['anthropic']['model']
+    ),
+    "Google (Gemini)": Provider(
+        'gemini', "Google (Gemini)", generate_with_gemini, stream_with_gemini, MODEL_SETTINGS['gemini']['model']
+    )
+}
+
+# 라우팅 모드 표시 이름
+ROUTING_MODES = {
+    "선택한 제공업체만 사용": ROUTE_SINGLE,
+    "오류 시 다른 제공업체로 전환": ROUTE_FAILOVER,
+    "응답이 늦으면 다른 제공업체에도 요청": ROUTE_HEDGE
+}
+
+
+def find_provider(name):
+    """표시 이름('Google (Gemini)') 또는 제공업체 이름('gemini')으로 제공업체 찾기"""
+    for label, provider in PROVIDERS.items():
+        if name in (label, provider.name):
+            return provider
+    raise ValueError(f"지원하지 않는 제공업체입니다: {name}")
+
+
+def run_generation_job(ctx, params, api_keys):
+    """AI 문제 생성 작업 (백그라운드 작업 스레드에서 실행)
+
+    api_keys는 {제공업체 이름: API 키}입니다. 완성된 문제는 바로 작업 결과 항목으로 저장하고,
+    끝나면 캐시 적중 수, 경고, 원본 응답, 유사 중복 보고서를 결과로 반환합니다.
+    """
+    question_type = params['question_type']
+    num_questions = params['num_questions']
+
+    # 동일한 프롬프트/모델/파라미터의 응답은 캐시에서 재사용 (키가 설정된 모든 제공업체의 캐시 확인)
+    cache = get_response_cache()
+    cache_counts = {'hits': 0, 'misses': 0, 'rate_limit_wait': 0.0, 'providers': {}}
+    counts_lock = threading.Lock()
+
+    def cache_key(provider_name, prompt):
+        settings = MODEL_SETTINGS[provider_name]
+        return make_cache_key(provider_name, settings['model'], prompt, settings)
+
+    # 묶음별로 응답한 제공업체 (문제마다 출처로 기록)
+    # make_prompt와 generate/stream은 같은 작업 스레드에서 차례로 실행되므로 스레드별로 묶음 번호를 기억
+    chunk_providers = {}
+    current_chunk = threading.local()
+
+    def cached_response(prompt):
+        response = None
+        if not params['force_fresh']:
+            for provider in router.order("generate"):
+                response = cache.get(cache_key(provider.name, prompt))
+                if response is not None:
+                    chunk_providers[current_chunk.index] = provider.name
+                    break
+        with counts_lock:
+            cache_counts['hits' if response is not None else 'misses'] += 1
+        return response
+
+    def count_provider(provider_name):
+        chunk_providers[current_chunk.index] = provider_name
+        with counts_lock:
+            cache_counts['providers'][provider_name] = cache_counts['providers'].get(provider_name, 0) + 1
+
+    # 같은 API 키를 쓰는 모든 세션/프로세스가 제공업체 요청 한도를 함께 지키도록 대기
+    limiter = get_rate_limiter()
+    last_report = [0.0]
+
+    def on_wait(position, wait):
+        now = time.monotonic()
+        if now - last_report[0] >= 1:
+            last_report[0] = now
+            ctx.progress(message=f"요청 한도 대기 중 (대기 순서 {position + 1}, 약 {wait:.0f}초)")
+
+    def wait_for_rate_limit(provider, api_key, prompt):
+        waited = limiter.acquire(
+            provider.name, api_key, estimate_request_tokens(prompt, MODEL_SETTINGS[provider.name].get('max_tokens')),
+            requester=f"job:{ctx.job_id}", on_wait=on_wait, should_abort=ctx.check_cancelled
+        )
+        with counts_lock:
+            cache_counts['rate_limit_wait'] += waited
+
+    # 제공업체 선택, 장애 조치, 헤징은 라우터가 담당
+    router = Router(
+        PROVIDERS.values(), api_keys, get_provider_stats(),
+        mode=params.get('routing', ROUTE_SINGLE),
+        preferred=find_provider(params['ai_provider']).name,
+        before_call=wait_for_rate_limit,
+        metrics=get_metrics_store(),
+        requester=f"job:{ctx.job_id}"
+    )
+
+    def generate(prompt):
+        response = cached_response(prompt)
+        if response is None:
+            response, provider_name = router.generate(prompt)
+            count_provider(provider_name)
+            cache.set(cache_key(provider_name, prompt), response)
+        return response
+
+    def stream(prompt):
+        response = cached_response(prompt)
+        if response is not None:
+            yield response
+            return
+        parts = []
+        provider_name = None
+        for text, provider_name in router.stream(prompt):
+            if text is None:
+                count_provider(provider_name)
+                continue
+            parts.append(text)
+            yield text
+        if parts:
+            cache.set(cache_key(provider_name, prompt), "".join(parts))
+
+    def make_prompt(size, index, num_chunks):
+        # 취소된 작업은 남은 묶음을 요청하지 않음
+        ctx.check_cancelled()
+        current_chunk.index = index
+        return create_prompt(
+            question_type, params['subject'], params['difficulty'], size,
+            chunk_additional_info(params['additional_info'], index, num_chunks), index * params['chunk_size']
+        )
+
+    num_chunks = len(split_into_chunks(num_questions, params['chunk_size']))
+    questions_data = []
+    responses = []
+    warnings = []
+    done = 0
+    started = time.perf_counter()
+    first_question_at = None
+    ctx.progress(0.0, "AI가 문제를 생성하고 있습니다...")
+    if params['streaming']:
+        events = stream_in_chunks(
+            stream, make_prompt, num_questions, params['chunk_size'], params['concurrency']
+        )
+    else:
+        events = generate_in_chunks(
+            generate, make_prompt, lambda text: parse_ai_response(text, question_type),
+            num_questions, params['chunk_size'], params['concurrency']
+        )
+    for event in events:
+        # 완성된 문제부터 바로 저장해 진행 중에도 미리보기에 표시
+        if event['type'] == 'question':
+            if first_question_at is None:
+                first_question_at = time.perf_counter() - started
+            if event['index'] in chunk_providers:
+                event['question']['provider'] = chunk_providers[event['index']]
+            event['question']['type'] = question_type_of(event['question'], question_type)
+            ctx.add_items([event['question']])
+            questions_data.append(event['question'])
+            continue
+
+        done += 1
+        ctx.progress(done / num_chunks, f"{done}/{num_chunks}개 요청 완료 · 문제 {len(questions_data)}개")
+        if event['response'] and event['index'] in chunk_providers:
+            get_metrics_store().record_parse(
+                chunk_providers[event['index']], event['count'], len(event['parse_errors'])
+            )
+        if event['response']:
+            responses.append(event['response'])
+        if ctx.cancelled:
+            continue
+        if event['error']:
+            warnings.append(f"{event['index'] + 1}번째 요청 실패: {event['error']}")
+        elif event['parse_errors']:
+            warnings.append(f"{event['index'] + 1}번째 요청: {describe_parse_errors(event['parse_errors'])}")
+    ctx.check_cancelled()
+
+    # 문제 은행 및 이번 생성분 내부의 유사 중복 검사
+    duplicate_report = find_near_duplicates(questions_data, get_question_bank(), params['dedup_threshold'])
+    return {
+        'count': len(questions_data),
+        'cache_hits': cache_counts['hits'],
+        'cache_misses': cache_counts['misses'],
+        'rate_limit_wait': cache_counts['rate_limit_wait'],
+        'providers': cache_counts['providers'],
+        'first_question_at': first_question_at,
+        'elapsed': time.perf_counter() - started,
+        'warnings': warnings,
+        'responses': responses,
+        'duplicates': duplicate_report
+    }
+
+
+# 명령줄/HTTP API 실행 시 API 키를 읽는 환경 변수
+API_KEY_ENV = {'openai': "OPENAI_API_KEY", 'anthropic': "ANTHROPIC_API_KEY", 'gemini': "GEMINI_API_KEY"}
+
+
+def api_keys_from_env():
+    """환경 변수에 설정된 API 키 {제공업체 이름: API 키}"""
+    return {name: os.environ[env] for name, env in API_KEY_ENV.items() if os.environ.get(env)}
+
+
+def build_questions(params, questions_data, skip_indexes=()):
+    """생성 작업 결과(AI가 반환한 문제 dict)를 문제 은행에 저장할 문제 목록으로 변환 (혼합 유형은 문제마다 유형 판별)"""
+    questions = []
+    for i, q_data in enumerate(questions_data):
+        if i in skip_indexes:
+            continue
+        question_type = question_type_of(q_data, params['question_type'])
+        if question_type == '객관식':
+            options, answer = q_data.get('options', []), q_data.get('correct_answer', '')
+        elif question_type == 'O/X':
+            options, answer = None, q_data.get('correct_answer', '')
+        else:  # 주관식
+            options, answer = None, q_data.get('answer', '')
+        questions.append(create_question(
+            question_type, params['subject'], params['difficulty'],
+            q_data.get('question', ''), options, answer, q_data.get('explanation', ''),
+            SOURCE_AI, q_data.get('provider')
+        ))
+    return questions
+
+
+# 일괄 생성에서 동시에 진행할 매니페스트 항목 수 (항목마다 묶음을 concurrency개씩 동시에 요청)
+BATCH_CONCURRENCY = 2
+# 일괄 생성 결과를 문제 은행에 저장할 때의 출력 이름
+OUTPUT_BANK = "bank"
+
+# 매니페스트 항목과 일괄 생성 설정의 기본값
+ITEM_DEFAULTS = {
+    'difficulty': "보통",
+    'additional_info': "",
+    'chunk_size': DEFAULT_CHUNK_SIZE,
+    'concurrency': DEFAULT_CONCURRENCY
+}
+BATCH_DEFAULTS = {
+    'ai_provider': "Google (Gemini)",
+    'routing': ROUTE_SINGLE,
+    'streaming': False,
+    'force_fresh': False,
+    'dedup_threshold': DEFAULT_THRESHOLD,
+    'skip_duplicates': True,
+    'batch_concurrency': BATCH_CONCURRENCY,
+    'output': OUTPUT_BANK
+}
+
+
+# 매니페스트 설정 값의 타입 (숫자는 int 또는 float, bool은 숫자로 보지 않음)
+SETTING_TYPES = {
+    'ai_provider': str,
+    'routing': str,
+    'streaming': bool,
+    'force_fresh': bool,
+    'dedup_threshold': (int, float),
+    'skip_duplicates': bool,
+    'output': str
+}
+ITEM_TEXT_FIELDS = ('subject', 'question_type', 'difficulty', 'additional_info')
+
+
+def _check_type(name, value, types, where=""):
+    """설정 값의 타입 확인 (맞지 않으면 ValueError)"""
+    if not isinstance(value, types) or (isinstance(value, bool) and types is not bool):
+        raise ValueError(f"{where}{name} 값의 형식이 올바르지 않습니다: {value!r}")
+
+
+def _manifest_item(index, item, defaults):
+    """매니페스트 항목 하나를 생성 작업 파라미터로 정리 (type/count는 question_type/num_questions의 줄임말)"""
+    if not isinstance(item, dict):
+        raise ValueError(f"{index + 1}번째 항목이 객체가 아닙니다")
+    item = dict(item)
+    if 'type' in item:
+        item.setdefault('question_type', item.pop('type'))
+    if 'count' in item:
+        item.setdefault('num_questions', item.pop('count'))
+    params = {**ITEM_DEFAULTS, **defaults, **item}
+    if not params.get('subject'):
+        raise ValueError(f"{index + 1}번째 항목에 subject(과목)가 없습니다")
+    if params['additional_info'] is None:
+        params['additional_info'] = ""
+    for field in ITEM_TEXT_FIELDS:
+        _check_type(field, params.get(field), str, f"{index + 1}번째 항목의 ")
+    if params.get('question_type') not in GENERATION_TYPES:
+        raise ValueError(f"{index + 1}번째 항목의 문제 유형은 {', '.join(GENERATION_TYPES)} 중 하나여야 합니다")
+    if params['difficulty'] not in DIFFICULTY_LEVELS:
+        raise ValueError(f"{index + 1}번째 항목의 난이도는 {', '.join(DIFFICULTY_LEVELS)} 중 하나여야 합니다")
+    for field in ('num_questions', 'chunk_size', 'concurrency'):
+        value = params.get(field)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"{index + 1}번째 항목의 {field} 값은 1 이상의 정수여야 합니다")
+    return {
+        'subject': params['subject'],
+        'question_type': params['question_type'],
+        'difficulty': params['difficulty'],
+        'num_questions': params['num_questions'],
+        'additional_info': params['additional_info'],
+        'chunk_size': params['chunk_size'],
+        'concurrency': params['concurrency']
+    }
+
+
+def make_batch_params(manifest, **overrides):
+    """매니페스트(dict 또는 항목 목록)를 일괄 생성 작업 파라미터로 변환 (잘못된 경우 ValueError)
+
+    매니페스트 형식:
+        {"provider": "gemini", "routing": "failover",
+         "defaults": {"difficulty": "보통", "chunk_size": 5},
+         "items": [{"subject": "중학교 과학", "type": "객관식", "difficulty": "쉬움", "count": 20}, ...]}
+
+    overrides(명령줄 옵션 등)에서 None이 아닌 값은 매니페스트 설정보다 우선합니다.
+    """
+    if isinstance(manifest, list):
+        manifest = {'items': manifest}
+    if not isinstance(manifest, dict) or not manifest.get('items'):
+        raise ValueError("매니페스트에 생성할 항목(items)이 없습니다")
+    if not isinstance(manifest['items'], list):
+        raise ValueError("매니페스트의 items는 항목 객체의 목록이어야 합니다")
+    if not isinstance(manifest.get('defaults') or {}, dict):
+        raise ValueError("매니페스트의 defaults는 객체여야 합니다")
+    settings = dict(BATCH_DEFAULTS)
+    for key, value in manifest.items():
+        if key in ('items', 'defaults'):
+            continue
+        settings['ai_provider' if key == 'provider' else key] = value
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    for key, types in SETTING_TYPES.items():
+        _check_type('provider' if key == 'ai_provider' else key, settings[key], types)
+
+    settings['ai_provider'] = find_provider(settings['ai_provider']).name
+    if settings['routing'] not in (ROUTE_SINGLE, ROUTE_FAILOVER, ROUTE_HEDGE):
+        raise ValueError(f"알 수 없는 요청 방식입니다: {settings['routing']}")
+    concurrency = settings['batch_concurrency']
+    if not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1:
+        raise ValueError("batch_concurrency 값은 1 이상의 정수여야 합니다")
+    if not 0 < settings['dedup_threshold'] <= 1:
+        raise ValueError("dedup_threshold 값은 0보다 크고 1 이하여야 합니다")
+    defaults = manifest.get('defaults') or {}
+    items = [_manifest_item(i, item, defaults) for i, item in enumerate(manifest['items'])]
+    params = {key: settings[key] for key in BATCH_DEFAULTS}
+    params['items'] = items
+    return params
+
+
+def batch_title(params):
+    """일괄 생성 작업 제목"""
+    total = sum(item['num_questions'] for item in params['items'])
+    return f"일괄 생성 {len(params['items'])}개 항목 {total}문제"
+
+
+class _ItemContext:
+    """일괄 생성 작업의 항목 하나를 run_generation_job으로 실행할 때 쓰는 하위 컨텍스트
+
+    취소는 상위 작업을 따르고, 진행률은 상위 작업 전체 진행률에 합산하며, 생성된 문제는 items에 모읍니다.
+    """
+
+    def __init__(self, parent, index, label, on_progress):
+        # 요청 한도 대기열에서 항목끼리 차례를 나누도록 항목마다 다른 요청자 ID 사용
+        self.job_id = f"{parent.job_id}.{index + 1}"
+        self.items = []
+        self._parent = parent
+        self._index = index
+        self._label = label
+        self._on_progress = on_progress
+
+    @property
+    def cancelled(self):
+        return self._parent.cancelled
+
+    def check_cancelled(self):
+        self._parent.check_cancelled()
+
+    def progress(self, fraction=None, message=None):
+        self._on_progress(self._index, fraction, f"{self._label}: {message}" if message else None)
+
+    def add_items(self, items):
+        self.items.extend(items)
+
+
+def write_output(output, questions):
+    """문제를 문제 은행 또는 JSON Lines 파일(이어쓰기)에 기록"""
+    if not questions:
+        return
+    if output == OUTPUT_BANK:
+        get_question_bank().add_many(questions)
+        return
+    with open(output, 'ab') as f:
+        write_questions(questions, f, "JSON Lines")
+
+
+def run_batch_job(ctx, params, api_keys):
+    """매니페스트 일괄 생성 작업 (Streamlit 없이 명령줄/HTTP API에서 실행)
+
+    params는 make_batch_params의 결과입니다. 항목을 batch_concurrency개씩 동시에 생성하고, 끝난 항목부터
+    바로 문제 은행이나 JSON Lines 파일(params['output'])에 기록해 작업 결과 항목에도 남깁니다.
+    한 항목이 실패해도 나머지 항목은 계속 생성하며, 항목별 결과 요약을 반환합니다.
+    """
+    items = params['items']
+    total = sum(item['num_questions'] for item in items)
+    fractions = [0.0] * len(items)
+    progress_lock = threading.Lock()
+
+    def on_progress(index, fraction, message):
+        with progress_lock:
+            if fraction is not None:
+                fractions[index] = fraction
+            done = sum(f * item['num_questions'] for f, item in zip(fractions, items))
+        ctx.progress(done / total, message)
+
+    def run_item(index, item_ctx, item_params):
+        started = time.perf_counter()
+        try:
+            return run_generation_job(item_ctx, item_params, api_keys), None, time.perf_counter() - started
+        except JobCancelled:
+            raise
+        except Exception as e:
+            return None, str(e), time.perf_counter() - started
+
+    started = time.perf_counter()
+    ctx.progress(0.0, f"{len(items)}개 항목 생성 시작")
+    results = [None] * len(items)
+    warnings = []
+    saved = 0
+    with ThreadPoolExecutor(max_workers=params['batch_concurrency'], thread_name_prefix="batch") as executor:
+        futures = {}
+        for index, item in enumerate(items):
+            item_params = {
+                **item,
+                'ai_provider': params['ai_provider'],
+                'routing': params['routing'],
+                'streaming': params['streaming'],
+                'force_fresh': params['force_fresh'],
+                'dedup_threshold': params['dedup_threshold']
+            }
+            label = f"[{index + 1}/{len(items)}] {item['subject']} {item['question_type']} ({item['difficulty']})"
+            item_ctx = _ItemContext(ctx, index, label, on_progress)
+            futures[executor.submit(run_item, index, item_ctx, item_params)] = (index, item_ctx, item_params, label)
+
+        for future in as_completed(futures):
+            index, item_ctx, item_params, label = futures[future]
+            result, error, elapsed = future.result()
+            summary = {
+                'subject': item_params['subject'],
+                'question_type': item_params['question_type'],
+                'difficulty': item_params['difficulty'],
+                'requested': item_params['num_questions'],
+                'generated': len(item_ctx.items),
+                'saved': 0,
+                'duplicates': 0,
+                'elapsed': elapsed,
+                'error': error
+            }
+            results[index] = summary
+            if error:
+                warnings.append(f"{label} 실패: {error}")
+                continue
+            warnings += [f"{label} {warning}" for warning in result['warnings']]
+            duplicates = {item['index'] for item in result['duplicates']}
+            questions = build_questions(
+                item_params, item_ctx.items, duplicates if params['skip_duplicates'] else ()
+            )
+            # 여러 항목이 동시에 끝나도 기록은 이 스레드에서만 하므로 파일이 섞이지 않음
+            write_output(params['output'], questions)
+            ctx.add_items(questions)
+            summary.update(saved=len(questions), duplicates=len(duplicates),
+                           cache_hits=result['cache_hits'], providers=result['providers'])
+            saved += len(questions)
+    ctx.check_cancelled()
+    return {
+        'items': results,
+        'requested': total,
+        'generated': sum(item['generated'] for item in results),
+        'saved': saved,
+        'failed_items': sum(1 for item in results if item['error']),
+        'output': params['output'],
+        'elapsed': time.perf_counter() - started,
+        'warnings': warnings
+    }
@@ -0,0 +1,141 @@
+import functools
+import hashlib
+import re
+import unicodedata
+import zlib
+
+# MinHash 서명 길이와 LSH 밴드 구성 (16밴드 x 4행 → 유사도 약 0.5 이상이면 후보로 검출)
+NUM_PERM = 64
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+# core를 가져오는 화면마다 numpy를 읽지 않도록 numpy는 서명을 계산하거나 비교할 때 가져옴
+@functools.lru_cache(maxsize=None)
+def _hash_params():
+    """2^32보다 큰 소수와 고정 시드 계수 (프로세스가 달라도 같은 서명이 나오도록 함)"""
+    import numpy as np
+
+    rng = np.random.default_rng(20240229)
+    return (
+        np.uint64(4294967311),
+        rng.integers(1, 2 ** 31, size=NUM_PERM, dtype=np.uint64),
+        rng.integers(0, 2 ** 31, size=NUM_PERM, dtype=np.uint64)
+    )
+
+
+def fingerprint_text(question):
+    """중복 판정에 사용할 문제 텍스트 (문제 본문 + 선택지)"""
+    parts = [question.get('question') or '']
+    parts.extend(str(option) for option in (question.get('options') or []) if option)
+    return " ".join(parts)
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    """공백/문장부호를 제거한 뒤 문자 k-gram 집합 생성"""
+    text = _NON_WORD.sub("", unicodedata.normalize("NFKC", text).lower())
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def minhash(text):
+    """텍스트의 MinHash 서명 (uint32 배열)"""
+    import numpy as np
+
+    grams = shingles(text)
+    if not grams:
+        return np.zeros(NUM_PERM, dtype=np.uint32)
+    hashes = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+    prime, a, b = _hash_params()
+    values = (hashes[None, :] * a[:, None] + b[:, None]) % prime
+    return values.min(axis=1).astype(np.uint32)
+
+
+def question_signature(question):
+    """문제 dict의 MinHash 서명"""
+    return minhash(fingerprint_text(question))
+
+
+def band_keys(signature):
+    """LSH 밴드별 버킷 키 목록 [(band, bucket), ...]"""
+    keys = []
+    for band in range(NUM_BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        bucket = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'big', signed=True)
+        keys.append((band, bucket))
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    """두 서명으로 추정한 Jaccard 유사도"""
+    import numpy as np
+
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+class LSHIndex:
+    """메모리 내 MinHash LSH 인덱스 (한 번에 생성/불러온 문제끼리의 중복 검사용)"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.signatures = {}
+
+    def add(self, key, signature):
+        self.signatures[key] = signature
+        for band_key in band_keys(signature):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def candidates(self, signature):
+        found = set()
+        for band_key in band_keys(signature):
+            found.update(self.buckets.get(band_key, ()))
+        return found
+
+
+def find_near_duplicates(questions, bank=None, threshold=DEFAULT_THRESHOLD):
+    """새 문제 목록에서 유사 중복 문제를 찾아 보고서 반환
+
+    문제 은행과 목록 내부를 모두 검사하며, LSH 후보만 비교하므로 은행 크기에 대해 준선형입니다.
+    반환값: [{'index', 'question', 'duplicate_of', 'duplicate_question', 'similarity'}, ...]
+    duplicate_of는 문제 은행 ID(int) 또는 목록 내 앞선 문제의 번호('batch:i')입니다.
+    """
+    report = []
+    batch_index = LSHIndex()
+    for i, question in enumerate(questions):
+        signature = question_signature(question)
+        best = None
+
+        if bank is not None:
+            candidates = bank.lsh_candidates(band_keys(signature))
+            for question_id, candidate_sig in bank.signatures(candidates).items():
+                score = similarity(signature, candidate_sig)
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (question_id, score)
+
+        for j in batch_index.candidates(signature):
+            score = similarity(signature, batch_index.signatures[j])
+            if score >= threshold and (best is None or score > best[1]):
+                best = (f"batch:{j}", score)
+
+        if best is None:
+            batch_index.add(i, signature)
+            continue
+
+        duplicate_of, score = best
+        if isinstance(duplicate_of, int):
+            matched = bank.get(duplicate_of)
+        else:
+            matched = questions[int(duplicate_of.split(":")[1])]
+        report.append({
+            'index': i,
+            'question': question.get('question', ''),
+            'duplicate_of': duplicate_of,
+            'duplicate_question': (matched or {}).get('question', ''),
+            'similarity': score
+        })
+    return report
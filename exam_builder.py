@@ -0,0 +1,227 @@
+import csv
+import io
+import random
+
+# 난이도 점수 (목표 평균 난이도 계산용)
+DIFFICULTY_LEVELS = {'쉬움': 1, '보통': 2, '어려움': 3}
+
+# 객관식 정답 기호 (선택지 위치 순서)
+ANSWER_SYMBOLS = ['①', '②', '③', '④']
+
+
+def make_blueprint(rows, subject=None, target_difficulty=None, exclude_recent_days=0):
+    """시험지 구성표 생성
+
+    rows: [{'subject', 'type', 'difficulty', 'count'}, ...] - 값이 None이면 해당 조건은 제한하지 않음
+    subject: 과목이 지정되지 않은 행에 적용할 시험 과목
+    target_difficulty: 전체 문항의 목표 평균 난이도 (쉬움 1 ~ 어려움 3), 난이도가 지정되지 않은 행으로 조정
+    exclude_recent_days: 최근 며칠 안에 출제된 문제 제외
+    """
+    return {
+        'rows': [dict(row, subject=row.get('subject') or subject) for row in rows if row.get('count')],
+        'target_difficulty': target_difficulty,
+        'exclude_recent_days': exclude_recent_days
+    }
+
+
+def _candidate_pools(bank, row, excluded):
+    """행 조건에 맞는 난이도별 후보 ID 목록 (인덱스 조회)"""
+    levels = [row['difficulty']] if row.get('difficulty') else list(DIFFICULTY_LEVELS)
+    pools = {}
+    for level in levels:
+        ids = bank.ids(subject=row.get('subject'), question_type=row.get('type'), difficulty=level)
+        pools[level] = [i for i in ids if i not in excluded] if excluded else ids
+    return pools
+
+
+def _allocate(rows, pools, target_difficulty):
+    """난이도가 정해지지 않은 행의 난이도별 문항 수를 목표 평균 난이도에 가깝게 배분 (탐욕법)"""
+    allocations = []
+    for row, row_pools in zip(rows, pools):
+        available = {level: len(ids) for level, ids in row_pools.items()}
+        if sum(available.values()) < row['count']:
+            raise ValueError(
+                f"조건(과목: {row.get('subject') or '전체'}, 유형: {row.get('type') or '전체'}, "
+                f"난이도: {row.get('difficulty') or '전체'})에 맞는 문제가 부족합니다 "
+                f"({sum(available.values())}/{row['count']}개)"
+            )
+        allocation = dict.fromkeys(row_pools, 0)
+        if len(row_pools) == 1:
+            allocation[next(iter(row_pools))] = row['count']
+        else:
+            # 보통 난이도부터 채우고, 모자라면 나머지 난이도로 채움
+            remaining = row['count']
+            for level in sorted(row_pools, key=lambda lv: abs(DIFFICULTY_LEVELS[lv] - 2)):
+                take = min(remaining, available[level])
+                allocation[level] = take
+                remaining -= take
+        allocations.append((allocation, available))
+
+    if target_difficulty is None:
+        return [allocation for allocation, _ in allocations]
+
+    total = sum(row['count'] for row in rows)
+    goal = round(target_difficulty * total)
+    score = sum(DIFFICULTY_LEVELS[lv] * n for allocation, _ in allocations for lv, n in allocation.items())
+
+    # 한 문항씩 난이도를 옮겨 목표 합계와의 차이를 줄일 수 없을 때까지 반복
+    moves = [(a, b) for a in DIFFICULTY_LEVELS for b in DIFFICULTY_LEVELS if a != b]
+    improved = True
+    while improved and score != goal:
+        improved = False
+        for allocation, available in allocations:
+            if len(allocation) == 1:
+                continue
+            best = None
+            for src, dst in moves:
+                if allocation[src] == 0 or allocation[dst] >= available[dst]:
+                    continue
+                new_score = score + DIFFICULTY_LEVELS[dst] - DIFFICULTY_LEVELS[src]
+                if abs(goal - new_score) < abs(goal - score) and (
+                    best is None or abs(goal - new_score) < abs(goal - best[2])
+                ):
+                    best = (src, dst, new_score)
+            if best:
+                src, dst, score = best
+                allocation[src] -= 1
+                allocation[dst] += 1
+                improved = True
+                if score == goal:
+                    break
+    return [allocation for allocation, _ in allocations]
+
+
+def assemble_exams(bank, blueprint, num_variants=1, seed=None):
+    """구성표에 맞는 시험지 문제 ID 목록을 num_variants개 생성
+
+    조건별 후보 ID는 한 번만 조회하고, 후보를 섞은 뒤 순서대로 잘라 쓰므로 후보가 충분하면
+    시험지끼리 문제가 겹치지 않습니다. 반환값: [[question_id, ...], ...]
+    """
+    rng = random.Random(seed)
+    rows = blueprint['rows']
+    if not rows:
+        raise ValueError("구성표에 문항 수가 지정된 행이 없습니다.")
+
+    excluded = set()
+    if blueprint.get('exclude_recent_days'):
+        excluded = bank.recently_used_ids(blueprint['exclude_recent_days'])
+
+    pools = [_candidate_pools(bank, row, excluded) for row in rows]
+    allocations = _allocate(rows, pools, blueprint.get('target_difficulty'))
+
+    variants = [[] for _ in range(num_variants)]
+    used = set()
+    for row_pools, allocation in zip(pools, allocations):
+        for level, count in allocation.items():
+            if not count:
+                continue
+            # 다른 행에서 이미 뽑힌 문제는 제외 (행 조건이 겹치는 경우)
+            candidates = [i for i in row_pools[level] if i not in used]
+            if len(candidates) < count:
+                raise ValueError(f"난이도 '{level}' 문제가 부족합니다 ({len(candidates)}/{count}개)")
+            rng.shuffle(candidates)
+            for v, variant in enumerate(variants):
+                start = (v * count) % len(candidates)
+                picked = candidates[start:start + count]
+                if len(picked) < count:
+                    picked += candidates[:count - len(picked)]
+                variant.extend(picked)
+            used.update(candidates[:count * num_variants])
+    for variant in variants:
+        rng.shuffle(variant)
+    return variants
+
+
+def average_difficulty(questions):
+    """문제 목록의 평균 난이도 점수"""
+    levels = [DIFFICULTY_LEVELS.get(q.get('difficulty'), 2) for q in questions]
+    return sum(levels) / len(levels) if levels else 0.0
+
+
+def answer_index(question):
+    """객관식 정답 기호의 선택지 위치 (알 수 없으면 -1)"""
+    answer = str(question.get('correct_answer') or '').strip()
+    for i, symbol in enumerate(ANSWER_SYMBOLS):
+        if answer.startswith(symbol) or answer == str(i + 1):
+            return i
+    return -1
+
+
+def make_variants(questions, num_variants, seed=None, shuffle_options=True):
+    """한 시험지의 문제 순서와 객관식 선택지를 섞은 여러 형(variant)을 한 번에 생성
+
+    모든 형의 문제 순서, 선택지 순서, 정답지를 numpy 배열 연산으로 한 번에 계산하므로
+    형 수가 수백 개여도 형마다 다시 계산하지 않습니다. 같은 seed이면 항상 같은 결과가 나옵니다.
+    반환값: {'seed', 'order': (형, 문항) 원래 문항 번호, 'option_order': (형, 문항, 선택지) 원래 선택지 번호,
+             'answers': (형, 문항) 정답 문자열}
+    """
+    # 여러 형을 만들지 않는 화면은 numpy를 읽지 않도록 여기서 가져옴
+    import numpy as np
+
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 31)
+    rng = np.random.default_rng(seed)
+    n = len(questions)
+    width = len(ANSWER_SYMBOLS)
+
+    is_choice = np.array([q.get('type') == '객관식' for q in questions], dtype=bool)
+    answer_indexes = np.array([answer_index(q) if q.get('type') == '객관식' else -1 for q in questions], dtype=int)
+    num_options = np.array([min(len(q.get('options') or []), width) for q in questions], dtype=int)
+    # 정답 위치를 알 수 없는 객관식 문제는 선택지를 섞지 않음
+    shuffleable = is_choice & (answer_indexes >= 0) & shuffle_options
+
+    # 문제 순서: 형마다 난수 키를 정렬한 순열
+    order = np.argsort(rng.random((num_variants, n)), axis=1)
+
+    # 선택지 순서: 실제 선택지 위치에만 난수 키를 주고, 빈 자리와 섞지 않는 문제는 원래 순서 유지
+    keys = rng.random((num_variants, n, width))
+    positions = np.arange(width)
+    fixed = ~shuffleable[:, None] | (positions[None, :] >= num_options[:, None])
+    keys = np.where(fixed[None, :, :], positions[None, None, :] + 1.0, keys)
+    option_order = np.argsort(keys, axis=2, kind='stable')
+
+    # 섞인 선택지에서 원래 정답이 놓인 위치 → 정답 기호
+    new_index = np.argmax(option_order == answer_indexes[None, :, None], axis=2)
+    symbols = np.array(ANSWER_SYMBOLS, dtype=object)[new_index]
+    base_answers = np.array(
+        [q.get('answer') if q.get('type') == '주관식' else q.get('correct_answer') for q in questions],
+        dtype=object
+    )
+    answers = np.where(shuffleable[None, :], symbols, base_answers[None, :])
+
+    return {
+        'seed': seed,
+        'order': order,
+        'option_order': option_order,
+        'answers': np.take_along_axis(answers, order, axis=1)
+    }
+
+
+def variant_questions(questions, variants, index):
+    """make_variants 결과에서 index번째 형의 문제 목록 (선택지와 correct_answer가 바뀐 사본)"""
+    result = []
+    option_order = variants['option_order'][index]
+    for position, q_index in enumerate(variants['order'][index]):
+        question = dict(questions[q_index])
+        if question.get('type') == '객관식':
+            options = list(question.get('options') or [])
+            question['options'] = [options[i] for i in option_order[q_index] if i < len(options)]
+            question['correct_answer'] = variants['answers'][index][position]
+        result.append(question)
+    return result
+
+
+def variant_label(index):
+    """형 이름 (A형, B형, ..., Z형, 27형, ...)"""
+    return f"{chr(ord('A') + index)}형" if index < 26 else f"{index + 1}형"
+
+
+def answer_sheet_csv(variants):
+    """모든 형의 정답표 CSV 텍스트 (행: 형, 열: 문항 번호)"""
+    answers = variants['answers']
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["형"] + [str(i) for i in range(1, answers.shape[1] + 1)])
+    for index, row in enumerate(answers):
+        writer.writerow([variant_label(index)] + ["" if a is None else a for a in row])
+    return output.getvalue()
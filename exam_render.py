@@ -0,0 +1,216 @@
+import importlib.util
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from config import data_path
+
+# 출력 형식: 이름 -> 파일 확장자
+# PDF는 reportlab, DOCX는 python-docx 패키지가 있을 때만 지원하며, 두 패키지는 가져오는 데
+# 시간이 걸리므로 설치 여부만 확인하고 실제로 렌더링할 때 가져옵니다.
+RENDER_FORMATS = {}
+if importlib.util.find_spec("reportlab") is not None:
+    RENDER_FORMATS["PDF"] = ".pdf"
+if importlib.util.find_spec("docx") is not None:
+    RENDER_FORMATS["DOCX"] = ".docx"
+
+# reportlab 내장 한글 CID 폰트 (별도 폰트 파일 불필요)
+PDF_FONT = "HYSMyeongJo-Medium"
+DOCX_FONT = "맑은 고딕"
+OPTION_SYMBOLS = ['①', '②', '③', '④']
+# 주관식 답안 작성 칸의 줄 수
+ANSWER_LINES = 3
+
+_UNSAFE_FILENAME = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def safe_filename(name):
+    """파일 이름에 쓸 수 없는 문자를 '_'로 바꿈"""
+    return _UNSAFE_FILENAME.sub("_", name).strip("_") or "exam"
+
+
+def exam_header(exam):
+    """시험지 머리글 정보 줄"""
+    created = datetime.strptime(exam['created_at'], "%Y-%m-%d %H:%M:%S").strftime("%Y년 %m월 %d일")
+    return (f"과목: {exam.get('subject') or '-'}    시험시간: {exam['time']}분    "
+            f"총 문항: {len(exam['questions'])}문제    {created}")
+
+
+def answer_text(question):
+    """정답지에 표시할 정답"""
+    if question['type'] == '주관식':
+        return question.get('answer') or ''
+    return question.get('correct_answer') or ''
+
+
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """PDF 폰트 등록과 문단 스타일 (프로세스당 한 번만 생성)"""
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+    pdfmetrics.registerFont(UnicodeCIDFont(PDF_FONT))
+    return {
+        'title': ParagraphStyle('title', fontName=PDF_FONT, fontSize=18, leading=24, alignment=TA_CENTER, spaceAfter=4 * mm),
+        'header': ParagraphStyle('header', fontName=PDF_FONT, fontSize=9, leading=13, alignment=TA_CENTER, spaceAfter=2 * mm),
+        'question': ParagraphStyle('question', fontName=PDF_FONT, fontSize=11, leading=16, spaceBefore=4 * mm),
+        'option': ParagraphStyle('option', fontName=PDF_FONT, fontSize=10, leading=15, leftIndent=6 * mm),
+        'answer': ParagraphStyle('answer', fontName=PDF_FONT, fontSize=10, leading=15),
+        'explanation': ParagraphStyle('explanation', fontName=PDF_FONT, fontSize=9, leading=13, leftIndent=6 * mm)
+    }
+
+
+def render_pdf(exam, answer_key=False):
+    """시험지(answer_key=True이면 정답지) PDF 바이트 생성"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer
+
+    styles = _pdf_styles()
+    title = f"{exam['title']} 정답지" if answer_key else exam['title']
+    story = [
+        Paragraph(escape(title), styles['title']),
+        Paragraph(escape(exam_header(exam)), styles['header'])
+    ]
+    if not answer_key:
+        story.append(Paragraph("학번: ________    이름: ____________", styles['header']))
+
+    for i, question in enumerate(exam['questions'], 1):
+        if answer_key:
+            story.append(Paragraph(f"{i}. {escape(str(answer_text(question)))}", styles['answer']))
+            if question.get('explanation'):
+                story.append(Paragraph(f"해설: {escape(question['explanation'])}", styles['explanation']))
+            continue
+
+        block = [Paragraph(f"{i}. {escape(question['question'])}", styles['question'])]
+        if question['type'] == '객관식':
+            for symbol, option in zip(OPTION_SYMBOLS, question.get('options') or []):
+                if option:
+                    block.append(Paragraph(f"{symbol} {escape(str(option))}", styles['option']))
+        elif question['type'] == 'O/X':
+            block.append(Paragraph("( O / X )", styles['option']))
+        else:
+            block.append(Spacer(1, ANSWER_LINES * 8 * mm))
+        # 한 문제가 페이지 경계에서 잘리지 않도록 묶음
+        story.append(KeepTogether(block))
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(
+        buffer, pagesize=A4, title=title,
+        leftMargin=20 * mm, rightMargin=20 * mm, topMargin=18 * mm, bottomMargin=18 * mm
+    ).build(story)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=None)
+def _docx_template():
+    """한글 글꼴이 지정된 빈 DOCX 템플릿 바이트 (프로세스당 한 번만 생성)"""
+    import docx
+    from docx.oxml.ns import qn
+    from docx.shared import Pt
+
+    document = docx.Document()
+    for style_name in ('Normal', 'Title'):
+        style = document.styles[style_name]
+        style.font.name = DOCX_FONT
+        style.element.rPr.rFonts.set(qn('w:eastAsia'), DOCX_FONT)
+    document.styles['Normal'].font.size = Pt(11)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def render_docx(exam, answer_key=False):
+    """시험지(answer_key=True이면 정답지) DOCX 바이트 생성"""
+    import docx
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
+    document = docx.Document(io.BytesIO(_docx_template()))
+    title = f"{exam['title']} 정답지" if answer_key else exam['title']
+    document.add_paragraph(title, style='Title').alignment = WD_ALIGN_PARAGRAPH.CENTER
+    document.add_paragraph(exam_header(exam)).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    if not answer_key:
+        document.add_paragraph("학번: ________    이름: ____________").alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    for i, question in enumerate(exam['questions'], 1):
+        if answer_key:
+            document.add_paragraph(f"{i}. {answer_text(question)}")
+            if question.get('explanation'):
+                document.add_paragraph(f"해설: {question['explanation']}").paragraph_format.left_indent = Pt(18)
+            continue
+
+        paragraph = document.add_paragraph()
+        paragraph.add_run(f"{i}. {question['question']}").bold = True
+        paragraph.paragraph_format.keep_with_next = True
+        if question['type'] == '객관식':
+            for symbol, option in zip(OPTION_SYMBOLS, question.get('options') or []):
+                if option:
+                    document.add_paragraph(f"{symbol} {option}").paragraph_format.left_indent = Pt(18)
+        elif question['type'] == 'O/X':
+            document.add_paragraph("( O / X )").paragraph_format.left_indent = Pt(18)
+        else:
+            for _ in range(ANSWER_LINES):
+                document.add_paragraph("")
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+RENDERERS = {"PDF": render_pdf, "DOCX": render_docx}
+
+
+def render_exam_files(exam, formats, include_answers=True):
+    """시험지 하나를 형식별로 렌더링해 [(파일 이름, 바이트), ...] 반환 (작업 프로세스에서 실행)"""
+    name = safe_filename(exam['title'])
+    files = []
+    for fmt in formats:
+        extension = RENDER_FORMATS[fmt]
+        files.append((f"{name}{extension}", RENDERERS[fmt](exam)))
+        if include_answers:
+            files.append((f"{name}_정답지{extension}", RENDERERS[fmt](exam, answer_key=True)))
+    return files
+
+
+def render_exams_zip(exams, formats, include_answers=True, path=None, max_workers=None, on_progress=None):
+    """여러 시험지를 프로세스 풀에서 동시에 렌더링해 zip 파일 하나로 저장하고 경로 반환
+
+    렌더링이 끝난 시험지부터 바로 zip에 기록합니다. on_progress(완료 수, 전체 수)는
+    시험지 하나가 끝날 때마다 호출됩니다.
+    """
+    missing = [fmt for fmt in formats if fmt not in RENDER_FORMATS]
+    if missing:
+        raise ValueError(f"{', '.join(missing)} 출력을 사용하려면 reportlab, python-docx 패키지를 설치해주세요.")
+    if path is None:
+        os.makedirs(data_path("exports"), exist_ok=True)
+        path = data_path(os.path.join("exports", f"exams-{datetime.now():%Y%m%d-%H%M%S}.zip"))
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        if len(exams) == 1:
+            for name, data in render_exam_files(exams[0], formats, include_answers):
+                archive.writestr(name, data)
+            if on_progress:
+                on_progress(1, 1)
+            return path
+
+        workers = max_workers or min(len(exams), os.cpu_count() or 1)
+        # 스트림릿 서버의 스레드를 복제하지 않도록 spawn 방식으로 작업 프로세스 생성
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(render_exam_files, exam, formats, include_answers) for exam in exams]
+            for done, future in enumerate(as_completed(futures), 1):
+                for name, data in future.result():
+                    archive.writestr(name, data)
+                if on_progress:
+                    on_progress(done, len(exams))
+    return path
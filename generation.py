@@ -0,0 +1,115 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from response_parser import JsonObjectStream
+
+# 한 번의 API 호출로 요청할 문제 수와 동시에 실행할 요청 수 기본값
+DEFAULT_CHUNK_SIZE = 10
+DEFAULT_CONCURRENCY = 4
+
+
+def split_into_chunks(total, chunk_size=DEFAULT_CHUNK_SIZE):
+    """전체 문제 수를 chunk_size 이하의 묶음 크기 목록으로 분할"""
+    chunk_size = max(1, int(chunk_size))
+    sizes = [chunk_size] * (total // chunk_size)
+    if total % chunk_size:
+        sizes.append(total % chunk_size)
+    return sizes
+
+
+def chunk_additional_info(additional_info, index, num_chunks):
+    """묶음별로 서로 다른 문제가 나오도록 추가 요구사항 보강"""
+    if num_chunks <= 1:
+        return additional_info
+    note = f"전체 {num_chunks}개 묶음 중 {index + 1}번째 묶음입니다. 다른 묶음과 겹치지 않는 새로운 문제를 출제해주세요."
+    return f"{additional_info}\n{note}" if additional_info else note
+
+
+def question_event(index, question):
+    return {'type': 'question', 'index': index, 'question': question}
+
+
+def chunk_event(index, size, response=None, count=0, error=None, parse_errors=None):
+    return {
+        'type': 'chunk', 'index': index, 'size': size, 'response': response,
+        'count': count, 'error': error, 'parse_errors': parse_errors or []
+    }
+
+
+def generate_in_chunks(generate, make_prompt, parse, total, chunk_size=DEFAULT_CHUNK_SIZE,
+                       concurrency=DEFAULT_CONCURRENCY, initializer=None):
+    """문제 생성 요청을 묶음으로 나누어 동시에 실행
+
+    generate(prompt)는 응답 텍스트(실패 시 None)를, make_prompt(size, index, num_chunks)는
+    묶음별 프롬프트를, parse(response)는 (문제 목록, 파싱 실패 구간 목록)을 반환해야 합니다.
+    완료된 묶음부터 문제마다 'question' 이벤트를, 이어서 묶음 결과인 'chunk' 이벤트를 yield 하므로
+    호출 측에서 바로 미리보기에 반영할 수 있습니다. 전체 소요 시간은 (묶음 수 / concurrency)에 비례합니다.
+    """
+    sizes = split_into_chunks(total, chunk_size)
+    num_chunks = len(sizes)
+
+    def run_chunk(index, size):
+        try:
+            response = generate(make_prompt(size, index, num_chunks))
+            if not response:
+                return [chunk_event(index, size, error="응답이 없습니다.")]
+            questions, parse_errors = parse(response)
+            if not questions:
+                return [chunk_event(index, size, response, error="응답을 파싱하지 못했습니다.", parse_errors=parse_errors)]
+            return [question_event(index, q) for q in questions] + [
+                chunk_event(index, size, response, len(questions), parse_errors=parse_errors)
+            ]
+        except Exception as e:
+            return [chunk_event(index, size, error=str(e))]
+
+    workers = max(1, min(int(concurrency), num_chunks or 1))
+    with ThreadPoolExecutor(max_workers=workers, initializer=initializer) as executor:
+        futures = [executor.submit(run_chunk, i, size) for i, size in enumerate(sizes)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def stream_in_chunks(stream, make_prompt, total, chunk_size=DEFAULT_CHUNK_SIZE,
+                     concurrency=DEFAULT_CONCURRENCY, initializer=None):
+    """generate_in_chunks의 스트리밍 버전
+
+    stream(prompt)는 응답 텍스트 조각을 yield 해야 합니다. 각 묶음의 JSON 객체가 완성되는 즉시
+    'question' 이벤트를 yield 하므로 첫 문제가 표시되기까지의 시간이 전체 생성 시간보다 훨씬 짧습니다.
+    파싱하지 못한 구간은 'chunk' 이벤트의 parse_errors로 전달됩니다.
+    """
+    sizes = split_into_chunks(total, chunk_size)
+    num_chunks = len(sizes)
+    events = queue.Queue()
+
+    def run_chunk(index, size):
+        parts = []
+        count = 0
+        parser = JsonObjectStream()
+        try:
+            for text in stream(make_prompt(size, index, num_chunks)):
+                parts.append(text)
+                for q in parser.feed(text):
+                    count += 1
+                    events.put(question_event(index, q))
+            for q in parser.close():
+                count += 1
+                events.put(question_event(index, q))
+            response = "".join(parts)
+            if not response:
+                events.put(chunk_event(index, size, error="응답이 없습니다."))
+                return
+            error = None if count else "응답을 파싱하지 못했습니다."
+            events.put(chunk_event(index, size, response, count, error, parser.errors))
+        except Exception as e:
+            events.put(chunk_event(index, size, "".join(parts) or None, count, str(e), parser.errors))
+
+    workers = max(1, min(int(concurrency), num_chunks or 1))
+    with ThreadPoolExecutor(max_workers=workers, initializer=initializer) as executor:
+        for i, size in enumerate(sizes):
+            executor.submit(run_chunk, i, size)
+        remaining = num_chunks
+        while remaining:
+            event = events.get()
+            if event['type'] == 'chunk':
+                remaining -= 1
+            yield event
@@ -0,0 +1,366 @@
+import csv
+import io
+import json
+import math
+import operator
+from datetime import datetime
+
+import numpy as np
+
+from bank_io import iter_records, open_decompressed_reader
+from exam_builder import ANSWER_SYMBOLS, answer_index, variant_label
+
+# 응답 코드: 0 무응답, 1~4 객관식 선택지(인쇄된 위치), 5 O, 6 X, 7 알 수 없는 표기(복수 표기 등)
+CODE_BLANK = 0
+CODE_O = 5
+CODE_X = 6
+CODE_INVALID = 7
+NUM_CODES = 8
+RESPONSE_CODES = {'': CODE_BLANK, 'O': CODE_O, 'o': CODE_O, '○': CODE_O, 'X': CODE_X, 'x': CODE_X, '×': CODE_X}
+for _i, _symbol in enumerate(ANSWER_SYMBOLS, 1):
+    RESPONSE_CODES[_symbol] = RESPONSE_CODES[str(_i)] = _i
+
+# 자동 채점하는 문제 유형 (주관식은 점수와 문항 통계에서 제외)
+GRADABLE_TYPES = ('객관식', 'O/X')
+# 변별도 계산에 쓰는 상위/하위 집단 비율
+GROUP_RATIO = 0.27
+# 검토 대상으로 표시할 문항 (정답률이 범위를 벗어나거나 변별도가 낮은 문항)
+REVIEW_P_RANGE = (0.2, 0.9)
+REVIEW_DISCRIMINATION = 0.2
+# 응답 파일의 학번/형 열 이름 (CSV 머리글, JSON Lines 키)
+STUDENT_FIELDS = ('학번', 'student_id', 'student', 'id')
+VARIANT_FIELDS = ('형', 'variant')
+
+
+def response_code(value):
+    """답안 표기 하나를 응답 코드로 변환"""
+    if value is None:
+        return CODE_BLANK
+    return RESPONSE_CODES.get(str(value).strip(), CODE_INVALID)
+
+
+def _key_code(question):
+    """문제의 정답 응답 코드 (주관식과 정답을 알 수 없는 문제는 무응답 코드)"""
+    if question.get('type') == '객관식':
+        return answer_index(question) + 1
+    if question.get('type') == 'O/X':
+        return response_code(question.get('correct_answer'))
+    return CODE_BLANK
+
+
+def make_answer_key(exam, variants=None):
+    """시험지(와 make_variants 결과)로 채점용 정답 키 생성
+
+    문항 통계는 원래 시험지의 문항/선택지 순서로 계산하므로 형별 문항 순서(order)와
+    선택지 순서(option_order)를 함께 담습니다. 여러 형이 없으면 원래 순서의 형 하나로 만듭니다.
+    """
+    questions = exam['questions']
+    n = len(questions)
+    width = len(ANSWER_SYMBOLS)
+    if variants is None:
+        order = np.arange(n)[None, :]
+        option_order = np.broadcast_to(np.arange(width), (1, n, width))
+    else:
+        order = variants['order']
+        option_order = variants['option_order']
+    return {
+        'title': exam['title'],
+        'question_ids': [q.get('id') for q in questions],
+        'types': [q.get('type') for q in questions],
+        'answers': [_key_code(q) for q in questions],
+        'labels': [variant_label(i) for i in range(len(order))],
+        'order': np.asarray(order).tolist(),
+        'option_order': np.asarray(option_order).tolist()
+    }
+
+
+def answer_key_json(key):
+    """정답 키를 JSON 텍스트로 (나중에 다른 세션에서 채점할 때 사용)"""
+    return json.dumps(key, ensure_ascii=False)
+
+
+def load_answer_key(fileobj):
+    """answer_key_json으로 저장한 정답 키 읽기 (잘못된 경우 ValueError)"""
+    try:
+        key = json.loads(fileobj.read().decode('utf-8-sig'))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"정답 키 파일을 읽지 못했습니다: {e}") from e
+    missing = [field for field in ('question_ids', 'types', 'answers', 'labels', 'order', 'option_order')
+               if field not in key]
+    if missing:
+        raise ValueError(f"정답 키에 {', '.join(missing)} 항목이 없습니다")
+    return key
+
+
+def _variant_lookup(labels):
+    """형 표기('B형', 'B', '2') -> 형 번호"""
+    lookup = {}
+    for i, label in enumerate(labels):
+        for name in (label, label.rstrip('형'), str(i + 1)):
+            lookup[name] = lookup[name.lower()] = i
+    return lookup
+
+
+def _pick(names, candidates):
+    return next((name for name in candidates if name in names), None)
+
+
+class _CodeTable(dict):
+    """답안 표기 -> 응답 코드 (앞뒤 공백 등 처음 보는 표기는 한 번만 정리해 기억)"""
+
+    def __init__(self):
+        super().__init__(RESPONSE_CODES)
+
+    def __missing__(self, value):
+        code = self[value] = RESPONSE_CODES.get(value.strip(), CODE_INVALID)
+        return code
+
+
+def _read_csv(fileobj, key_length):
+    """CSV 응답 파일: 머리글의 학번/형 열과 숫자 열(문항 번호)을 읽어 (학번 목록, 형 목록, 응답 코드 배열) 반환
+
+    행마다 응답 코드를 바이트열로 모았다가 마지막에 한 번에 배열로 바꿉니다.
+    """
+    text = io.TextIOWrapper(open_decompressed_reader(fileobj), encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        header = [name.strip() for name in next(reader, [])]
+        student_col = _pick(header, STUDENT_FIELDS)
+        variant_col = _pick(header, VARIANT_FIELDS)
+        if student_col is None:
+            raise ValueError(f"CSV 머리글에 학번 열({', '.join(STUDENT_FIELDS)})이 없습니다")
+        student_at = header.index(student_col)
+        variant_at = header.index(variant_col) if variant_col else None
+        # 문항 열 위치와 문항 번호 (정답 키보다 많은 문항 열은 무시)
+        columns = [col for col, name in enumerate(header) if name.isdigit() and 0 < int(name) <= key_length]
+        positions = [int(header[col]) - 1 for col in columns]
+        width = max(columns + [student_at, variant_at or 0]) + 1
+        pick = operator.itemgetter(*columns) if len(columns) > 1 else (
+            lambda row: tuple(row[col] for col in columns)
+        )
+        table = _CodeTable()
+        students, variants, packed = [], [], []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            students.append(row[student_at])
+            variants.append(row[variant_at] if variant_at is not None else None)
+            packed.append(bytes(map(table.__getitem__, pick(row))))
+    finally:
+        text.detach()
+    codes = np.zeros((len(packed), key_length), dtype=np.int8)
+    codes[:, positions] = np.frombuffer(b''.join(packed), dtype=np.int8).reshape(len(packed), len(columns))
+    return students, variants, codes
+
+
+def _read_jsonl(fileobj, key_length):
+    """JSON Lines 응답 파일: {"student_id", "variant", "answers": [...] 또는 {"1": ...}}"""
+    students, variants, rows = [], [], []
+    for number, record in enumerate(iter_records(fileobj), 1):
+        if isinstance(record, tuple) or not isinstance(record, dict):
+            raise ValueError(f"{number}번째 레코드를 읽지 못했습니다")
+        answers = record.get('answers') or []
+        if isinstance(answers, dict):
+            answers = [answers.get(str(i + 1)) for i in range(key_length)]
+        codes = [response_code(value) for value in answers[:key_length]]
+        students.append(str(record.get(_pick(record, STUDENT_FIELDS) or 'student_id', "")))
+        variants.append(record.get(_pick(record, VARIANT_FIELDS) or 'variant'))
+        rows.append(codes + [CODE_BLANK] * (key_length - len(codes)))
+    return students, variants, np.array(rows, dtype=np.int8).reshape(len(rows), key_length)
+
+
+def load_responses(key, files):
+    """응답 파일들을 읽어 학번, 형 번호, 인쇄된 순서의 응답 코드 배열로 반환
+
+    files: [(파일 이름, 바이너리 파일), ...] - 이름이 .csv(.gz)이면 CSV, 아니면 JSON Lines로 읽습니다.
+    형 표기가 없으면 첫 번째 형으로 보고, 정답 키에 없는 형은 -1로 표시합니다(채점에서 제외).
+    """
+    n = len(key['question_ids'])
+    lookup = _variant_lookup(key['labels'])
+    students, variants, blocks = [], [], []
+    for name, fileobj in files:
+        reader = _read_csv if name.lower().removesuffix('.gz').endswith('.csv') else _read_jsonl
+        file_students, file_variants, codes = reader(fileobj, n)
+        students += [str(student).strip() for student in file_students]
+        for variant in file_variants:
+            variant = "" if variant is None else str(variant).strip()
+            variants.append(lookup.get(variant, lookup.get(variant.lower(), -1)) if variant else 0)
+        blocks.append(codes)
+    return {
+        'students': students,
+        'variants': np.array(variants, dtype=np.int64),
+        'codes': np.concatenate(blocks) if blocks else np.zeros((0, n), dtype=np.int8)
+    }
+
+
+def grade(key, responses, group_ratio=GROUP_RATIO):
+    """응답 전체를 한 번에 채점하고 학생별 점수와 문항 통계 계산 (numpy 배열 연산)
+
+    1. 형별 문항/선택지 순서로 응답을 원래 시험지 순서로 되돌리고
+    2. 객관식/O/X 문항을 정답과 한 번에 비교해 점수를 내며
+    3. 문항별 정답률(p), 상하위 집단 변별도(D), 문항-나머지 점수 상관(점이연 상관), 선택지별 응답 수를 계산합니다.
+    """
+    codes = responses['codes']
+    variant = responses['variants']
+    valid = (variant >= 0) & (variant < len(key['labels']))
+    codes, variant = codes[valid], variant[valid]
+    students = [s for s, ok in zip(responses['students'], valid) if ok]
+    rows, n = codes.shape
+
+    order = np.asarray(key['order'], dtype=np.int64)
+    option_order = np.asarray(key['option_order'], dtype=np.int64)
+    types = np.array(key['types'], dtype=object)
+    is_choice = types == '객관식'
+    answers = np.asarray(key['answers'], dtype=np.int8)
+    # 정답을 알 수 없는 문항은 채점하지 않음
+    gradable = np.isin(types, GRADABLE_TYPES) & (answers != CODE_BLANK) & (answers != CODE_INVALID)
+
+    # 인쇄된 위치 -> 원래 문항 위치
+    original = np.empty_like(codes)
+    np.put_along_axis(original, order[variant], codes, axis=1)
+    # 섞인 선택지 번호(1~4) -> 원래 선택지 번호 ((형, 문항, 선택지) 배열을 펼쳐 한 번에 조회)
+    width = option_order.shape[2]
+    chosen = np.clip(original.astype(np.int64) - 1, 0, width - 1)
+    flat = (variant[:, None] * n + np.arange(n)[None, :]) * width + chosen
+    mapped = option_order.reshape(-1)[flat] + 1
+    is_option = (original >= 1) & (original <= width)
+    is_ox = (original == CODE_O) | (original == CODE_X)
+    original = np.where(is_choice[None, :] & is_option, mapped, original)
+    # 유형에 맞지 않는 표기(객관식 문항의 O/X, O/X 문항의 선택지 번호)는 알 수 없는 표기로 처리
+    mismatch = (is_choice[None, :] & is_ox) | (~is_choice[None, :] & is_option)
+    original = np.where(mismatch, CODE_INVALID, original).astype(np.int8)
+
+    correct = (original == answers[None, :]) & gradable[None, :]
+    scores = correct.sum(axis=1)
+    max_score = int(gradable.sum())
+
+    # 선택지(응답 코드)별 응답 수: 문항마다 NUM_CODES칸씩 이어 붙여 bincount 한 번으로 집계
+    counts = np.bincount(
+        (np.arange(n)[None, :] * NUM_CODES + original).ravel(), minlength=n * NUM_CODES
+    ).reshape(n, NUM_CODES)
+
+    p_values = correct.mean(axis=0) if rows else np.full(n, np.nan)
+    discrimination = np.full(n, np.nan)
+    point_biserial = np.full(n, np.nan)
+    if rows >= 2:
+        group = max(1, math.ceil(rows * group_ratio))
+        ranked = np.argsort(scores, kind='stable')
+        discrimination = correct[ranked[-group:]].mean(axis=0) - correct[ranked[:group]].mean(axis=0)
+        x = correct.astype(np.float64)
+        rest = scores[:, None] - x
+        cov = (x * rest).mean(axis=0) - x.mean(axis=0) * rest.mean(axis=0)
+        spread = x.std(axis=0) * rest.std(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            point_biserial = np.where(spread > 0, cov / spread, np.nan)
+
+    items = []
+    for i in range(n):
+        item = {
+            'number': i + 1,
+            'question_id': key['question_ids'][i],
+            'type': key['types'][i],
+            'gradable': bool(gradable[i]),
+            'omitted': int(counts[i, CODE_BLANK]),
+            'invalid': int(counts[i, CODE_INVALID])
+        }
+        if gradable[i]:
+            item.update(
+                p_value=_number(p_values[i]),
+                discrimination=_number(discrimination[i]),
+                point_biserial=_number(point_biserial[i])
+            )
+            if is_choice[i]:
+                item['choices'] = {symbol: int(counts[i, j + 1]) for j, symbol in enumerate(ANSWER_SYMBOLS)}
+                item['answer'] = ANSWER_SYMBOLS[answers[i] - 1]
+            else:
+                item['choices'] = {'O': int(counts[i, CODE_O]), 'X': int(counts[i, CODE_X])}
+                item['answer'] = {CODE_O: 'O', CODE_X: 'X'}.get(int(answers[i]))
+        items.append(item)
+
+    return {
+        'title': key.get('title'),
+        'students': students,
+        'variants': variant,
+        'scores': scores,
+        'labels': key['labels'],
+        'max_score': max_score,
+        'skipped': int((~valid).sum()),
+        'items': items
+    }
+
+
+def _number(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def score_summary(result):
+    """점수 분포 요약 (응시자 수, 평균, 표준편차, 최저/최고, 신뢰도 KR-20)"""
+    scores = result['scores']
+    if not len(scores):
+        return {'students': 0}
+    summary = {
+        'students': int(len(scores)),
+        'mean': float(scores.mean()),
+        'std': float(scores.std()),
+        'min': int(scores.min()),
+        'max': int(scores.max())
+    }
+    # KR-20: 문항이 2개 이상이고 점수 분산이 있을 때만 계산
+    p = np.array([item['p_value'] for item in result['items'] if item['gradable']], dtype=np.float64)
+    if len(p) >= 2 and scores.var() > 0:
+        summary['kr20'] = float(len(p) / (len(p) - 1) * (1 - (p * (1 - p)).sum() / scores.var()))
+    return summary
+
+
+def score_distribution(result):
+    """점수별 인원 목록 (0점 ~ 만점)"""
+    return np.bincount(result['scores'], minlength=result['max_score'] + 1).tolist()
+
+
+def needs_review(item):
+    """정답률이 너무 낮거나 높거나 변별도가 낮은 문항인지 여부"""
+    if not item['gradable'] or item['p_value'] is None:
+        return False
+    low, high = REVIEW_P_RANGE
+    discrimination = item['discrimination']
+    return not low <= item['p_value'] <= high or (discrimination is not None and discrimination < REVIEW_DISCRIMINATION)
+
+
+def scores_csv(result):
+    """학생별 점수 CSV 텍스트"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["학번", "형", "점수", "만점", "백분율"])
+    max_score = result['max_score'] or 1
+    for student, variant, score in zip(result['students'], result['variants'], result['scores']):
+        writer.writerow([
+            student, result['labels'][variant], int(score),
+            result['max_score'], f"{score / max_score * 100:.1f}"
+        ])
+    return output.getvalue()
+
+
+def item_statistics(result, graded_at=None):
+    """문제 은행에 기록할 문항 통계 {문제 ID: 통계} (자동 채점 문항만)"""
+    graded_at = graded_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    responses = len(result['scores'])
+    stats = {}
+    if not responses:
+        return stats
+    for item in result['items']:
+        if not item['gradable'] or item['question_id'] is None:
+            continue
+        stats[item['question_id']] = {
+            'exam': result['title'],
+            'graded_at': graded_at,
+            'responses': responses,
+            'p_value': item['p_value'],
+            'discrimination': item['discrimination'],
+            'point_biserial': item['point_biserial'],
+            'choices': item['choices'],
+            'omitted': item['omitted'],
+            'invalid': item['invalid']
+        }
+    return stats
@@ -0,0 +1,377 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config import data_path
+
+# 동시에 실행할 백그라운드 작업 수
+JOB_WORKERS = int(os.environ.get("EXAM_BOT_JOB_WORKERS", "2"))
+# 끝나지 않은 작업의 소유 프로세스가 살아 있음을 기록하는 간격 (초)
+HEARTBEAT_INTERVAL = 10
+# 이 시간(초) 동안 소유 프로세스의 기록이 없으면 중단된 작업으로 보고 실패 처리
+STALE_AFTER = HEARTBEAT_INTERVAL * 3
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+STATUS_LABELS = {
+    QUEUED: "대기 중", RUNNING: "실행 중", DONE: "완료", FAILED: "실패", CANCELLED: "취소됨"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    title TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    saved_at TEXT,
+    -- 작업을 실행하는 프로세스 ("호스트:PID")와 마지막으로 살아 있음을 기록한 시각 (epoch 초)
+    owner TEXT,
+    heartbeat_ts REAL,
+    -- 다른 프로세스에서도 볼 수 있도록 DB에 남기는 취소 요청 (소유 프로세스가 살아 있음 기록 때 확인)
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+
+-- 작업이 진행되는 동안 만들어진 결과 항목 (생성된 문제 등)
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_job_items_delete AFTER DELETE ON jobs BEGIN
+    DELETE FROM job_items WHERE job_id = OLD.id;
+END;
+"""
+# 처음 만든 뒤에 추가된 jobs 열 (기존 DB는 ALTER TABLE로 추가)
+ADDED_COLUMNS = {'owner': "TEXT", 'heartbeat_ts': "REAL", 'cancel_requested': "INTEGER NOT NULL DEFAULT 0"}
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _owner_alive(owner):
+    """같은 호스트의 소유 프로세스가 아직 실행 중인지 여부 (다른 호스트는 알 수 없으므로 True)"""
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def row_to_job(row):
+    """DB 행을 작업 dict로 변환"""
+    job = dict(row)
+    job['params'] = json.loads(job['params'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+
+class JobCancelled(Exception):
+    """작업이 취소되었을 때 작업 함수 안에서 발생"""
+
+
+class JobContext:
+    """작업 함수에 전달되는 진행 상황 기록 도구"""
+
+    def __init__(self, manager, job_id, cancel_event):
+        self.manager = manager
+        self.job_id = job_id
+        self._cancel_event = cancel_event
+        self._seq = 0
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """취소 요청이 있으면 JobCancelled 발생"""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, fraction=None, message=None):
+        """진행률(0~1)과 상태 메시지 기록 (None인 값은 그대로 둠)"""
+        if fraction is not None:
+            fraction = min(max(fraction, 0.0), 1.0)
+        self.manager._update(self.job_id, progress=fraction, message=message)
+
+    def add_items(self, items):
+        """결과 항목을 바로 저장 (작업이 끝나기 전에도 화면에서 조회 가능)"""
+        rows = []
+        for item in items:
+            rows.append((self.job_id, self._seq, json.dumps(item, ensure_ascii=False)))
+            self._seq += 1
+        with self.manager._connect() as conn:
+            conn.executemany("INSERT INTO job_items VALUES (?, ?, ?)", rows)
+
+
+class LocalJobContext:
+    """작업 관리자 없이 작업 함수를 현재 프로세스에서 바로 실행할 때 쓰는 컨텍스트 (명령줄 실행용)
+
+    진행 상황은 on_progress(진행률, 메시지)로 전달하고 결과 항목은 items에 모읍니다.
+    """
+
+    def __init__(self, job_id="local", on_progress=None):
+        self.job_id = job_id
+        self.items = []
+        self._on_progress = on_progress
+        self._cancel_event = threading.Event()
+        self._fraction = 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, fraction=None, message=None):
+        if fraction is not None:
+            self._fraction = min(max(fraction, 0.0), 1.0)
+        if self._on_progress:
+            self._on_progress(self._fraction, message)
+
+    def add_items(self, items):
+        self.items.extend(items)
+
+
+class JobManager:
+    """스레드 풀에서 작업을 실행하고 상태를 SQLite에 기록하는 백그라운드 작업 관리자
+
+    작업 상태와 결과가 파일에 남으므로 Streamlit 재실행이나 브라우저 새로고침 후에도
+    조회할 수 있습니다. 여러 프로세스가 같은 DB를 함께 쓸 수 있도록 작업마다 실행 프로세스를 기록하고
+    HEARTBEAT_INTERVAL초마다 살아 있음을 갱신하며, 소유 프로세스가 끝났거나 STALE_AFTER초 동안
+    갱신이 없는 끝나지 않은 작업만 실패로 표시합니다. 다른 프로세스에서 요청한 취소도 이때 확인합니다.
+    """
+
+    def __init__(self, path=None, workers=JOB_WORKERS):
+        self.path = path or data_path("jobs.db")
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._cancel_events = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self.fail_abandoned()
+        threading.Thread(target=self._heartbeat_loop, daemon=True, name="job-heartbeat").start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET heartbeat_ts = ? WHERE owner = ? AND status IN (?, ?)",
+                        (time.time(), self.owner, QUEUED, RUNNING)
+                    )
+                self._apply_cancel_requests()
+                self.fail_abandoned()
+            except sqlite3.Error:
+                # DB가 잠시 잠겨 있으면 다음 주기에 다시 시도
+                pass
+
+    def _apply_cancel_requests(self):
+        """다른 프로세스가 DB에 남긴 이 프로세스 작업의 취소 요청을 작업 함수에 전달"""
+        for row in self._connect().execute(
+            "SELECT id FROM jobs WHERE owner = ? AND cancel_requested = 1 AND status IN (?, ?)",
+            (self.owner, QUEUED, RUNNING)
+        ):
+            event = self._cancel_events.get(row['id'])
+            if event is not None:
+                event.set()
+
+    def fail_abandoned(self):
+        """소유 프로세스가 끝났거나 살아 있음 기록이 오래된 끝나지 않은 작업을 실패로 표시"""
+        conn = self._connect()
+        stale_before = time.time() - STALE_AFTER
+        abandoned = [
+            row['id'] for row in conn.execute(
+                "SELECT id, owner, heartbeat_ts FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            )
+            if row['owner'] != self.owner and (
+                row['heartbeat_ts'] is None or row['heartbeat_ts'] < stale_before or not _owner_alive(row['owner'])
+            )
+        ]
+        if abandoned:
+            with conn:
+                conn.executemany(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                    [(FAILED, "작업을 실행하던 프로세스가 종료되어 작업이 중단되었습니다.", _now(), job_id, QUEUED, RUNNING)
+                     for job_id in abandoned]
+                )
+        return len(abandoned)
+
+    def _connect(self):
+        # 스레드마다 별도 연결 사용
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, job_id, **fields):
+        fields = {k: v for k, v in fields.items() if v is not None}
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'], ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+
+    def submit(self, kind, title, params, func, *args):
+        """작업을 등록하고 ID 반환
+
+        func(ctx, params, *args)는 워커 스레드에서 실행되며, 반환한 dict가 작업 결과로 저장됩니다.
+        params는 기록용으로 저장되므로 API 키처럼 남기면 안 되는 값은 args로 전달합니다.
+        """
+        with self._connect() as conn:
+            job_id = conn.execute(
+                "INSERT INTO jobs (kind, title, status, params, created_at, owner, heartbeat_ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, title, QUEUED, json.dumps(params, ensure_ascii=False), _now(), self.owner, time.time())
+            ).lastrowid
+        cancel_event = threading.Event()
+        self._cancel_events[job_id] = cancel_event
+        self._executor.submit(self._run, job_id, cancel_event, func, params, args)
+        return job_id
+
+    def _run(self, job_id, cancel_event, func, params, args):
+        try:
+            if cancel_event.is_set():
+                return
+            # 대기 중에 (다른 프로세스에서) 취소된 작업은 실행하지 않음
+            with self._connect() as conn:
+                started = conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ? AND cancel_requested = 0",
+                    (RUNNING, _now(), job_id, QUEUED)
+                ).rowcount
+            if not started:
+                return
+            ctx = JobContext(self, job_id, cancel_event)
+            try:
+                result = func(ctx, params, *args)
+            except JobCancelled:
+                self._update(job_id, status=CANCELLED, finished_at=_now())
+                return
+            except Exception as e:
+                self._update(job_id, status=FAILED, error=str(e), finished_at=_now())
+                return
+            status = CANCELLED if cancel_event.is_set() else DONE
+            self._update(job_id, status=status, progress=1.0, result=result or {}, finished_at=_now())
+        finally:
+            self._cancel_events.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """작업 취소 요청 (요청이 받아들여지면 True, 이미 끝났거나 없는 작업이면 False)
+
+        대기 중인 작업은 바로 취소하고, 실행 중인 작업은 작업 함수가 확인하는 시점에 중단합니다.
+        다른 프로세스가 실행 중인 작업은 그 프로세스가 다음 살아 있음 기록 때(HEARTBEAT_INTERVAL초 이내) 확인합니다.
+        """
+        with self._connect() as conn:
+            requested = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN (?, ?)",
+                (job_id, QUEUED, RUNNING)
+            ).rowcount
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, _now(), job_id, QUEUED)
+            )
+        event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        return bool(requested)
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row_to_job(row) if row else None
+
+    def list(self, limit=50, kind=None):
+        """최근 작업 목록 (결과 본문은 제외)"""
+        sql = "SELECT id, kind, title, status, progress, message, error, created_at, started_at, finished_at, saved_at, " \
+              "(SELECT COUNT(*) FROM job_items WHERE job_id = jobs.id) AS item_count FROM jobs"
+        params = []
+        if kind:
+            sql += " WHERE kind = ?"
+            params.append(kind)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def has_active(self):
+        """대기 중이거나 실행 중인 작업이 있는지 여부"""
+        return self._connect().execute(
+            "SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1", (QUEUED, RUNNING)
+        ).fetchone() is not None
+
+    def items(self, job_id, offset=0):
+        """작업 결과 항목 목록 (offset 이후)"""
+        rows = self._connect().execute(
+            "SELECT item FROM job_items WHERE job_id = ? AND seq >= ? ORDER BY seq",
+            (job_id, offset)
+        )
+        return [json.loads(row['item']) for row in rows]
+
+    def mark_saved(self, job_id):
+        """작업 결과를 저장했다고 표시 (같은 결과를 두 번 저장하지 않도록)"""
+        self._update(job_id, saved_at=_now())
+
+    def delete(self, job_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ? AND status NOT IN (?, ?)", (job_id, QUEUED, RUNNING))
+
+    def clear_finished(self):
+        """끝난 작업 기록 모두 삭제"""
+        with self._connect() as conn:
+            conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED_STATUSES))})",
+                FINISHED_STATUSES
+            )
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """프로세스 전체에서 공유하는 작업 관리자 반환"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+    return _manager
@@ -0,0 +1,265 @@
+import queue
+import threading
+import time
+from collections import deque
+
+from telemetry import CANCELLED, ERROR, OK, CallRecord
+
+# 라우팅 모드
+ROUTE_SINGLE = "single"
+ROUTE_FAILOVER = "failover"
+ROUTE_HEDGE = "hedge"
+
+# 제공업체별 최근 기록 개수, 헤징 기준 백분위, 기록이 부족할 때 쓰는 기본 헤징 대기 시간(초)
+STATS_WINDOW = 100
+HEDGE_PERCENTILE = 0.95
+MIN_SAMPLES = 5
+DEFAULT_HEDGE_DELAY = 10.0
+# 연속 실패 횟수가 이 값 이상이면 COOLDOWN 동안 후순위로 미룸
+FAILURE_THRESHOLD = 3
+COOLDOWN_SECONDS = 30.0
+
+
+class Provider:
+    """AI 제공업체 (이름, 화면 표시 이름, 일반/스트리밍 호출 함수, 비용 계산용 모델 이름)
+
+    generate(api_key, prompt)는 응답 텍스트를, stream(api_key, prompt)는 텍스트 조각을 yield 하며
+    실패하면 예외를 발생시켜야 합니다.
+    """
+
+    def __init__(self, name, label, generate, stream, model=None):
+        self.name = name
+        self.label = label
+        self.generate = generate
+        self.stream = stream
+        self.model = model
+
+    def __repr__(self):
+        return f"Provider({self.name!r})"
+
+
+class ProviderStats:
+    """제공업체별 최근 응답 시간과 오류율 (프로세스 내 모든 세션 공유)
+
+    응답 시간은 첫 응답(스트리밍은 첫 조각)까지의 시간이며, 일반/스트리밍 호출을 따로 기록합니다.
+    """
+
+    def __init__(self, window=STATS_WINDOW):
+        self.window = window
+        self._latencies = {}
+        self._outcomes = {}
+        self._consecutive_failures = {}
+        self._last_failure = {}
+        self._lock = threading.Lock()
+
+    def record_success(self, provider, kind, latency):
+        with self._lock:
+            self._latencies.setdefault((provider, kind), deque(maxlen=self.window)).append(latency)
+            self._outcomes.setdefault(provider, deque(maxlen=self.window)).append(True)
+            self._consecutive_failures[provider] = 0
+
+    def record_failure(self, provider):
+        with self._lock:
+            self._outcomes.setdefault(provider, deque(maxlen=self.window)).append(False)
+            self._consecutive_failures[provider] = self._consecutive_failures.get(provider, 0) + 1
+            self._last_failure[provider] = time.monotonic()
+
+    def percentile(self, provider, kind, p):
+        """최근 응답 시간의 p 백분위 (기록이 MIN_SAMPLES개 미만이면 None)"""
+        with self._lock:
+            samples = sorted(self._latencies.get((provider, kind), ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    def error_rate(self, provider):
+        with self._lock:
+            outcomes = list(self._outcomes.get(provider, ()))
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def healthy(self, provider):
+        """최근 연속 실패로 잠시 제외된 상태가 아니면 True"""
+        with self._lock:
+            failures = self._consecutive_failures.get(provider, 0)
+            last_failure = self._last_failure.get(provider, 0.0)
+        return failures < FAILURE_THRESHOLD or time.monotonic() - last_failure > COOLDOWN_SECONDS
+
+    def summary(self, providers, kinds=("generate", "stream")):
+        """화면 표시용 제공업체별 통계 목록"""
+        rows = []
+        for provider in providers:
+            with self._lock:
+                requests = len(self._outcomes.get(provider, ()))
+            row = {
+                'provider': provider,
+                'healthy': self.healthy(provider),
+                'error_rate': self.error_rate(provider),
+                'requests': requests
+            }
+            for kind in kinds:
+                for p in (0.5, 0.95):
+                    row[f"{kind}_p{int(p * 100)}"] = self.percentile(provider, kind, p)
+            rows.append(row)
+        return rows
+
+
+class Router:
+    """여러 제공업체에 요청을 보내는 라우터
+
+    ROUTE_FAILOVER는 오류가 나면 다음 제공업체로 다시 요청하고, ROUTE_HEDGE는 여기에 더해
+    첫 제공업체가 평소 응답 시간(HEDGE_PERCENTILE 백분위) 안에 응답하지 않으면 다음 제공업체에도
+    동시에 요청해 먼저 응답한 쪽을 사용합니다. 제공업체 순서는 건강 상태와 최근 응답 시간으로 정합니다.
+    before_call(provider, api_key, prompt)는 실제 호출 직전에 실행됩니다 (요청 한도 대기 등).
+    metrics(telemetry.MetricsStore)를 지정하면 호출마다 대기/첫 응답/전체 시간과 토큰 수를 기록합니다.
+    """
+
+    def __init__(self, providers, api_keys, stats, mode=ROUTE_SINGLE, preferred=None, before_call=None,
+                 metrics=None, requester=None):
+        self.providers = [p for p in providers if api_keys.get(p.name)]
+        self.api_keys = api_keys
+        self.stats = stats
+        self.mode = mode
+        self.preferred = preferred
+        self.before_call = before_call
+        self.metrics = metrics
+        self.requester = requester
+        if not self.providers:
+            raise ValueError("API 키가 설정된 제공업체가 없습니다.")
+
+    def order(self, kind):
+        """요청할 제공업체 순서 (단일 모드는 선호 제공업체 하나)"""
+        if self.mode == ROUTE_SINGLE:
+            return [next((p for p in self.providers if p.name == self.preferred), self.providers[0])]
+
+        def rank(provider):
+            latency = self.stats.percentile(provider.name, kind, 0.5)
+            return (
+                not self.stats.healthy(provider.name),
+                DEFAULT_HEDGE_DELAY if latency is None else latency,
+                provider.name != self.preferred
+            )
+        return sorted(self.providers, key=rank)
+
+    def hedge_delay(self, provider, kind):
+        delay = self.stats.percentile(provider.name, kind, HEDGE_PERCENTILE)
+        return DEFAULT_HEDGE_DELAY if delay is None else delay
+
+    def generate(self, prompt):
+        """응답 텍스트와 응답한 제공업체 이름 반환"""
+        for provider, pieces in self._route(prompt, "generate"):
+            return "".join(pieces), provider.name
+
+    def stream(self, prompt):
+        """응답한 제공업체의 텍스트 조각을 yield (첫 조각 전에는 (None, 제공업체 이름) 형태로 알림)"""
+        for provider, pieces in self._route(prompt, "stream"):
+            yield None, provider.name
+            for piece in pieces:
+                yield piece, provider.name
+
+    def _route(self, prompt, kind):
+        # 제공업체마다 별도 스레드에서 호출하고, 가장 먼저 첫 조각을 보낸 쪽을 선택
+        candidates = self.order(kind)
+        events = queue.Queue()
+        stops = []
+        errors = []
+        pending = 0
+
+        def run(index, provider, stop):
+            api_key = self.api_keys[provider.name]
+            call = CallRecord(provider.name, provider.model, kind, prompt, self.requester)
+            try:
+                if self.before_call:
+                    self.before_call(provider, api_key, prompt)
+                # 응답 시간 통계에는 요청 한도 대기 시간을 넣지 않음
+                call.mark_sent()
+                with call.bound():
+                    if kind == "stream":
+                        pieces = provider.stream(api_key, prompt)
+                    else:
+                        pieces = iter([provider.generate(api_key, prompt)])
+                    first = True
+                    for piece in pieces:
+                        if stop.is_set():
+                            call.finish(CANCELLED)
+                            return
+                        call.mark_piece(piece)
+                        if first:
+                            self.stats.record_success(provider.name, kind, time.monotonic() - call.sent_at)
+                            first = False
+                        events.put(('data', index, piece))
+                if first:
+                    raise RuntimeError("응답이 비어 있습니다.")
+                call.finish(OK)
+                events.put(('done', index, None))
+            except Exception as e:
+                if not stop.is_set():
+                    self.stats.record_failure(provider.name)
+                call.finish(CANCELLED if stop.is_set() else ERROR, e)
+                events.put(('error', index, e))
+            finally:
+                if self.metrics is not None and call.status is not None:
+                    self.metrics.record_call(call)
+
+        def launch():
+            nonlocal pending
+            index = len(stops)
+            stop = threading.Event()
+            stops.append(stop)
+            pending += 1
+            threading.Thread(target=run, args=(index, candidates[index], stop), daemon=True).start()
+
+        launch()
+        winner = None
+        try:
+            while winner is None:
+                timeout = None
+                if self.mode == ROUTE_HEDGE and len(stops) < len(candidates):
+                    timeout = self.hedge_delay(candidates[len(stops) - 1], kind)
+                try:
+                    event, index, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    launch()  # 응답이 늦으면 다음 제공업체에도 요청 (헤징)
+                    continue
+                if event == 'data':
+                    winner = index
+                    first_piece = value
+                elif event == 'error':
+                    pending -= 1
+                    errors.append(f"{candidates[index].label}: {value}")
+                    if self.mode != ROUTE_SINGLE and len(stops) < len(candidates):
+                        launch()  # 장애 조치
+                    elif pending == 0:
+                        raise RuntimeError(" / ".join(errors))
+            for index, stop in enumerate(stops):
+                if index != winner:
+                    stop.set()
+
+            def winner_pieces():
+                yield first_piece
+                while True:
+                    event, index, value = events.get()
+                    if index != winner:
+                        continue
+                    if event == 'done':
+                        return
+                    if event == 'error':
+                        raise value
+                    yield value
+
+            yield candidates[winner], winner_pieces()
+        finally:
+            for stop in stops:
+                stop.set()
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_provider_stats():
+    """프로세스 전체에서 공유하는 제공업체 통계 반환"""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = ProviderStats()
+    return _stats
@@ -0,0 +1,477 @@
+import json
+import random
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import analytics
+from config import data_path
+from dedup import band_keys, question_signature
+
+# 문제 dict 키와 저장 컬럼 (JSON_FIELDS는 JSON 문자열로 저장)
+QUESTION_FIELDS = [
+    'type', 'subject', 'difficulty', 'question', 'options',
+    'correct_answer', 'answer', 'explanation', 'created_at', 'source', 'provider', 'item_stats'
+]
+JSON_FIELDS = ('options', 'item_stats')
+# 나중에 추가된 컬럼 (기존 DB에는 ALTER TABLE로 추가)
+ADDED_COLUMNS = ['source', 'provider', 'item_stats']
+FILTER_COLUMNS = {'subject': 'subject', 'question_type': 'type', 'difficulty': 'difficulty'}
+# PRAGMA user_version으로 기록하는 DB 형식 버전 (1: 서명 테이블 이전에 저장된 문제의 서명 계산 완료)
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    question TEXT NOT NULL,
+    options TEXT,
+    correct_answer TEXT,
+    answer TEXT,
+    explanation TEXT,
+    created_at TEXT NOT NULL,
+    source TEXT,
+    provider TEXT,
+    -- 마지막 채점 결과의 문항 통계 (정답률, 변별도, 선택지별 응답 수, JSON)
+    item_stats TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_questions_subject ON questions(subject, type, difficulty);
+CREATE INDEX IF NOT EXISTS idx_questions_type ON questions(type, difficulty);
+CREATE INDEX IF NOT EXISTS idx_questions_difficulty ON questions(difficulty);
+
+-- 과목 x 유형 x 난이도별 문제 수 (필터 옵션과 개수 계산용, 트리거로 증분 갱신)
+CREATE TABLE IF NOT EXISTS question_facets (
+    subject TEXT NOT NULL,
+    type TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (subject, type, difficulty)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_facets_insert AFTER INSERT ON questions BEGIN
+    INSERT INTO question_facets VALUES (NEW.subject, NEW.type, NEW.difficulty, 1)
+    ON CONFLICT(subject, type, difficulty) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_facets_delete AFTER DELETE ON questions BEGIN
+    UPDATE question_facets SET count = count - 1
+    WHERE subject = OLD.subject AND type = OLD.type AND difficulty = OLD.difficulty;
+    DELETE FROM question_facets
+    WHERE subject = OLD.subject AND type = OLD.type AND difficulty = OLD.difficulty AND count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_facets_update AFTER UPDATE OF subject, type, difficulty ON questions BEGIN
+    UPDATE question_facets SET count = count - 1
+    WHERE subject = OLD.subject AND type = OLD.type AND difficulty = OLD.difficulty;
+    DELETE FROM question_facets
+    WHERE subject = OLD.subject AND type = OLD.type AND difficulty = OLD.difficulty AND count <= 0;
+    INSERT INTO question_facets VALUES (NEW.subject, NEW.type, NEW.difficulty, 1)
+    ON CONFLICT(subject, type, difficulty) DO UPDATE SET count = count + 1;
+END;
+
+-- 유사 중복 검사용 MinHash 서명과 LSH 버킷
+CREATE TABLE IF NOT EXISTS question_signatures (
+    question_id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS question_lsh (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    question_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_question_lsh_bucket ON question_lsh(band, bucket);
+CREATE INDEX IF NOT EXISTS idx_question_lsh_question ON question_lsh(question_id);
+CREATE TRIGGER IF NOT EXISTS trg_signatures_delete AFTER DELETE ON questions BEGIN
+    DELETE FROM question_signatures WHERE question_id = OLD.id;
+    DELETE FROM question_lsh WHERE question_id = OLD.id;
+END;
+
+-- 시험지 출제 이력 (최근 출제 문제 제외용)
+CREATE TABLE IF NOT EXISTS exam_usage (
+    question_id INTEGER NOT NULL,
+    used_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_exam_usage_used_at ON exam_usage(used_at);
+CREATE INDEX IF NOT EXISTS idx_exam_usage_question ON exam_usage(question_id);
+CREATE TRIGGER IF NOT EXISTS trg_usage_delete AFTER DELETE ON questions BEGIN
+    DELETE FROM exam_usage WHERE question_id = OLD.id;
+END;
+"""
+
+# 검색 대상 컬럼과 bm25 가중치 (문제 본문 > 해설 > 선택지/정답)
+SEARCH_COLUMNS = ['question', 'options', 'correct_answer', 'answer', 'explanation']
+SEARCH_WEIGHTS = [10.0, 2.0, 1.0, 1.0, 3.0]
+
+# 문자 3-gram 토크나이저로 띄어쓰기/조사와 무관하게 한국어 부분 문자열 검색
+SEARCH_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS question_search USING fts5(
+    {', '.join(SEARCH_COLUMNS)},
+    content='questions', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS trg_search_insert AFTER INSERT ON questions BEGIN
+    INSERT INTO question_search(rowid, {', '.join(SEARCH_COLUMNS)})
+    VALUES (NEW.id, {', '.join('NEW.' + c for c in SEARCH_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS trg_search_delete AFTER DELETE ON questions BEGIN
+    INSERT INTO question_search(question_search, rowid, {', '.join(SEARCH_COLUMNS)})
+    VALUES ('delete', OLD.id, {', '.join('OLD.' + c for c in SEARCH_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS trg_search_update AFTER UPDATE OF {', '.join(SEARCH_COLUMNS)} ON questions BEGIN
+    INSERT INTO question_search(question_search, rowid, {', '.join(SEARCH_COLUMNS)})
+    VALUES ('delete', OLD.id, {', '.join('OLD.' + c for c in SEARCH_COLUMNS)});
+    INSERT INTO question_search(rowid, {', '.join(SEARCH_COLUMNS)})
+    VALUES (NEW.id, {', '.join('NEW.' + c for c in SEARCH_COLUMNS)});
+END;
+"""
+
+
+def question_to_row(question):
+    """문제 dict를 INSERT용 값 튜플로 변환"""
+    row = []
+    for field in QUESTION_FIELDS:
+        value = question.get(field)
+        if field == 'created_at' and not value:
+            value = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        elif field in JSON_FIELDS and value is not None:
+            value = json.dumps(value, ensure_ascii=False)
+        row.append(value)
+    return tuple(row)
+
+
+def row_to_question(row):
+    """DB 행을 기존 문제 dict 형태로 변환 (값이 없는 필드는 생략)"""
+    question = {'id': row['id']}
+    for field in QUESTION_FIELDS:
+        value = row[field]
+        if value is None:
+            continue
+        question[field] = json.loads(value) if field in JSON_FIELDS else value
+    return question
+
+
+class QuestionBank:
+    """SQLite(WAL) 기반 문제 은행
+
+    세션과 워커 프로세스가 같은 파일을 공유하며, ID는 AUTOINCREMENT로 발급되어
+    삭제 후에도 재사용되지 않습니다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_path("questions.db")
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._add_columns(conn)
+            analytics.create_schema(conn)
+            self._rebuild_facets(conn)
+            self._backfill_signatures(conn)
+            self.search_enabled = self._create_search_index(conn)
+
+    def _connect(self):
+        # 스레드마다 별도 연결 사용
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _add_columns(self, conn):
+        existing = {row['name'] for row in conn.execute("PRAGMA table_info(questions)")}
+        for column in ADDED_COLUMNS:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE questions ADD COLUMN {column} TEXT")
+
+    def _rebuild_facets(self, conn):
+        # 집계 테이블이 추가되기 전에 만들어진 DB는 한 번만 다시 집계
+        has_facets = conn.execute("SELECT 1 FROM question_facets LIMIT 1").fetchone()
+        has_questions = conn.execute("SELECT 1 FROM questions LIMIT 1").fetchone()
+        if has_questions and not has_facets:
+            conn.execute("""
+                INSERT INTO question_facets
+                SELECT subject, type, difficulty, COUNT(*) FROM questions
+                GROUP BY subject, type, difficulty
+            """)
+
+    def _backfill_signatures(self, conn):
+        # 서명 테이블이 추가되기 전에 저장된 문제만 서명 계산 (DB마다 한 번만, 이후 시작 때는 건너뜀)
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        missing = conn.execute("""
+            SELECT * FROM questions
+            WHERE id NOT IN (SELECT question_id FROM question_signatures)
+        """).fetchall()
+        for row in missing:
+            self._index_signature(conn, row['id'], row_to_question(row))
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _index_signature(self, conn, question_id, question):
+        signature = question_signature(question)
+        conn.execute(
+            "INSERT OR REPLACE INTO question_signatures VALUES (?, ?)",
+            (question_id, signature.tobytes())
+        )
+        conn.executemany(
+            "INSERT INTO question_lsh VALUES (?, ?, ?)",
+            [(band, bucket, question_id) for band, bucket in band_keys(signature)]
+        )
+
+    def _create_search_index(self, conn):
+        # trigram 토크나이저는 SQLite 3.34 이상에서만 지원되므로 실패하면 LIKE 검색으로 대체
+        existed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'question_search'"
+        ).fetchone()
+        try:
+            conn.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+        if not existed:
+            conn.execute("INSERT INTO question_search(question_search) VALUES ('rebuild')")
+        return True
+
+    def _where(self, filters):
+        clauses, params = [], []
+        for key, column in FILTER_COLUMNS.items():
+            value = filters.get(key)
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def add(self, question):
+        """문제 1개 저장 후 발급된 ID 반환"""
+        return self.add_many([question])[0]
+
+    def add_many(self, questions):
+        """여러 문제를 하나의 트랜잭션으로 저장하고 발급된 ID 목록 반환"""
+        placeholders = ", ".join("?" for _ in QUESTION_FIELDS)
+        sql = f"INSERT INTO questions ({', '.join(QUESTION_FIELDS)}) VALUES ({placeholders})"
+        ids = []
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for question in questions:
+                cursor.execute(sql, question_to_row(question))
+                ids.append(cursor.lastrowid)
+                self._index_signature(conn, cursor.lastrowid, question)
+        return ids
+
+    def update_item_stats(self, stats):
+        """채점으로 계산한 문항 통계 {문제 ID: 통계 dict}를 문제에 기록 (이전 채점 결과는 덮어씀)"""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE questions SET item_stats = ? WHERE id = ?",
+                [(json.dumps(item, ensure_ascii=False), question_id) for question_id, item in stats.items()]
+            )
+
+    def get(self, question_id):
+        """ID로 문제 조회 (없으면 None)"""
+        row = self._connect().execute(
+            "SELECT * FROM questions WHERE id = ?", (question_id,)
+        ).fetchone()
+        return row_to_question(row) if row else None
+
+    def get_many(self, ids):
+        """ID 목록 순서대로 문제 조회"""
+        ids = list(ids)
+        found = {}
+        conn = self._connect()
+        # SQLite 바인딩 변수 개수 제한을 피하기 위해 나누어 조회
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in conn.execute(f"SELECT * FROM questions WHERE id IN ({placeholders})", chunk):
+                found[row['id']] = row_to_question(row)
+        return [found[i] for i in ids if i in found]
+
+    def delete(self, question_id):
+        """문제 삭제"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM questions WHERE id = ?", (question_id,))
+
+    def clear(self):
+        """전체 문제 삭제"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM questions")
+
+    def count(self, **filters):
+        """조건(subject, question_type, difficulty)에 맞는 문제 수 (집계 테이블 사용)"""
+        where, params = self._where(filters)
+        return self._connect().execute(
+            f"SELECT COALESCE(SUM(count), 0) FROM question_facets{where}", params
+        ).fetchone()[0]
+
+    def facets(self):
+        """(과목, 유형, 난이도)별 문제 수 목록"""
+        return [tuple(row) for row in self._connect().execute(
+            "SELECT subject, type, difficulty, count FROM question_facets"
+        )]
+
+    def version(self):
+        """문제 목록이 바뀌었는지 확인하는 값 (추가하면 마지막 발급 ID가, 삭제하면 문제 수가 바뀜)"""
+        return tuple(self._connect().execute(
+            "SELECT (SELECT seq FROM sqlite_sequence WHERE name = 'questions'), "
+            "(SELECT COALESCE(SUM(count), 0) FROM question_facets)"
+        ).fetchone())
+
+    def query(self, limit=None, after_id=0, **filters):
+        """조건에 맞는 문제를 ID 순으로 조회 (after_id보다 큰 ID부터)
+
+        OFFSET 대신 앞 페이지의 마지막 ID를 after_id로 넘기는 키셋 방식이라 다음 페이지는
+        앞에서 읽은 만큼 건너뛰지 않고 바로 이어서 읽습니다.
+        """
+        where, params = self._where(filters)
+        sql = f"SELECT * FROM questions{where}{' AND' if where else ' WHERE'} id > ? ORDER BY id"
+        params.append(after_id)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row_to_question(row) for row in self._connect().execute(sql, params)]
+
+    def page_anchor(self, position, total=None, **filters):
+        """ID 순으로 position번째(0부터) 문제 바로 앞 문제의 ID (query의 after_id로 넘길 값, 처음이면 0)
+
+        앞 페이지를 차례로 넘길 때는 앞 페이지의 마지막 ID를 쓰면 되고, 이 함수는 페이지를 건너뛸 때만 씁니다.
+        키셋이 아니라 OFFSET으로 건너뛰지만 문제 행 없이 인덱스의 ID만 읽고, 처음과 끝 중 가까운 쪽에서
+        건너뛰므로 비용은 가까운 끝까지의 문제 수에 비례합니다 (마지막 페이지도 첫 페이지만큼 빠름).
+        total은 조건에 맞는 문제 수입니다 (없으면 count로 계산).
+        """
+        if position <= 0:
+            return 0
+        where, params = self._where(filters)
+        total = self.count(**filters) if total is None else total
+        if position <= total - position:
+            sql, skip = f"SELECT id FROM questions{where} ORDER BY id LIMIT 1 OFFSET ?", position - 1
+        else:
+            sql, skip = f"SELECT id FROM questions{where} ORDER BY id DESC LIMIT 1 OFFSET ?", max(total - position, 0)
+        row = self._connect().execute(sql, params + [skip]).fetchone()
+        return row[0] if row else 0
+
+    def _search_sql(self, text, filters):
+        """검색어를 MATCH/LIKE 조건으로 변환 (3글자 미만 검색어는 trigram으로 찾을 수 없어 LIKE 사용)"""
+        terms = text.split()
+        match_terms = [t for t in terms if len(t) >= 3] if self.search_enabled else []
+        like_terms = [t for t in terms if t not in match_terms]
+
+        where, params = self._where(filters)
+        clauses = [where[len(" WHERE "):]] if where else []
+        if match_terms:
+            clauses.insert(0, "question_search MATCH ?")
+            params.insert(0, " ".join('"' + t.replace('"', '""') + '"' for t in match_terms))
+            source = "question_search JOIN questions ON questions.id = question_search.rowid"
+        else:
+            source = "questions"
+        for term in like_terms:
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("(" + " OR ".join(f"questions.{c} LIKE ? ESCAPE '\\'" for c in SEARCH_COLUMNS) + ")")
+            params += [f"%{escaped}%"] * len(SEARCH_COLUMNS)
+        return source, " WHERE " + " AND ".join(clauses), params, bool(match_terms)
+
+    def search(self, text, limit=20, offset=0, **filters):
+        """문제/선택지/정답/해설 전문 검색 (관련도 순)
+
+        관련도(bm25) 순 정렬은 페이지와 관계없이 일치하는 문제 전체의 점수를 매겨 정렬하고, 3글자 미만 검색어의
+        LIKE 검색은 인덱스 없이 훑으므로 이어서 읽을 인덱스 순서가 없어 OFFSET으로 페이지를 나눕니다.
+        """
+        source, where, params, ranked = self._search_sql(text, filters)
+        order = f"bm25(question_search, {', '.join(map(str, SEARCH_WEIGHTS))})" if ranked else "questions.id"
+        sql = f"SELECT questions.* FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        return [row_to_question(row) for row in self._connect().execute(sql, params + [limit, offset])]
+
+    def search_count(self, text, **filters):
+        """검색 결과 수"""
+        source, where, params, _ = self._search_sql(text, filters)
+        return self._connect().execute(f"SELECT COUNT(*) FROM {source}{where}", params).fetchone()[0]
+
+    def lsh_candidates(self, keys):
+        """LSH 버킷 [(band, bucket), ...] 중 하나라도 겹치는 문제 ID 집합"""
+        conn = self._connect()
+        found = set()
+        for band, bucket in keys:
+            found.update(row[0] for row in conn.execute(
+                "SELECT question_id FROM question_lsh WHERE band = ? AND bucket = ?", (band, bucket)
+            ))
+        return found
+
+    def signatures(self, ids):
+        """문제 ID별 MinHash 서명"""
+        # 유사 중복 검사를 하지 않는 화면은 numpy를 읽지 않도록 여기서 가져옴
+        import numpy as np
+
+        ids = list(ids)
+        result = {}
+        conn = self._connect()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for question_id, blob in conn.execute(
+                f"SELECT question_id, signature FROM question_signatures WHERE question_id IN ({placeholders})", chunk
+            ):
+                result[question_id] = np.frombuffer(blob, dtype=np.uint32)
+        return result
+
+    def iter_all(self, batch_size=1000, **filters):
+        """조건에 맞는 문제를 ID 순으로 batch_size개씩 읽어 하나씩 yield (메모리 사용량 일정)"""
+        last_id = 0
+        while True:
+            questions = self.query(batch_size, last_id, **filters)
+            if not questions:
+                return
+            yield from questions
+            last_id = questions[-1]['id']
+
+    def ids(self, **filters):
+        """조건에 맞는 문제 ID 목록 (인덱스만 사용)"""
+        where, params = self._where(filters)
+        return [row[0] for row in self._connect().execute(f"SELECT id FROM questions{where}", params)]
+
+    def record_usage(self, ids, used_at=None):
+        """시험지에 출제된 문제 기록"""
+        used_at = used_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO exam_usage VALUES (?, ?)", [(i, used_at) for i in ids])
+
+    def recently_used_ids(self, days):
+        """최근 days일 안에 시험지에 출제된 문제 ID 집합"""
+        since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        return {row[0] for row in self._connect().execute(
+            "SELECT DISTINCT question_id FROM exam_usage WHERE used_at >= ?", (since,)
+        )}
+
+    def sample(self, n, **filters):
+        """조건에 맞는 문제 중 n개를 무작위 추출"""
+        ids = self.ids(**filters)
+        return self.get_many(random.sample(ids, min(n, len(ids))))
+
+    def distinct(self, column):
+        """컬럼(subject, type, difficulty)의 고유값 목록"""
+        if column not in FILTER_COLUMNS.values():
+            raise ValueError(f"지원하지 않는 컬럼입니다: {column}")
+        return [row[0] for row in self._connect().execute(
+            f"SELECT DISTINCT {column} FROM question_facets ORDER BY {column}"
+        )]
+
+    def value_counts(self, column):
+        """컬럼 값별 문제 수 (많은 순)"""
+        if column not in FILTER_COLUMNS.values():
+            raise ValueError(f"지원하지 않는 컬럼입니다: {column}")
+        return [tuple(row) for row in self._connect().execute(
+            f"SELECT {column}, SUM(count) AS n FROM question_facets GROUP BY {column} ORDER BY n DESC"
+        )]
+
+    def statistics(self, days=analytics.DEFAULT_DAYS):
+        """통계 대시보드용 집계 (과목 x 유형 x 난이도, 출처/제공업체, 최근 days일 생성일별)"""
+        return analytics.summary(self._connect(), days)
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """프로세스 전체에서 공유하는 문제 은행 반환"""
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            _bank = QuestionBank()
+    return _bank
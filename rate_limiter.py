@@ -0,0 +1,281 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from config import data_path
+
+# 제공업체별 기본 분당 요청 수(RPM)와 분당 토큰 수(TPM)
+# EXAM_BOT_<PROVIDER>_RPM / EXAM_BOT_<PROVIDER>_TPM 환경 변수나 설정 화면에서 변경할 수 있습니다.
+DEFAULT_LIMITS = {
+    'openai': {'rpm': 500, 'tpm': 200000},
+    'anthropic': {'rpm': 50, 'tpm': 40000},
+    'gemini': {'rpm': 60, 'tpm': 120000}
+}
+# max_tokens를 지정하지 않는 모델의 응답 토큰 추정값
+DEFAULT_COMPLETION_TOKENS = 2000
+# 대기열 확인 간격과, 이 시간 동안 확인하지 않은 대기 요청은 종료된 것으로 보고 제거
+POLL_INTERVAL = 0.2
+STALE_TICKET_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS limits (
+    provider TEXT PRIMARY KEY,
+    rpm INTEGER NOT NULL,
+    tpm INTEGER NOT NULL
+);
+-- (제공업체, API 키)별 요청/토큰 버킷 잔량
+CREATE TABLE IF NOT EXISTS buckets (
+    limiter_key TEXT PRIMARY KEY,
+    requests REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+-- 한도를 기다리는 요청 (세션/작업 단위로 번갈아 처리)
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    limiter_key TEXT NOT NULL,
+    requester TEXT NOT NULL,
+    tokens REAL NOT NULL,
+    enqueued_at REAL NOT NULL,
+    heartbeat REAL NOT NULL,
+    -- 요청자별로 번갈아 처리하는 순서 (대기열 위치는 (turn, id)가 더 작은 요청 수)
+    turn INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_key ON tickets(limiter_key, requester, id);
+CREATE INDEX IF NOT EXISTS idx_tickets_heartbeat ON tickets(heartbeat);
+-- 일별 사용량 (추정 토큰 기준, 실제 응답의 사용량으로 보정하지 않으므로 근삿값)
+CREATE TABLE IF NOT EXISTS spend (
+    limiter_key TEXT NOT NULL,
+    day TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    tokens INTEGER NOT NULL,
+    wait_seconds REAL NOT NULL,
+    PRIMARY KEY (limiter_key, day)
+) WITHOUT ROWID;
+"""
+# 처음 만든 뒤에 추가된 tickets 열과 그 열을 쓰는 인덱스 (기존 DB는 ALTER TABLE로 추가)
+ADDED_COLUMNS = {'turn': "INTEGER NOT NULL DEFAULT 0"}
+ADDED_INDEXES = "CREATE INDEX IF NOT EXISTS idx_tickets_turn ON tickets(limiter_key, turn, id);"
+
+
+def estimate_tokens(text):
+    """토크나이저 없이 대략적인 토큰 수 추정 (영문 약 4글자당 1토큰, 한글 등은 1글자당 1토큰)"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def estimate_request_tokens(prompt, max_tokens=None):
+    """프롬프트와 최대 응답 토큰으로 요청 1건의 토큰 사용량 추정"""
+    return estimate_tokens(prompt) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def limiter_key(provider, api_key):
+    """API 키 원문 대신 해시로 만든 버킷 키"""
+    digest = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+    return f"{provider}:{digest}"
+
+
+class RateLimiter:
+    """(제공업체, API 키)별 토큰 버킷 요청 한도 관리
+
+    버킷 상태와 대기열을 SQLite에 두고 BEGIN IMMEDIATE 트랜잭션으로 갱신하므로 여러 세션은
+    물론 여러 프로세스가 같은 키를 써도 한도를 함께 지킵니다. 한도를 넘는 요청은 실패시키지 않고
+    대기열에서 기다리며, 요청자(작업)마다 번갈아 차례가 돌아가므로 한 작업이 한도를 독차지하지 않습니다.
+
+    토큰 사용량은 프롬프트 길이와 최대 응답 토큰으로 추정한 값으로 차감하고 실제 응답의 사용량으로
+    보정하지 않으므로, 토큰 한도와 오늘 사용량은 근삿값입니다 (대개 실제보다 많이 잡힘).
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_path("rate_limits.db")
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        existing = {row['name'] for row in conn.execute("PRAGMA table_info(tickets)")}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE tickets ADD COLUMN {column} {definition}")
+        conn.executescript(ADDED_INDEXES)
+
+    def _connect(self):
+        # 스레드마다 별도 연결 사용, 트랜잭션은 직접 관리
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def limits(self, provider):
+        """제공업체의 RPM/TPM 한도"""
+        row = self._connect().execute("SELECT rpm, tpm FROM limits WHERE provider = ?", (provider,)).fetchone()
+        if row:
+            return {'rpm': row['rpm'], 'tpm': row['tpm']}
+        limits = dict(DEFAULT_LIMITS.get(provider, {'rpm': 60, 'tpm': 100000}))
+        for name in ('rpm', 'tpm'):
+            value = os.environ.get(f"EXAM_BOT_{provider.upper()}_{name.upper()}")
+            if value:
+                limits[name] = int(value)
+        return limits
+
+    def set_limits(self, provider, rpm, tpm):
+        """제공업체의 RPM/TPM 한도 변경 (모든 세션/프로세스에 적용)"""
+        self._connect().execute(
+            "INSERT INTO limits VALUES (?, ?, ?) ON CONFLICT(provider) DO UPDATE SET rpm = excluded.rpm, tpm = excluded.tpm",
+            (provider, int(rpm), int(tpm))
+        )
+
+    def _refill(self, conn, key, limits, now):
+        row = conn.execute("SELECT requests, tokens, updated_at FROM buckets WHERE limiter_key = ?", (key,)).fetchone()
+        if row is None:
+            return float(limits['rpm']), float(limits['tpm'])
+        elapsed = max(0.0, now - row['updated_at'])
+        requests = min(limits['rpm'], row['requests'] + elapsed * limits['rpm'] / 60)
+        tokens = min(limits['tpm'], row['tokens'] + elapsed * limits['tpm'] / 60)
+        return requests, tokens
+
+    def acquire(self, provider, api_key, tokens, requester=None, on_wait=None, should_abort=None):
+        """요청 1건과 tokens만큼의 한도를 확보할 때까지 대기하고 대기 시간(초) 반환
+
+        on_wait(대기 순서, 예상 대기 초)는 기다리는 동안 주기적으로 호출됩니다.
+        should_abort()가 예외를 발생시키면 대기열에서 빠지고 그 예외를 그대로 전달합니다.
+        """
+        key = limiter_key(provider, api_key)
+        limits = self.limits(provider)
+        # 한도보다 큰 요청은 영원히 기다리지 않도록 버킷 크기로 제한
+        tokens = min(float(tokens), float(limits['tpm']))
+        requester = requester or uuid.uuid4().hex
+        conn = self._connect()
+        started = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            turn = self._next_turn(conn, key, requester)
+            ticket = conn.execute(
+                "INSERT INTO tickets (limiter_key, requester, tokens, enqueued_at, heartbeat, turn) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, requester, tokens, started, started, turn)
+            ).lastrowid
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        granted = False
+        try:
+            while True:
+                if should_abort:
+                    should_abort()
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute("UPDATE tickets SET heartbeat = ? WHERE id = ?", (now, ticket))
+                    conn.execute("DELETE FROM tickets WHERE heartbeat < ?", (now - STALE_TICKET_SECONDS,))
+                    position = self._queue_position(conn, key, turn, ticket)
+                    wait = POLL_INTERVAL
+                    if position == 0:
+                        requests, available = self._refill(conn, key, limits, now)
+                        if requests >= 1 and available >= tokens:
+                            conn.execute(
+                                "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)",
+                                (key, requests - 1, available - tokens, now)
+                            )
+                            conn.execute("DELETE FROM tickets WHERE id = ?", (ticket,))
+                            waited = now - started
+                            self._record_spend(conn, key, tokens, waited)
+                            conn.execute("COMMIT")
+                            granted = True
+                            return waited
+                        wait = max(
+                            (1 - requests) * 60 / limits['rpm'] if requests < 1 else 0,
+                            (tokens - available) * 60 / limits['tpm'] if available < tokens else 0
+                        )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                if on_wait:
+                    on_wait(position, wait)
+                time.sleep(min(max(wait, 0.01), 1.0))
+        finally:
+            if not granted:
+                conn.execute("DELETE FROM tickets WHERE id = ?", (ticket,))
+
+    def _next_turn(self, conn, key, requester):
+        # 요청자마다 한 건씩 번갈아 처리하도록 이 요청자의 마지막 대기 요청 다음 차례
+        # (대기 중인 요청이 없는 요청자는 대기열 맨 앞 차례에 합류)
+        row = conn.execute(
+            "SELECT turn FROM tickets WHERE limiter_key = ? AND requester = ? ORDER BY id DESC LIMIT 1",
+            (key, requester)
+        ).fetchone()
+        if row is not None:
+            return row['turn'] + 1
+        return conn.execute("SELECT COALESCE(MIN(turn), 0) FROM tickets WHERE limiter_key = ?", (key,)).fetchone()[0]
+
+    def _queue_position(self, conn, key, turn, ticket):
+        # 차례가 앞선 요청 수 ((limiter_key, turn, id) 인덱스 범위 하나만 셈)
+        return conn.execute(
+            "SELECT COUNT(*) FROM tickets WHERE limiter_key = ? AND (turn, id) < (?, ?)",
+            (key, turn, ticket)
+        ).fetchone()[0]
+
+    def _record_spend(self, conn, key, tokens, waited):
+        conn.execute("""
+            INSERT INTO spend VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT(limiter_key, day) DO UPDATE SET
+                requests = requests + 1, tokens = tokens + excluded.tokens,
+                wait_seconds = wait_seconds + excluded.wait_seconds
+        """, (key, datetime.now().strftime("%Y-%m-%d"), int(tokens), waited))
+
+    def status(self):
+        """버킷 키별 현재 대기 요청 수, 남은 한도, 오늘 사용량 목록"""
+        conn = self._connect()
+        now = time.time()
+        today = datetime.now().strftime("%Y-%m-%d")
+        queued = {
+            row['limiter_key']: row['count'] for row in conn.execute(
+                "SELECT limiter_key, COUNT(*) AS count FROM tickets WHERE heartbeat >= ? GROUP BY limiter_key",
+                (now - STALE_TICKET_SECONDS,)
+            )
+        }
+        spend = {
+            row['limiter_key']: row for row in conn.execute("SELECT * FROM spend WHERE day = ?", (today,))
+        }
+        keys = {row['limiter_key'] for row in conn.execute("SELECT limiter_key FROM buckets")}
+        result = []
+        for key in sorted(keys | set(queued) | set(spend)):
+            provider = key.split(":")[0]
+            limits = self.limits(provider)
+            requests, tokens = self._refill(conn, key, limits, now)
+            today_spend = spend.get(key)
+            result.append({
+                'key': key,
+                'provider': provider,
+                'queued': queued.get(key, 0),
+                'requests_available': int(requests),
+                'tokens_available': int(tokens),
+                'rpm': limits['rpm'],
+                'tpm': limits['tpm'],
+                'requests_today': today_spend['requests'] if today_spend else 0,
+                'tokens_today': today_spend['tokens'] if today_spend else 0,
+                'wait_seconds_today': today_spend['wait_seconds'] if today_spend else 0.0
+            })
+        return result
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """프로세스 전체에서 공유하는 요청 한도 관리자 반환"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+    return _limiter
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from config import data_path
+
+# 기본 보관 기간(초)과 최대 저장 용량(바이트)
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+def make_cache_key(provider, model, prompt, params=None):
+    """제공업체, 모델, 프롬프트 전문, 샘플링 파라미터로 캐시 키 생성"""
+    payload = json.dumps(
+        {'provider': provider, 'model': model, 'prompt': prompt, 'params': params or {}},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """AI 응답을 압축해 SQLite에 저장하는 캐시 (TTL + 용량 기준 LRU 제거)"""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or data_path("response_cache.db")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+                CREATE TABLE IF NOT EXISTS stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0);
+            """)
+
+    def _connect(self):
+        # 스레드마다 별도 연결 사용 (Streamlit 세션/워커 스레드 간 공유 금지)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, conn, name):
+        conn.execute("UPDATE stats SET value = value + 1 WHERE name = ?", (name,))
+
+    def get(self, key):
+        """캐시된 응답 반환 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count(conn, 'misses')
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._count(conn, 'hits')
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def set(self, key, value):
+        """응답 저장 후 용량 초과 시 오래 사용되지 않은 항목부터 제거"""
+        blob = zlib.compress(value.encode('utf-8'))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        expired = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", expired)
+
+    def stats(self):
+        """적중/미적중 횟수와 저장 현황 반환"""
+        conn = self._connect()
+        counts = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        lookups = counts['hits'] + counts['misses']
+        return {
+            'hits': counts['hits'],
+            'misses': counts['misses'],
+            'hit_rate': counts['hits'] / lookups if lookups else 0.0,
+            'entries': entries,
+            'size': size
+        }
+
+    def clear(self):
+        """캐시 항목과 통계 초기화"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("UPDATE stats SET value = 0")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """프로세스 전체에서 공유하는 응답 캐시 반환"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,158 @@
+import json
+import re
+
+# 객체 경계 판단에 필요한 문자만 찾아서 건너뛰므로 본문(한글 등)은 문자 단위로 순회하지 않음
+_STRUCTURAL = re.compile(r'[{}\[\]"\\]')
+_STRING_OR_TRAILING_COMMA = re.compile(r'"(?:[^"\\]|\\.)*"|,\s*(?=[}\]])', re.DOTALL)
+_CLOSERS = {'}': '{', ']': '['}
+
+# 오류 보고에 포함할 원문 길이
+SNIPPET_LENGTH = 80
+
+
+def remove_trailing_commas(text):
+    """문자열 밖의 `,}` / `,]` 형태 후행 쉼표 제거"""
+    return _STRING_OR_TRAILING_COMMA.sub(
+        lambda m: m.group(0) if m.group(0).startswith('"') else '', text
+    )
+
+
+def load_object(text):
+    """JSON 객체 텍스트 파싱 (후행 쉼표, 문자열 안의 줄바꿈 허용). 실패 시 ValueError"""
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        return json.loads(remove_trailing_commas(text), strict=False)
+
+
+def expand_questions(obj):
+    """{"questions": [...]}처럼 문제 목록을 감싼 객체는 안쪽 문제 객체로 펼침"""
+    if 'question' not in obj:
+        for value in obj.values():
+            if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+                return value
+    return [obj]
+
+
+class JsonObjectStream:
+    """텍스트에서 최상위 JSON 객체를 완성되는 즉시 꺼내는 증분 파서
+
+    산문, 마크다운 코드 블록, 배열 괄호 등 객체 밖의 텍스트는 무시합니다. 깨진 객체는
+    errors에 위치와 함께 기록한 뒤 그 안쪽에서 다시 객체를 찾으므로, 일부가 손상된 응답에서도
+    온전한 문제는 모두 복구됩니다. 스트리밍 응답은 feed()로 조각마다 넣고 마지막에 close()를 호출합니다.
+    """
+
+    def __init__(self):
+        self.errors = []
+        self._buffer = ""
+        self._offset = 0        # 전체 텍스트 기준 _buffer[0]의 위치
+        self._start = 0         # 읽고 있는 객체의 시작 위치 (_buffer 기준)
+        self._pos = 0           # 다음에 읽을 위치 (_buffer 기준)
+        self._stack = []
+        self._in_string = False
+        self._skip_until = 0
+
+    def feed(self, text):
+        """텍스트 조각을 추가하고 새로 완성된 객체(dict) 목록 반환"""
+        if self._stack:
+            # 이미 처리한 앞부분은 버리고 읽던 객체부터 이어 붙임
+            drop = self._start
+            self._buffer = self._buffer[drop:] + text
+            self._offset += drop
+            self._start = 0
+            self._pos -= drop
+            self._skip_until = max(0, self._skip_until - drop)
+        else:
+            self._offset += len(self._buffer)
+            self._buffer = text
+            self._start = self._pos = 0
+        completed = []
+        self._scan(completed)
+        return completed
+
+    def close(self):
+        """입력 종료 처리. 끝나지 않은 객체는 잘린 것으로 기록하고 그 안의 온전한 객체를 반환"""
+        completed = []
+        while self._stack:
+            self._fail("객체가 닫히지 않았습니다 (응답 잘림 또는 따옴표 오류)", len(self._buffer))
+            self._scan(completed)
+        return completed
+
+    def _scan(self, completed):
+        buffer = self._buffer
+        while True:
+            if not self._stack:
+                start = buffer.find('{', self._pos)
+                if start == -1:
+                    self._pos = len(buffer)
+                    return
+                self._start = start
+                self._stack.append('{')
+                self._in_string = False
+                self._skip_until = 0
+                self._pos = start + 1
+
+            for match in _STRUCTURAL.finditer(buffer, self._pos):
+                pos = match.start()
+                if pos < self._skip_until:
+                    continue
+                char = match.group()
+                if self._in_string:
+                    if char == '\\':
+                        self._skip_until = pos + 2
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char in '{[':
+                    self._stack.append(char)
+                elif char == '\\':
+                    continue  # 문자열 밖의 역슬래시는 객체 경계와 무관
+                elif self._stack[-1] != _CLOSERS[char]:
+                    self._fail("괄호 짝이 맞지 않습니다", pos + 1)
+                    break
+                else:
+                    self._stack.pop()
+                    if not self._stack:
+                        self._emit(pos + 1, completed)
+                        break
+            else:
+                # 객체가 아직 끝나지 않음 - 다음 조각을 기다림
+                self._pos = len(buffer)
+                return
+
+    def _emit(self, end, completed):
+        try:
+            obj = load_object(self._buffer[self._start:end])
+        except ValueError as e:
+            self._fail(f"JSON 형식 오류: {e}", end)
+            return
+        if isinstance(obj, dict):
+            completed.extend(q for q in expand_questions(obj) if isinstance(q, dict))
+        self._pos = end
+
+    def _fail(self, reason, end):
+        # 깨진 구간을 기록하고, 시작 괄호 바로 다음부터 다시 읽어 안쪽의 온전한 객체를 찾음
+        self.errors.append({
+            'start': self._offset + self._start,
+            'end': self._offset + end,
+            'reason': reason,
+            'text': self._buffer[self._start:min(end, self._start + SNIPPET_LENGTH)]
+        })
+        self._stack = []
+        self._pos = self._start + 1
+
+
+def parse_json_objects(text):
+    """응답 전체에서 JSON 객체를 모두 찾아 (객체 목록, 파싱 실패 구간 목록) 반환"""
+    parser = JsonObjectStream()
+    objects = parser.feed(text)
+    objects.extend(parser.close())
+    return objects, parser.errors
+
+
+def describe_parse_errors(errors, limit=3):
+    """파싱 실패 구간 요약 문구"""
+    details = "; ".join(f"{e['start']}~{e['end']}번째 글자: {e['reason']}" for e in errors[:limit])
+    more = f" 외 {len(errors) - limit}개" if len(errors) > limit else ""
+    return f"응답 중 {len(errors)}개 구간을 파싱하지 못했습니다 ({details}{more})"
@@ -0,0 +1,452 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import data_path
+from rate_limiter import estimate_tokens
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력/프롬프트 캐시에서 읽은 입력) - 예상 비용 계산용
+# (Anthropic 캐시 저장 할증은 첫 요청에만 붙으므로 계산에서 제외)
+MODEL_PRICES = {
+    'gpt-3.5-turbo': (0.50, 1.50, 0.50),
+    'gpt-4o-mini': (0.15, 0.60, 0.075),
+    'gpt-4o': (2.50, 10.00, 1.25),
+    'claude-3-sonnet-20240229': (3.00, 15.00, 0.30),
+    'claude-3-haiku-20240307': (0.25, 1.25, 0.03),
+    'gemini-pro': (0.50, 1.50, 0.50)
+}
+# 이 기간(일)이 지난 호출 기록은 삭제 (누적 합계는 유지)
+RETENTION_DAYS = int(os.environ.get("EXAM_BOT_METRICS_DAYS", "30"))
+# 설정하면 앱이 이 포트에서 Prometheus 지표를 제공
+# (python telemetry.py --port 9108 로 앱과 별도로 실행할 수도 있음)
+EXPORTER_PORT = os.environ.get("EXAM_BOT_METRICS_PORT")
+PERCENTILES = (50, 95, 99)
+# 처음 만든 뒤에 추가된 열 {테이블: {열: 정의}} (기존 DB는 ALTER TABLE로 추가)
+ADDED_COLUMNS = {
+    'calls': {'cached_tokens': "INTEGER NOT NULL DEFAULT 0"},
+    'call_totals': {'cached_tokens': "INTEGER NOT NULL DEFAULT 0"}
+}
+# 호출 결과
+OK = "ok"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT,
+    kind TEXT NOT NULL,
+    requester TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    queue_ms REAL,
+    ttfb_ms REAL,
+    latency_ms REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    tokens_estimated INTEGER NOT NULL DEFAULT 0,
+    retries INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL,
+    -- prompt_tokens 중 제공업체 프롬프트 캐시에서 읽은 토큰
+    cached_tokens INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_calls_ts ON calls(ts);
+CREATE INDEX IF NOT EXISTS idx_calls_provider ON calls(provider, ts);
+
+-- 응답 묶음별 파싱 결과 (복구한 문제 수와 파싱 실패 구간 수)
+CREATE TABLE IF NOT EXISTS parses (
+    ts REAL NOT NULL,
+    provider TEXT NOT NULL,
+    questions INTEGER NOT NULL,
+    errors INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_parses_ts ON parses(ts);
+
+-- 누적 합계 (오래된 기록을 지워도 Prometheus 카운터가 줄지 않도록 트리거로 증분 갱신)
+CREATE TABLE IF NOT EXISTS call_totals (
+    provider TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    retries INTEGER NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    latency_ms REAL NOT NULL,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (provider, kind, status)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS parse_totals (
+    provider TEXT PRIMARY KEY,
+    chunks INTEGER NOT NULL,
+    questions INTEGER NOT NULL,
+    errors INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_parse_totals AFTER INSERT ON parses BEGIN
+    INSERT INTO parse_totals VALUES (NEW.provider, 1, NEW.questions, NEW.errors)
+    ON CONFLICT(provider) DO UPDATE SET
+        chunks = chunks + 1, questions = questions + excluded.questions, errors = errors + excluded.errors;
+END;
+"""
+# call_totals 갱신 트리거 (열을 추가한 기존 DB에서는 새 열도 채우도록 다시 만듦)
+CALL_TOTALS_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS trg_call_totals AFTER INSERT ON calls BEGIN
+    INSERT INTO call_totals (
+        provider, kind, status, calls, retries, prompt_tokens, completion_tokens, cost_usd, latency_ms, cached_tokens
+    ) VALUES (
+        NEW.provider, NEW.kind, NEW.status, 1, NEW.retries, COALESCE(NEW.prompt_tokens, 0),
+        COALESCE(NEW.completion_tokens, 0), COALESCE(NEW.cost_usd, 0), COALESCE(NEW.latency_ms, 0),
+        COALESCE(NEW.cached_tokens, 0)
+    )
+    ON CONFLICT(provider, kind, status) DO UPDATE SET
+        calls = calls + 1, retries = retries + excluded.retries,
+        prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+        completion_tokens = completion_tokens + excluded.completion_tokens,
+        cost_usd = cost_usd + excluded.cost_usd, latency_ms = latency_ms + excluded.latency_ms,
+        cached_tokens = cached_tokens + excluded.cached_tokens;
+END;
+"""
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens=0):
+    """토큰 수로 예상 비용(USD) 계산 (가격을 모르는 모델은 None, cached_tokens는 prompt_tokens 중 캐시에서 읽은 토큰)"""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    cached_tokens = min(cached_tokens or 0, prompt_tokens)
+    return ((prompt_tokens - cached_tokens) * prices[0] + cached_tokens * prices[2]
+            + completion_tokens * prices[1]) / 1_000_000
+
+
+_current = threading.local()
+
+
+def current_call():
+    """현재 스레드에서 진행 중인 제공업체 호출 기록 (없으면 None)"""
+    return getattr(_current, 'call', None)
+
+
+def report_usage(prompt_tokens=None, completion_tokens=None, retries=None, cached_tokens=None):
+    """제공업체 응답의 실제 토큰 사용량과 재시도 횟수를 현재 호출 기록에 반영 (호출 기록이 없으면 무시)
+
+    prompt_tokens는 캐시에서 읽은 토큰을 포함한 전체 입력 토큰, cached_tokens는 그중 캐시에서 읽은 토큰입니다.
+    """
+    call = current_call()
+    if call is None:
+        return
+    if prompt_tokens is not None:
+        call.prompt_tokens = prompt_tokens
+    if cached_tokens is not None:
+        call.cached_tokens = cached_tokens
+    if completion_tokens is not None:
+        call.completion_tokens = completion_tokens
+    if retries:
+        call.retries += retries
+
+
+class CallRecord:
+    """제공업체 호출 1건의 계측 값
+
+    Router가 호출마다 만들고, 제공업체 함수는 bound() 안에서 실행되므로 report_usage()로
+    실제 토큰 수와 재시도 횟수를 알릴 수 있습니다. 알리지 않은 토큰 수는 텍스트 길이로 추정합니다.
+    """
+
+    def __init__(self, provider, model, kind, prompt, requester=None):
+        self.provider = provider
+        self.model = model
+        self.kind = kind
+        self.requester = requester
+        self.prompt = prompt
+        self.started = time.monotonic()
+        self.sent_at = None
+        self.first_byte_at = None
+        self.finished_at = None
+        self.status = None
+        self.error = None
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.cached_tokens = 0
+        self.retries = 0
+        self._completion_chars = []
+
+    @contextmanager
+    def bound(self):
+        """이 블록 안에서 current_call()이 이 기록을 반환"""
+        previous = current_call()
+        _current.call = self
+        try:
+            yield self
+        finally:
+            _current.call = previous
+
+    def mark_sent(self):
+        """대기(요청 한도 등)가 끝나고 실제 요청을 보낸 시점"""
+        self.sent_at = time.monotonic()
+
+    def mark_piece(self, piece):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+        self._completion_chars.append(piece)
+
+    def finish(self, status, error=None):
+        self.finished_at = time.monotonic()
+        self.status = status
+        self.error = str(error) if error is not None else None
+
+    @property
+    def latency(self):
+        """요청을 보낸 뒤 응답이 끝날 때까지의 시간 (초, 대기열 시간 제외)"""
+        if self.sent_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.sent_at
+
+    def row(self):
+        sent = self.sent_at or self.finished_at
+        estimated = self.prompt_tokens is None or self.completion_tokens is None
+        prompt_tokens = self.prompt_tokens if self.prompt_tokens is not None else estimate_tokens(self.prompt)
+        completion_tokens = self.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens("".join(self._completion_chars))
+        return (
+            time.time(), self.provider, self.model, self.kind, self.requester, self.status, self.error,
+            (sent - self.started) * 1000,
+            (self.first_byte_at - sent) * 1000 if self.first_byte_at is not None else None,
+            self.latency * 1000 if self.latency is not None else None,
+            prompt_tokens, completion_tokens, int(estimated), self.retries,
+            estimate_cost(self.model, prompt_tokens, completion_tokens, self.cached_tokens), self.cached_tokens
+        )
+
+
+def _percentiles(values):
+    if not values:
+        return {p: None for p in PERCENTILES}
+    # 제공업체 클라이언트가 report_usage를 쓰려고 이 모듈을 가져올 때 numpy까지 읽지 않도록 여기서 가져옴
+    import numpy as np
+
+    return dict(zip(PERCENTILES, np.percentile(np.array(values, dtype=float), PERCENTILES).tolist()))
+
+
+class MetricsStore:
+    """SQLite(WAL) 기반 호출 지표 저장소 (여러 세션/프로세스 공유)
+
+    호출마다 대기열 시간(요청 한도 대기), 첫 응답까지의 시간(TTFB), 전체 응답 시간, 입력/출력 토큰,
+    재시도 횟수, 예상 비용을 한 행으로 기록하고, 관리자 화면용 백분위 요약과 Prometheus 텍스트를 만듭니다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_path("metrics.db")
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            migrated = False
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for column, definition in columns.items():
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                        migrated = True
+            if migrated:
+                conn.execute("DROP TRIGGER IF EXISTS trg_call_totals")
+            conn.execute(CALL_TOTALS_TRIGGER)
+            cutoff = time.time() - RETENTION_DAYS * 86400
+            conn.execute("DELETE FROM calls WHERE ts < ?", (cutoff,))
+            conn.execute("DELETE FROM parses WHERE ts < ?", (cutoff,))
+
+    def _connect(self):
+        # 스레드마다 별도 연결 사용
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record_call(self, call):
+        """끝난 호출 1건 저장"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO calls (ts, provider, model, kind, requester, status, error, queue_ms, ttfb_ms, latency_ms, "
+                "prompt_tokens, completion_tokens, tokens_estimated, retries, cost_usd, cached_tokens) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                call.row()
+            )
+
+    def record_parse(self, provider, questions, errors):
+        """응답 묶음 1개의 파싱 결과 저장 (복구한 문제 수, 파싱 실패 구간 수)"""
+        with self._connect() as conn:
+            conn.execute("INSERT INTO parses VALUES (?, ?, ?, ?)", (time.time(), provider, questions, errors))
+
+    def summary(self, since_seconds=86400):
+        """최근 since_seconds초 동안의 제공업체별 요약 (대기/TTFB/전체 응답 시간 백분위 포함)"""
+        conn = self._connect()
+        since = time.time() - since_seconds
+        rows = {}
+        for row in conn.execute(
+            "SELECT provider, status, queue_ms, ttfb_ms, latency_ms, prompt_tokens, completion_tokens, cached_tokens, "
+            "retries, cost_usd FROM calls WHERE ts >= ? AND status != ?", (since, CANCELLED)
+        ):
+            item = rows.setdefault(row['provider'], {
+                'calls': 0, 'errors': 0, 'retries': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0,
+                'cost_usd': 0.0, 'queue': [], 'ttfb': [], 'latency': []
+            })
+            item['calls'] += 1
+            item['errors'] += row['status'] == ERROR
+            item['retries'] += row['retries']
+            item['prompt_tokens'] += row['prompt_tokens'] or 0
+            item['completion_tokens'] += row['completion_tokens'] or 0
+            item['cached_tokens'] += row['cached_tokens'] or 0
+            item['cost_usd'] += row['cost_usd'] or 0.0
+            item['queue'].append(row['queue_ms'])
+            if row['status'] == OK:
+                item['ttfb'].append(row['ttfb_ms'])
+                item['latency'].append(row['latency_ms'])
+        parses = {
+            row['provider']: (row['questions'], row['errors']) for row in conn.execute(
+                "SELECT provider, SUM(questions) AS questions, SUM(errors) AS errors FROM parses "
+                "WHERE ts >= ? GROUP BY provider", (since,)
+            )
+        }
+        result = []
+        for provider in sorted(set(rows) | set(parses)):
+            item = rows.get(provider, {'calls': 0, 'errors': 0, 'retries': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+                                       'cached_tokens': 0, 'cost_usd': 0.0, 'queue': [], 'ttfb': [], 'latency': []})
+            questions, errors = parses.get(provider, (0, 0))
+            result.append({
+                'provider': provider,
+                'calls': item['calls'],
+                'errors': item['errors'],
+                'error_rate': item['errors'] / item['calls'] if item['calls'] else 0.0,
+                'retries': item['retries'],
+                'prompt_tokens': item['prompt_tokens'],
+                'completion_tokens': item['completion_tokens'],
+                'cached_tokens': item['cached_tokens'],
+                'cost_usd': item['cost_usd'],
+                'parse_success_rate': questions / (questions + errors) if questions + errors else None,
+                # 파싱으로 복구한 문제 1개당 입력+출력 토큰 (요청 묶음 크기/혼합 유형/캐시 효과 비교용)
+                'tokens_per_question': (
+                    (item['prompt_tokens'] + item['completion_tokens']) / questions if questions else None
+                ),
+                'queue_ms': _percentiles([v for v in item['queue'] if v is not None]),
+                'ttfb_ms': _percentiles([v for v in item['ttfb'] if v is not None]),
+                'latency_ms': _percentiles([v for v in item['latency'] if v is not None])
+            })
+        return result
+
+    def recent_errors(self, limit=20):
+        """최근 실패한 호출 목록"""
+        return [dict(row) for row in self._connect().execute(
+            "SELECT ts, provider, model, kind, requester, error, retries FROM calls "
+            "WHERE status = ? ORDER BY id DESC LIMIT ?", (ERROR, limit)
+        )]
+
+    def prometheus_text(self, window_seconds=3600):
+        """Prometheus 텍스트 형식 지표 (누적 카운터와 최근 window_seconds초의 백분위)"""
+        conn = self._connect()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        totals = conn.execute("SELECT * FROM call_totals ORDER BY provider, kind, status").fetchall()
+
+        def by_call(column, scale=1):
+            return [
+                ({'provider': row['provider'], 'kind': row['kind'], 'status': row['status']}, row[column] * scale)
+                for row in totals
+            ]
+
+        metric("exam_bot_provider_calls_total", "counter", "AI 제공업체 호출 수", by_call('calls'))
+        metric("exam_bot_provider_retries_total", "counter", "AI 제공업체 재시도 수", by_call('retries'))
+        metric("exam_bot_provider_latency_seconds_total", "counter", "AI 제공업체 응답 시간 합계",
+               by_call('latency_ms', 0.001))
+        metric("exam_bot_provider_tokens_total", "counter", "입력/출력 토큰 수", [
+            ({'provider': row['provider'], 'kind': row['kind'], 'type': token_type}, row[f"{token_type}_tokens"])
+            for row in totals for token_type in ('prompt', 'completion')
+        ])
+        metric("exam_bot_provider_cached_tokens_total", "counter", "입력 토큰 중 프롬프트 캐시에서 읽은 토큰 수",
+               by_call('cached_tokens'))
+        metric("exam_bot_provider_cost_usd_total", "counter", "예상 비용 (USD)", by_call('cost_usd'))
+        parse_totals = conn.execute("SELECT * FROM parse_totals ORDER BY provider").fetchall()
+        metric("exam_bot_parse_questions_total", "counter", "응답에서 복구한 문제 수",
+               [({'provider': row['provider']}, row['questions']) for row in parse_totals])
+        metric("exam_bot_parse_errors_total", "counter", "파싱하지 못한 응답 구간 수",
+               [({'provider': row['provider']}, row['errors']) for row in parse_totals])
+
+        summary = self.summary(window_seconds)
+        for column, name, help_text in (
+            ('queue_ms', "exam_bot_provider_queue_seconds", "요청 한도 대기 시간"),
+            ('ttfb_ms', "exam_bot_provider_ttfb_seconds", "첫 응답까지의 시간"),
+            ('latency_ms', "exam_bot_provider_latency_seconds", "전체 응답 시간")
+        ):
+            metric(name, "gauge", f"최근 {window_seconds}초 {help_text} 백분위", [
+                ({'provider': row['provider'], 'quantile': f"{p / 100:g}"}, row[column][p] / 1000)
+                for row in summary for p in PERCENTILES if row[column][p] is not None
+            ])
+        return "\n".join(lines) + "\n"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store():
+    """프로세스 전체에서 공유하는 지표 저장소 반환"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetricsStore()
+    return _store
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics_store().prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_exporter(port, host="0.0.0.0"):
+    """/metrics 경로로 Prometheus 지표를 제공하는 HTTP 서버를 백그라운드 스레드에서 시작"""
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-exporter").start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prometheus 지표 제공 서버")
+    parser.add_argument('--port', type=int, default=int(EXPORTER_PORT or 9108))
+    parser.add_argument('--host', default="0.0.0.0")
+    args = parser.parse_args()
+    server = start_exporter(args.port, args.host)
+    print(f"http://{args.host}:{server.server_address[1]}/metrics")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,39 @@
 import streamlit as st
-import json
-import random
-import requests
+import os
+import time
 from datetime import datetime
-import openai
-import anthropic
 from typing import List, Dict
 
+from analytics import SOURCE_AI, SOURCE_MANUAL, source_label
+from bank_io import EXPORT_FORMATS, export_to_file, import_records, iter_records
+from core import (
+    GENERATION_TYPES, MIXED_TYPE, PROVIDERS, ROUTING_MODES, build_questions, create_question, question_type_of,
+    run_generation_job
+)
+from dedup import DEFAULT_THRESHOLD
+from exam_builder import (
+    answer_sheet_csv,
+    assemble_exams,
+    average_difficulty,
+    make_blueprint,
+    make_variants,
+    variant_label,
+    variant_questions
+)
+from exam_render import RENDER_FORMATS, render_exams_zip
+from generation import DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY
+from grading import (
+    REVIEW_DISCRIMINATION, REVIEW_P_RANGE,
+    answer_key_json, grade, item_statistics, load_answer_key, load_responses, make_answer_key, needs_review,
+    score_distribution, score_summary, scores_csv
+)
+from jobs import FINISHED_STATUSES, STATUS_LABELS, get_job_manager
+from providers import get_provider_stats
+from question_bank import get_question_bank
+from rate_limiter import get_rate_limiter
+from response_cache import get_response_cache
+from telemetry import EXPORTER_PORT, PERCENTILES, get_metrics_store, start_exporter
+
 # 페이지 설정
 st.set_page_config(
     page_title="AI 시험문제 출제 봇",
@@ -15,153 +42,644 @@ st.set_page_config(
 )
 
 # 세션 상태 초기화
-if 'questions' not in st.session_state:
-    st.session_state.questions = []
 if 'current_exam' not in st.session_state:
     st.session_state.current_exam = None
+if 'exam_sets' not in st.session_state:
+    st.session_state.exam_sets = []
+if 'exam_variants' not in st.session_state:
+    st.session_state.exam_variants = None
+if 'print_file' not in st.session_state:
+    st.session_state.print_file = None
 if 'api_keys' not in st.session_state:
     st.session_state.api_keys = {}
+if 'export_file' not in st.session_state:
+    st.session_state.export_file = None
+if 'dedup_threshold' not in st.session_state:
+    st.session_state.dedup_threshold = DEFAULT_THRESHOLD
+if 'active_job' not in st.session_state:
+    st.session_state.active_job = None
+if 'grading_result' not in st.session_state:
+    st.session_state.grading_result = None
+
+def render_question_preview(number, q_data, question_type):
+    """생성된 문제 미리보기 표시 (혼합 유형은 문제마다 유형 판별)"""
+    question_type = question_type_of(q_data, question_type)
+    with st.expander(f"문제 {number} 미리보기"):
+        st.write(f"**문제:** {q_data.get('question', '')}")
+        
+        if question_type == '객관식':
+            options = q_data.get('options', [])
+            for j, option in enumerate(options):
+                st.write(f"{['①', '②', '③', '④'][j]} {option}")
+            st.write(f"**정답:** {q_data.get('correct_answer', '')}")
+        
+        elif question_type == 'O/X':
+            st.write(f"**정답:** {q_data.get('correct_answer', '')}")
+        
+        else:  # 주관식
+            st.write(f"**정답:** {q_data.get('answer', '')}")
+        
+        if q_data.get('explanation'):
+            st.write(f"**해설:** {q_data.get('explanation', '')}")
 
-def create_question(question_type, subject, difficulty, question_text, options=None, answer=None, explanation=None):
-    """문제 생성 함수"""
-    question = {
-        'id': len(st.session_state.questions) + 1,
-        'type': question_type,
-        'subject': subject,
-        'difficulty': difficulty,
-        'question': question_text,
-        'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    if question_type == '객관식':
-        question['options'] = options
-        question['correct_answer'] = answer
-    elif question_type == '주관식':
-        question['answer'] = answer
-    elif question_type == 'O/X':
-        question['correct_answer'] = answer
-    
-    if explanation:
-        question['explanation'] = explanation
-    
-    return question
+def render_duplicate_report(report, threshold):
+    """유사 중복 문제 보고서 표시"""
+    st.warning(f"유사 중복 의심 문제 {len(report)}개 (유사도 {threshold:.0%} 이상)")
+    st.dataframe(
+        [
+            {
+                '번호': item['index'] + 1,
+                '문제': item['question'],
+                '유사 문제': (
+                    f"문제 은행 {item['duplicate_of']}번" if isinstance(item['duplicate_of'], int)
+                    else f"이번 목록 {int(item['duplicate_of'].split(':')[1]) + 1}번"
+                ),
+                '유사 문제 내용': item['duplicate_question'],
+                '유사도': f"{item['similarity']:.0%}"
+            }
+            for item in report
+        ],
+        use_container_width=True
+    )
 
-def generate_with_openai(api_key, prompt):
-    """OpenAI API로 문제 생성"""
-    try:
-        client = openai.OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "당신은 전문적인 시험 문제 출제자입니다. 요청된 형식에 맞춰 정확하고 교육적인 문제를 생성해주세요."},
-                {"role": "user", "content": prompt}
+def save_generated_questions(job, questions_data, skip_indexes=()):
+    """생성 작업 결과를 문제 은행에 저장하고 저장한 문제 수 반환"""
+    new_questions = build_questions(job['params'], questions_data, skip_indexes)
+    get_question_bank().add_many(new_questions)
+    get_job_manager().mark_saved(job['id'])
+    return len(new_questions)
+
+@st.fragment(run_every=1)
+def render_job_progress(job_id):
+    """실행 중인 작업의 진행 상황 (1초마다 이 부분만 다시 그림)"""
+    job = get_job_manager().get(job_id)
+    if job is None or job['status'] in FINISHED_STATUSES:
+        # 작업이 끝나면 전체 화면을 다시 그려 결과와 저장 버튼 표시
+        st.rerun()
+    
+    st.progress(job['progress'], text=job['message'] or STATUS_LABELS[job['status']])
+    questions_data = get_job_manager().items(job_id)
+    for i, q_data in enumerate(questions_data, 1):
+        render_question_preview(i, q_data, job['params']['question_type'])
+
+def render_generation_job(job_id):
+    """생성 작업 상태와 결과 표시 (재실행과 관계없이 작업 기록에서 다시 그림)"""
+    jobs = get_job_manager()
+    job = jobs.get(job_id)
+    params = job['params']
+    question_type = params['question_type']
+    
+    st.markdown("---")
+    st.subheader(f"작업 #{job['id']}: {job['title']}")
+    st.caption(f"{params['ai_provider']} · 상태: {STATUS_LABELS[job['status']]} · 요청 시각: {job['created_at']}")
+    
+    if job['status'] not in FINISHED_STATUSES:
+        if st.button("생성 취소", key=f"cancel_{job_id}"):
+            if jobs.cancel(job_id):
+                st.info("취소를 요청했습니다. 진행 중인 요청이 끝나면 작업이 중단됩니다.")
+            else:
+                st.warning("이미 끝난 작업입니다.")
+        render_job_progress(job_id)
+        return
+    
+    if job['error']:
+        st.error(f"작업 실패: {job['error']}")
+    
+    result = job['result'] or {}
+    for warning in result.get('warnings', []):
+        st.warning(warning)
+    if result:
+        summary = [
+            f"응답 캐시 적중 {result['cache_hits']}회 / 미적중 {result['cache_misses']}회",
+            f"요청 한도 대기 {result.get('rate_limit_wait', 0):.1f}초"
+        ]
+        # 실제로 응답한 제공업체별 요청 수 (장애 조치/헤징 사용 시 여러 제공업체)
+        summary += [f"{name} 응답 {count}회" for name, count in result.get('providers', {}).items()]
+        summary.append(f"첫 문제 {result['first_question_at'] or 0:.1f}초 / 전체 {result['elapsed']:.1f}초")
+        st.caption(" · ".join(summary))
+    
+    questions_data = jobs.items(job_id)
+    if not questions_data:
+        return
+    
+    for i, q_data in enumerate(questions_data, 1):
+        render_question_preview(i, q_data, question_type)
+    
+    if job['saved_at']:
+        st.success(f"{len(questions_data)}개의 문제가 생성되어 {job['saved_at']}에 문제 은행에 저장되었습니다.")
+    else:
+        st.success(f"{len(questions_data)}개의 문제가 생성되었습니다!")
+        
+        duplicate_report = result.get('duplicates', [])
+        if duplicate_report:
+            render_duplicate_report(duplicate_report, params['dedup_threshold'])
+        skip_duplicates = st.checkbox("유사 중복 문제는 저장하지 않기", value=True, key=f"skip_duplicates_{job_id}")
+        
+        # 일괄 저장 버튼 (작업 결과가 저장되어 있으므로 재실행 후에도 동작)
+        if st.button("모든 문제 저장", key=f"save_{job_id}"):
+            skip_indexes = {item['index'] for item in duplicate_report} if skip_duplicates else set()
+            saved = save_generated_questions(job, questions_data, skip_indexes)
+            st.success(f"{saved}개의 문제가 저장되었습니다!")
+            st.rerun()
+    
+    if result.get('responses'):
+        # 원본 응답 보기
+        with st.expander("AI 원본 응답 보기"):
+            st.code("\n\n".join(result['responses']))
+
+def render_job_list():
+    """백그라운드 작업 목록 표 (실행 중인 작업이 있으면 2초마다 갱신)"""
+    jobs = get_job_manager()
+    
+    @st.fragment(run_every=2 if jobs.has_active() else None)
+    def job_table():
+        job_list = jobs.list(limit=100)
+        if not job_list:
+            st.info("아직 실행한 작업이 없습니다.")
+            return
+        st.dataframe(
+            [
+                {
+                    'ID': job['id'],
+                    '작업': job['title'],
+                    '상태': STATUS_LABELS[job['status']],
+                    '진행률': job['progress'],
+                    '문제 수': job['item_count'],
+                    '저장': "저장됨" if job['saved_at'] else "",
+                    '요청 시각': job['created_at'],
+                    '완료 시각': job['finished_at'] or "",
+                    '메시지': job['error'] or job['message'] or ""
+                }
+                for job in job_list
             ],
-            temperature=0.7
+            column_config={'진행률': st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)},
+            hide_index=True
         )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"OpenAI API 오류: {str(e)}")
-        return None
+    
+    job_table()
 
-def generate_with_anthropic(api_key, prompt):
-    """Anthropic Claude API로 문제 생성"""
-    try:
-        client = anthropic.Anthropic(api_key=api_key)
-        response = client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=2000,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.content[0].text
-    except Exception as e:
-        st.error(f"Anthropic API 오류: {str(e)}")
-        return None
+def render_exam_preview(exam):
+    """시험지 미리보기와 정답지 표시"""
+    selected = exam['questions']
+    
+    st.markdown("---")
+    st.subheader("📄 시험지 미리보기")
+    
+    st.markdown(f"""
+    # {exam['title']}
+    **과목:** {exam['subject']}  
+    **시험시간:** {exam['time']}분  
+    **총 문항:** {len(selected)}문제  
+    **작성일:** {datetime.strptime(exam['created_at'], "%Y-%m-%d %H:%M:%S").strftime("%Y년 %m월 %d일")}  
+    **평균 난이도:** {average_difficulty(selected):.1f} (쉬움 1 ~ 어려움 3)
+    
+    ---
+    """)
+    
+    for i, question in enumerate(selected, 1):
+        st.markdown(f"**{i}. {question['question']}**")
+        
+        if question['type'] == '객관식':
+            for j, option in enumerate(question['options']):
+                if option:
+                    st.markdown(f"　{['①', '②', '③', '④'][j]} {option}")
+        
+        st.markdown("")
+    
+    # 정답지
+    with st.expander("정답지 보기"):
+        for i, question in enumerate(selected, 1):
+            if question['type'] == '객관식':
+                st.write(f"{i}. {question['correct_answer']}")
+            elif question['type'] == 'O/X':
+                st.write(f"{i}. {question['correct_answer']}")
+            else:
+                st.write(f"{i}. {question['answer']}")
 
-def generate_with_gemini(api_key, prompt):
-    """Google Gemini API로 문제 생성"""
-    try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={api_key}"
-        headers = {'Content-Type': 'application/json'}
-        data = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "temperature": 0.7,
-                "maxOutputTokens": 2000
-            }
+def render_variant_builder(exam):
+    """문제 순서와 선택지를 섞은 여러 형 문제지 생성 및 정답표 표시"""
+    st.markdown("---")
+    st.subheader("🔀 여러 형 문제지 만들기")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        num_variants = st.number_input("형 수", min_value=2, max_value=500, value=4)
+    with col2:
+        seed = st.number_input(
+            "시드",
+            min_value=0,
+            max_value=2 ** 31 - 1,
+            value=0,
+            help="같은 시드로 만들면 항상 같은 문제지가 나옵니다. 0이면 무작위로 정합니다."
+        )
+    with col3:
+        shuffle_options = st.checkbox("객관식 선택지 섞기", value=True)
+    
+    if st.button("여러 형 만들기"):
+        st.session_state.exam_variants = {
+            'exam': exam,
+            'variants': make_variants(exam['questions'], num_variants, seed or None, shuffle_options)
         }
+    
+    batch = st.session_state.exam_variants
+    if not batch or batch['exam'] != exam:
+        return
+    
+    variants = batch['variants']
+    labels = [variant_label(i) for i in range(len(variants['order']))]
+    st.caption(f"시드 {variants['seed']}로 {len(labels)}개 형을 만들었습니다. 같은 시드로 다시 만들 수 있습니다.")
+    
+    answers = variants['answers']
+    st.dataframe(
+        {'형': labels, **{f"{i + 1}번": list(answers[:, i]) for i in range(answers.shape[1])}},
+        hide_index=True
+    )
+    st.download_button(
+        label="전체 정답표 다운로드 (CSV)",
+        data=answer_sheet_csv(variants).encode('utf-8-sig'),
+        file_name=f"{exam['title']}_정답표_{variants['seed']}.csv",
+        mime="text/csv"
+    )
+    
+    index = st.selectbox("미리볼 형", range(len(labels)), format_func=lambda i: labels[i])
+    render_exam_preview(dict(
+        exam,
+        title=f"{exam['title']} {labels[index]}",
+        questions=variant_questions(exam['questions'], variants, index)
+    ))
+
+def render_print_export(exam, exam_sets):
+    """인쇄용 PDF/DOCX 시험지와 정답지를 zip 파일로 만들어 다운로드"""
+    st.markdown("---")
+    st.subheader("🖨️ 인쇄용 파일 만들기")
+    
+    if not RENDER_FORMATS:
+        st.info("PDF/DOCX 출력을 사용하려면 reportlab, python-docx 패키지를 설치해주세요.")
+        return
+    
+    targets = ["미리보기 중인 시험지"]
+    if len(exam_sets) > 1:
+        targets.append("생성한 모든 세트")
+    batch = st.session_state.exam_variants
+    if batch and batch['exam'] == exam:
+        targets.append("여러 형 전체")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        target = st.radio("대상", targets)
+        include_answers = st.checkbox("정답지 포함", value=True)
+    with col2:
+        formats = st.multiselect("형식", list(RENDER_FORMATS), default=list(RENDER_FORMATS)[:1])
+    
+    if st.button("인쇄용 파일 만들기", disabled=not formats):
+        if target == "생성한 모든 세트":
+            exams = exam_sets
+        elif target == "여러 형 전체":
+            variants = batch['variants']
+            exams = [
+                dict(exam, title=f"{exam['title']} {variant_label(i)}",
+                     questions=variant_questions(exam['questions'], variants, i))
+                for i in range(len(variants['order']))
+            ]
+        else:
+            exams = [exam]
         
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        result = response.json()
-        return result['candidates'][0]['content']['parts'][0]['text']
-    except Exception as e:
-        st.error(f"Gemini API 오류: {str(e)}")
-        return None
+        progress_bar = st.progress(0, text="시험지를 렌더링하는 중...")
+        
+        def on_progress(done, total):
+            progress_bar.progress(done / total, text=f"시험지 렌더링 중... ({done}/{total})")
+        
+        try:
+            st.session_state.print_file = render_exams_zip(exams, formats, include_answers, on_progress=on_progress)
+            st.success(f"시험지 {len(exams)}부를 만들었습니다.")
+        except Exception as e:
+            st.error(f"인쇄용 파일을 만들지 못했습니다: {str(e)}")
+    
+    path = st.session_state.print_file
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            st.download_button(
+                label="인쇄용 파일 다운로드 (zip)",
+                data=f,
+                file_name=os.path.basename(path),
+                mime="application/zip"
+            )
 
-def create_prompt(question_type, subject, difficulty, num_questions, additional_info=""):
-    """프롬프트 생성"""
-    base_prompt = f"""
-다음 조건에 맞는 {question_type} 문제 {num_questions}개를 생성해주세요:
+def render_grading(bank):
+    """답안 파일을 한 번에 채점하고 문항 통계를 문제 은행에 기록"""
+    exam = st.session_state.current_exam
+    sources = (["현재 시험지"] if exam else []) + ["정답 키 파일"]
+    source = st.radio("정답 키", sources, horizontal=True)
+    
+    if source == "현재 시험지":
+        batch = st.session_state.exam_variants
+        variants = batch['variants'] if batch and batch['exam'] == exam else None
+        key = make_answer_key(exam, variants)
+        st.caption(f"{exam['title']} · {len(key['question_ids'])}문항 · {', '.join(key['labels'])}")
+        st.download_button(
+            label="정답 키 다운로드 (JSON)",
+            data=answer_key_json(key).encode('utf-8'),
+            file_name=f"{exam['title']}_정답키.json",
+            mime="application/json",
+            help="나중에 다른 세션에서 채점할 때 '정답 키 파일'로 불러옵니다."
+        )
+    else:
+        key_file = st.file_uploader("정답 키 파일 (JSON)", type=['json'])
+        if key_file is None:
+            st.info("시험지 생성 메뉴에서 내려받은 정답 키 파일을 올리거나, 먼저 시험지를 생성해주세요.")
+            return
+        try:
+            key = load_answer_key(key_file)
+        except ValueError as e:
+            st.error(str(e))
+            return
+    
+    response_files = st.file_uploader(
+        "답안 파일 (CSV / JSON Lines, gzip 압축 가능)",
+        type=['csv', 'jsonl', 'gz'],
+        accept_multiple_files=True,
+        help="CSV 머리글: 학번, 형, 1, 2, ... (형 열이 없으면 A형) · "
+             "JSON Lines: {\"student_id\": ..., \"variant\": \"B형\", \"answers\": [\"①\", \"O\", ...]}"
+    )
+    if response_files and st.button("채점하기", type="primary"):
+        started = time.perf_counter()
+        try:
+            responses = load_responses(key, [(f.name, f) for f in response_files])
+        except (ValueError, UnicodeDecodeError) as e:
+            st.error(f"답안 파일을 읽지 못했습니다: {str(e)}")
+            return
+        st.session_state.grading_result = grade(key, responses)
+        st.session_state.grading_result['elapsed'] = time.perf_counter() - started
+    
+    result = st.session_state.grading_result
+    if not result or [item['question_id'] for item in result['items']] != key['question_ids']:
+        return
+    
+    summary = score_summary(result)
+    st.caption(f"답안 {summary['students']:,}개를 {result['elapsed']:.2f}초 만에 채점했습니다. "
+               f"(자동 채점 {result['max_score']}문항, 주관식 제외)")
+    if result['skipped']:
+        st.warning(f"정답 키에 없는 형으로 표기된 답안 {result['skipped']:,}개는 채점하지 않았습니다.")
+    if not summary['students']:
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("응시자", f"{summary['students']:,}명")
+    with col2:
+        st.metric("평균", f"{summary['mean']:.1f} / {result['max_score']}")
+    with col3:
+        st.metric("표준편차", f"{summary['std']:.2f}")
+    with col4:
+        st.metric("신뢰도 (KR-20)", f"{summary['kr20']:.2f}" if 'kr20' in summary else "-")
+    
+    distribution = score_distribution(result)
+    st.bar_chart({'점수': list(range(len(distribution))), '인원': distribution}, x='점수', y='인원')
+    
+    st.subheader("문항 분석")
+    st.caption(f"정답률이 {REVIEW_P_RANGE[0]:.0%} 미만 또는 {REVIEW_P_RANGE[1]:.0%} 초과이거나 "
+               f"변별도가 {REVIEW_DISCRIMINATION} 미만인 문항은 검토 대상으로 표시합니다. 선택지는 원래 시험지 기준입니다.")
+    st.dataframe(
+        [
+            {
+                '번호': item['number'],
+                '문제 ID': item['question_id'],
+                '유형': item['type'],
+                '정답': item.get('answer') or "-",
+                '정답률': item.get('p_value'),
+                '변별도': item.get('discrimination'),
+                '점이연 상관': item.get('point_biserial'),
+                '선택 분포': " ".join(f"{choice} {count:,}" for choice, count in item.get('choices', {}).items()),
+                '무응답': item['omitted'],
+                '무효': item['invalid'],
+                '검토': "⚠️" if needs_review(item) else ""
+            }
+            for item in result['items']
+        ],
+        column_config={'정답률': st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.2f")},
+        hide_index=True
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="학생별 점수 다운로드 (CSV)",
+            data=scores_csv(result).encode('utf-8-sig'),
+            file_name=f"{result['title']}_점수.csv",
+            mime="text/csv"
+        )
+    with col2:
+        if st.button("문항 통계를 문제 은행에 저장"):
+            stats = item_statistics(result)
+            bank.update_item_stats(stats)
+            st.success(f"{len(stats)}개 문제에 문항 통계를 기록했습니다.")
 
-- 과목: {subject}
-- 난이도: {difficulty}
-- 추가 요구사항: {additional_info}
+def render_bank_statistics(bank):
+    """문제 통계 대시보드 (트리거로 갱신되는 집계 테이블만 읽으므로 문제 수와 무관하게 빠름)"""
+    days = st.selectbox("생성일 기간", [7, 30, 90, 365], index=1, format_func=lambda d: f"최근 {d}일")
+    started = time.perf_counter()
+    stats = bank.statistics(days)
+    elapsed = time.perf_counter() - started
+    if not stats['total']:
+        st.info("저장된 문제가 없습니다. 먼저 문제를 출제해주세요.")
+        return
+    
+    facets = stats['facets']
+    subjects = sorted({subject for subject, _, _, _ in facets})
+    ai_count = sum(count for source, _, count in stats['sources'] if source == SOURCE_AI)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("총 문제 수", stats['total'])
+    with col2:
+        st.metric("과목 수", len(subjects))
+    with col3:
+        st.metric(f"최근 {days}일 추가", sum(count for _, count in stats['daily']))
+    with col4:
+        st.metric("AI 생성 비율", f"{ai_count / stats['total']:.0%}")
+    
+    # 과목 x 유형
+    by_subject = {}
+    for subject, q_type, _, count in facets:
+        by_subject[(subject, q_type)] = by_subject.get((subject, q_type), 0) + count
+    st.subheader("과목·유형별 문제 수")
+    st.bar_chart(
+        {
+            '과목': [subject for subject, _ in by_subject],
+            '유형': [q_type for _, q_type in by_subject],
+            '문제 수': list(by_subject.values())
+        },
+        x='과목', y='문제 수', color='유형'
+    )
+    
+    # 난이도 x 유형 (과목 선택)
+    st.subheader("난이도별 문제 수")
+    subject = st.selectbox("과목", ["전체"] + subjects, key="stats_subject")
+    by_difficulty = {}
+    for row_subject, q_type, difficulty, count in facets:
+        if subject == "전체" or row_subject == subject:
+            by_difficulty[(difficulty, q_type)] = by_difficulty.get((difficulty, q_type), 0) + count
+    order = {level: i for i, level in enumerate(["쉬움", "보통", "어려움"])}
+    keys = sorted(by_difficulty, key=lambda key: (order.get(key[0], len(order)), key))
+    st.bar_chart(
+        {
+            '난이도': [difficulty for difficulty, _ in keys],
+            '유형': [q_type for _, q_type in keys],
+            '문제 수': [by_difficulty[key] for key in keys]
+        },
+        x='난이도', y='문제 수', color='유형', sort=False
+    )
+    
+    # 출처 / 제공업체
+    st.subheader("출처별 문제 수")
+    st.bar_chart(
+        {
+            '출처': [source_label(source, provider) for source, provider, _ in stats['sources']],
+            '문제 수': [count for _, _, count in stats['sources']]
+        },
+        x='출처', y='문제 수', horizontal=True
+    )
+    
+    # 생성일
+    st.subheader("생성일별 추가된 문제 수")
+    st.bar_chart(
+        {
+            '날짜': [day for day, _ in stats['daily']],
+            '문제 수': [count for _, count in stats['daily']]
+        },
+        x='날짜', y='문제 수'
+    )
+    
+    with st.expander("과목·유형·난이도별 문제 수 표"):
+        st.dataframe(
+            [
+                {'과목': subject, '유형': q_type, '난이도': difficulty, '문제 수': count}
+                for subject, q_type, difficulty, count in sorted(facets)
+            ],
+            hide_index=True
+        )
+    st.caption(f"집계 조회 {elapsed * 1000:.1f}ms")
 
-각 문제는 다음 JSON 형식으로 작성해주세요:
-"""
-    
-    if question_type == "객관식":
-        format_example = """
-{
-  "question": "문제 내용",
-  "options": ["선택지1", "선택지2", "선택지3", "선택지4"],
-  "correct_answer": "①",
-  "explanation": "해설 내용"
-}
-"""
-    elif question_type == "O/X":
-        format_example = """
-{
-  "question": "문제 내용",
-  "correct_answer": "O",
-  "explanation": "해설 내용"
-}
-"""
-    else:  # 주관식
-        format_example = """
-{
-  "question": "문제 내용",
-  "answer": "정답 내용",
-  "explanation": "해설 내용"
-}
-"""
-    
-    return base_prompt + format_example + f"\n\n{num_questions}개의 문제를 JSON 배열 형태로 반환해주세요."
+def render_call_metrics():
+    """제공업체 호출 지표 (대기열/첫 응답/전체 응답 시간 백분위, 토큰, 비용, 파싱 성공률)"""
+    periods = {"최근 1시간": 3600, "최근 24시간": 86400, "최근 7일": 7 * 86400}
+    period = st.selectbox("기간", list(periods), index=1)
+    metrics = get_metrics_store()
+    summary = metrics.summary(periods[period])
+    if not summary:
+        st.info("이 기간에 기록된 AI 제공업체 호출이 없습니다.")
+        return
+    
+    prompt_tokens = sum(row['prompt_tokens'] for row in summary)
+    cached_tokens = sum(row['cached_tokens'] for row in summary)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("호출 수", sum(row['calls'] for row in summary))
+    with col2:
+        st.metric("재시도", sum(row['retries'] for row in summary))
+    with col3:
+        st.metric("토큰", f"{prompt_tokens + sum(row['completion_tokens'] for row in summary):,}")
+    with col4:
+        # 입력 토큰 중 제공업체 프롬프트 캐시에서 읽은 비율
+        st.metric("캐시 입력 비율", f"{cached_tokens / prompt_tokens:.0%}" if prompt_tokens else "-")
+    with col5:
+        st.metric("예상 비용", f"${sum(row['cost_usd'] for row in summary):.4f}")
+    
+    def seconds(value):
+        return f"{value / 1000:.2f}초" if value is not None else "-"
+    
+    st.subheader("제공업체별 요약")
+    st.dataframe(
+        [
+            {
+                '제공업체': row['provider'],
+                '호출 수': row['calls'],
+                '오류율': f"{row['error_rate']:.0%}",
+                '재시도': row['retries'],
+                '입력 토큰': row['prompt_tokens'],
+                '출력 토큰': row['completion_tokens'],
+                '캐시 입력 토큰': row['cached_tokens'],
+                '문제당 토큰': round(row['tokens_per_question']) if row['tokens_per_question'] is not None else "-",
+                '예상 비용 (USD)': round(row['cost_usd'], 4),
+                '파싱 성공률': f"{row['parse_success_rate']:.0%}" if row['parse_success_rate'] is not None else "-"
+            }
+            for row in summary
+        ],
+        hide_index=True
+    )
+    
+    st.subheader("응답 시간 백분위")
+    st.caption("대기열: 요청 한도 대기 · 첫 응답: 요청 후 첫 조각까지 · 전체: 요청 후 응답 완료까지 (실패한 호출 제외)")
+    st.dataframe(
+        [
+            dict(
+                {'제공업체': row['provider']},
+                **{
+                    f"{label} p{p}": seconds(row[column][p])
+                    for column, label in (('queue_ms', "대기열"), ('ttfb_ms', "첫 응답"), ('latency_ms', "전체"))
+                    for p in PERCENTILES
+                }
+            )
+            for row in summary
+        ],
+        hide_index=True
+    )
+    
+    errors = metrics.recent_errors()
+    if errors:
+        with st.expander(f"최근 실패한 호출 ({len(errors)}건)"):
+            st.dataframe(
+                [
+                    {
+                        '시각': datetime.fromtimestamp(row['ts']).strftime("%Y-%m-%d %H:%M:%S"),
+                        '제공업체': row['provider'],
+                        '방식': row['kind'],
+                        '요청자': row['requester'],
+                        '재시도': row['retries'],
+                        '오류': row['error']
+                    }
+                    for row in errors
+                ],
+                hide_index=True
+            )
+    
+    with st.expander("Prometheus 형식 지표"):
+        if EXPORTER_PORT:
+            st.caption(f"이 서버의 {EXPORTER_PORT}번 포트 /metrics 경로에서 수집할 수 있습니다.")
+        else:
+            st.caption("EXAM_BOT_METRICS_PORT 환경 변수를 지정하거나 `python telemetry.py --port 9108`로 수집용 서버를 실행하세요.")
+        st.code(metrics.prometheus_text(), language="text")
 
-def parse_ai_response(response_text, question_type):
-    """AI 응답 파싱"""
+@st.cache_resource(show_spinner=False)
+def load_metrics_exporter():
+    """EXAM_BOT_METRICS_PORT가 지정되면 Prometheus 지표 서버를 한 번만 시작"""
+    if not EXPORTER_PORT:
+        return None
     try:
-        # JSON 추출 시도
-        start_idx = response_text.find('[')
-        end_idx = response_text.rfind(']') + 1
-        
-        if start_idx != -1 and end_idx != -1:
-            json_text = response_text[start_idx:end_idx]
-        else:
-            # 단일 객체인 경우
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            json_text = f"[{response_text[start_idx:end_idx]}]"
-        
-        questions_data = json.loads(json_text)
-        return questions_data
-    except Exception as e:
-        st.error(f"응답 파싱 오류: {str(e)}")
+        return start_exporter(EXPORTER_PORT)
+    except OSError:
+        # 다른 프로세스가 이미 같은 포트에서 지표를 제공하는 경우
         return None
 
+# 프로세스당 한 번만 여는 자원(스키마 확인, 검색 색인 준비 등)은 Streamlit 자원 캐시로 모든 세션이 공유
+@st.cache_resource(show_spinner="문제 은행을 준비하는 중...")
+def load_question_bank():
+    return get_question_bank()
+
+@st.cache_resource(show_spinner=False)
+def load_job_manager():
+    return get_job_manager()
+
+def clear_bank(bank):
+    """문제 은행 전체 삭제 (버튼 콜백, 다음 삭제 때 다시 확인하도록 확인 상자도 해제)"""
+    bank.clear()
+    st.session_state.confirm_clear_bank = False
+    st.session_state.bank_cleared = True
+
 def main():
+    bank = load_question_bank()
+    jobs = load_job_manager()
+    load_metrics_exporter()
+    
     st.title("🤖 AI 시험문제 출제 봇")
     st.markdown("생성형 AI를 활용한 자동 시험문제 생성 도구")
     st.markdown("---")
@@ -171,7 +689,8 @@ def main():
         st.header("메뉴")
         menu = st.selectbox(
             "기능 선택",
-            ["AI 문제 생성", "수동 문제 출제", "문제 은행", "시험지 생성", "설정"]
+            ["AI 문제 생성", "작업 목록", "수동 문제 출제", "문제 은행", "문제 통계", "시험지 생성", "채점", "요청 모니터링", "설정"],
+            key="menu"
         )
         
         st.markdown("---")
@@ -193,6 +712,13 @@ def main():
         if api_key:
             st.session_state.api_keys[ai_provider] = api_key
             st.success("API 키가 설정되었습니다!")
+        
+        routing = st.selectbox(
+            "요청 방식",
+            list(ROUTING_MODES),
+            help="API 키를 설정한 다른 제공업체를 장애 조치나 헤징에 함께 사용합니다. "
+                 "여러 제공업체를 쓰려면 제공업체를 바꿔 가며 키를 입력하세요."
+        )
     
     # AI 문제 생성 탭
     if menu == "AI 문제 생성":
@@ -213,7 +739,8 @@ def main():
             
             question_type = st.selectbox(
                 "문제 유형",
-                ["객관식", "주관식", "O/X"]
+                GENERATION_TYPES,
+                help=f"'{MIXED_TYPE}'을 선택하면 한 번의 요청으로 객관식/주관식/O/X 문제를 고르게 섞어 생성합니다."
             )
             
             difficulty = st.select_slider(
@@ -226,7 +753,7 @@ def main():
             num_questions = st.number_input(
                 "생성할 문제 수",
                 min_value=1,
-                max_value=20,
+                max_value=500,
                 value=5
             )
             
@@ -236,91 +763,98 @@ def main():
                 height=100
             )
         
-        # 문제 생성 버튼
+        with st.expander("대량 생성 설정"):
+            col1, col2 = st.columns(2)
+            with col1:
+                chunk_size = st.number_input(
+                    "요청당 문제 수",
+                    min_value=1,
+                    max_value=20,
+                    value=DEFAULT_CHUNK_SIZE,
+                    help="생성할 문제를 이 크기의 묶음으로 나누어 요청합니다."
+                )
+            with col2:
+                concurrency = st.slider(
+                    "동시 요청 수",
+                    min_value=1,
+                    max_value=16,
+                    value=DEFAULT_CONCURRENCY
+                )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            streaming = st.checkbox(
+                "스트리밍 모드",
+                value=True,
+                help="AI 응답을 받는 즉시 완성된 문제부터 미리보기에 표시합니다."
+            )
+        with col2:
+            force_fresh = st.checkbox(
+                "캐시 무시하고 새로 생성",
+                help="같은 조건으로 생성한 응답이 캐시에 있어도 AI를 다시 호출합니다."
+            )
+        
+        # 생성은 백그라운드 작업으로 실행되므로 다른 메뉴로 이동하거나 새로고침해도 결과가 유지됨
         if st.button("🚀 AI 문제 생성", type="primary"):
             if not subject:
                 st.error("과목명을 입력해주세요.")
                 return
             
-            with st.spinner("AI가 문제를 생성하고 있습니다..."):
-                # 프롬프트 생성
-                prompt = create_prompt(question_type, subject, difficulty, num_questions, additional_info)
-                
-                # AI API 호출
-                api_key = st.session_state.api_keys[ai_provider]
-                
-                if "OpenAI" in ai_provider:
-                    response = generate_with_openai(api_key, prompt)
-                elif "Anthropic" in ai_provider:
-                    response = generate_with_anthropic(api_key, prompt)
-                elif "Google" in ai_provider:
-                    response = generate_with_gemini(api_key, prompt)
-                
-                if response:
-                    # 응답 파싱
-                    questions_data = parse_ai_response(response, question_type)
-                    
-                    if questions_data:
-                        st.success(f"{len(questions_data)}개의 문제가 생성되었습니다!")
-                        
-                        # 생성된 문제 미리보기 및 저장
-                        for i, q_data in enumerate(questions_data):
-                            with st.expander(f"문제 {i+1} 미리보기"):
-                                st.write(f"**문제:** {q_data.get('question', '')}")
-                                
-                                if question_type == '객관식':
-                                    options = q_data.get('options', [])
-                                    for j, option in enumerate(options):
-                                        st.write(f"{['①', '②', '③', '④'][j]} {option}")
-                                    st.write(f"**정답:** {q_data.get('correct_answer', '')}")
-                                
-                                elif question_type == 'O/X':
-                                    st.write(f"**정답:** {q_data.get('correct_answer', '')}")
-                                
-                                else:  # 주관식
-                                    st.write(f"**정답:** {q_data.get('answer', '')}")
-                                
-                                if q_data.get('explanation'):
-                                    st.write(f"**해설:** {q_data.get('explanation', '')}")
-                        
-                        # 일괄 저장 버튼
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            if st.button("모든 문제 저장"):
-                                for q_data in questions_data:
-                                    if question_type == '객관식':
-                                        question = create_question(
-                                            question_type, subject, difficulty,
-                                            q_data.get('question', ''),
-                                            q_data.get('options', []),
-                                            q_data.get('correct_answer', ''),
-                                            q_data.get('explanation', '')
-                                        )
-                                    elif question_type == 'O/X':
-                                        question = create_question(
-                                            question_type, subject, difficulty,
-                                            q_data.get('question', ''),
-                                            None,
-                                            q_data.get('correct_answer', ''),
-                                            q_data.get('explanation', '')
-                                        )
-                                    else:  # 주관식
-                                        question = create_question(
-                                            question_type, subject, difficulty,
-                                            q_data.get('question', ''),
-                                            None,
-                                            q_data.get('answer', ''),
-                                            q_data.get('explanation', '')
-                                        )
-                                    st.session_state.questions.append(question)
-                                
-                                st.success("모든 문제가 저장되었습니다!")
-                                st.rerun()
-                        
-                        with col2:
-                            # 원본 응답 보기
-                            with st.expander("AI 원본 응답 보기"):
-                                st.code(response)
+            params = {
+                'ai_provider': ai_provider,
+                'routing': ROUTING_MODES[routing],
+                'subject': subject,
+                'question_type': question_type,
+                'difficulty': difficulty,
+                'num_questions': num_questions,
+                'additional_info': additional_info,
+                'chunk_size': chunk_size,
+                'concurrency': concurrency,
+                'streaming': streaming,
+                'force_fresh': force_fresh,
+                'dedup_threshold': st.session_state.dedup_threshold
+            }
+            st.session_state.active_job = jobs.submit(
+                'generation',
+                f"{subject} {question_type} {num_questions}문제 ({difficulty})",
+                params,
+                run_generation_job,
+                {PROVIDERS[label].name: key for label, key in st.session_state.api_keys.items()}
+            )
+        
+        if st.session_state.active_job and jobs.get(st.session_state.active_job):
+            render_generation_job(st.session_state.active_job)
+        elif jobs.has_active():
+            st.info("진행 중인 생성 작업이 있습니다. '작업 목록' 메뉴에서 확인할 수 있습니다.")
+    
+    # 작업 목록 탭
+    elif menu == "작업 목록":
+        st.header("📋 작업 목록")
+        render_job_list()
+        
+        job_list = jobs.list(limit=100)
+        if job_list:
+            job_id = st.selectbox(
+                "작업 선택",
+                [job['id'] for job in job_list],
+                format_func=lambda i: next(f"#{j['id']} {j['title']}" for j in job_list if j['id'] == i)
+            )
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if st.button("작업 취소"):
+                    if not jobs.cancel(job_id):
+                        st.warning("이미 끝난 작업입니다.")
+                    else:
+                        st.rerun()
+            with col2:
+                if st.button("작업 기록 삭제"):
+                    jobs.delete(job_id)
+                    st.rerun()
+            with col3:
+                if st.button("끝난 작업 모두 삭제"):
+                    jobs.clear_finished()
+                    st.rerun()
+            render_generation_job(job_id)
     
     # 수동 문제 출제 탭
     elif menu == "수동 문제 출제":
@@ -380,9 +914,10 @@ def main():
             if question_text and subject and correct_answer:
                 question = create_question(
                     question_type, subject, difficulty, 
-                    question_text, options, correct_answer, explanation
+                    question_text, options, correct_answer, explanation,
+                    source=SOURCE_MANUAL
                 )
-                st.session_state.questions.append(question)
+                bank.add(question)
                 st.success("문제가 저장되었습니다!")
                 st.rerun()
             else:
@@ -392,38 +927,83 @@ def main():
     elif menu == "문제 은행":
         st.header("🗂️ 문제 은행")
         
-        if not st.session_state.questions:
+        # (과목, 유형, 난이도)별 집계 - 문제 수와 무관하게 작은 크기
+        facets = bank.facets()
+        if not facets:
             st.info("저장된 문제가 없습니다. 먼저 문제를 출제해주세요.")
             return
         
+        search_text = st.text_input(
+            "🔍 검색",
+            placeholder="문제, 선택지, 정답, 해설에서 검색 (띄어쓰기로 여러 단어 검색)"
+        ).strip()
+        
         # 필터링 옵션
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            subjects = list(set([q['subject'] for q in st.session_state.questions]))
+            subjects = sorted({f[0] for f in facets})
             subject_filter = st.selectbox("과목 필터", ["전체"] + subjects)
         
         with col2:
-            types = list(set([q['type'] for q in st.session_state.questions]))
+            types = sorted({f[1] for f in facets})
             type_filter = st.selectbox("유형 필터", ["전체"] + types)
         
         with col3:
-            difficulties = list(set([q['difficulty'] for q in st.session_state.questions]))
+            difficulties = sorted({f[2] for f in facets})
             difficulty_filter = st.selectbox("난이도 필터", ["전체"] + difficulties)
         
-        # 문제 목록 표시
-        filtered_questions = st.session_state.questions
+        with col4:
+            page_size = st.selectbox("페이지당 문제 수", [10, 20, 50, 100], index=1)
         
-        if subject_filter != "전체":
-            filtered_questions = [q for q in filtered_questions if q['subject'] == subject_filter]
-        if type_filter != "전체":
-            filtered_questions = [q for q in filtered_questions if q['type'] == type_filter]
-        if difficulty_filter != "전체":
-            filtered_questions = [q for q in filtered_questions if q['difficulty'] == difficulty_filter]
+        filters = {
+            'subject': None if subject_filter == "전체" else subject_filter,
+            'question_type': None if type_filter == "전체" else type_filter,
+            'difficulty': None if difficulty_filter == "전체" else difficulty_filter
+        }
+        if search_text:
+            total_filtered = bank.search_count(search_text, **filters)
+        else:
+            total_filtered = sum(
+                count for subject, q_type, difficulty, count in facets
+                if filters['subject'] in (None, subject)
+                and filters['question_type'] in (None, q_type)
+                and filters['difficulty'] in (None, difficulty)
+            )
+        total_pages = max(1, (total_filtered + page_size - 1) // page_size)
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"총 {total_filtered}개의 문제")
+        with col2:
+            page = st.number_input(
+                f"페이지 (전체 {total_pages})",
+                min_value=1,
+                max_value=total_pages,
+                value=1,
+                # 필터나 페이지 크기가 바뀌면 첫 페이지부터 다시 표시
+                key=f"page_{search_text}_{subject_filter}_{type_filter}_{difficulty_filter}_{page_size}"
+            )
         
-        st.write(f"총 {len(filtered_questions)}개의 문제")
+        # 현재 페이지에 해당하는 문제만 조회해서 표시 (검색 시 관련도 순)
+        if search_text:
+            page_questions = bank.search(search_text, limit=page_size, offset=(page - 1) * page_size, **filters)
+        else:
+            # 페이지별 시작 위치(앞 페이지의 마지막 ID)를 기억해 다음 페이지는 키셋 조회로 바로 이어서 읽음
+            # (현재 필터의 위치만 기억하고, 필터가 바뀌거나 문제가 추가/삭제되면 버림)
+            anchor_key = (subject_filter, type_filter, difficulty_filter, page_size, bank.version())
+            anchors = st.session_state.get('bank_page_anchors')
+            if anchors is None or anchors['key'] != anchor_key:
+                anchors = st.session_state.bank_page_anchors = {'key': anchor_key, 'pages': {1: 0}}
+            page_anchors = anchors['pages']
+            after_id = page_anchors.get(page)
+            if after_id is None:
+                after_id = bank.page_anchor((page - 1) * page_size, total_filtered, **filters)
+            page_questions = bank.query(limit=page_size, after_id=after_id, **filters)
+            if page_questions:
+                page_anchors[page + 1] = page_questions[-1]['id']
         
-        for i, question in enumerate(filtered_questions):
+        for question in page_questions:
             with st.expander(f"문제 {question['id']}: {question['subject']} ({question['type']}) - {question['difficulty']}"):
                 st.write(f"**문제:** {question['question']}")
                 
@@ -442,16 +1022,25 @@ def main():
                 if 'explanation' in question and question['explanation']:
                     st.write(f"**해설:** {question['explanation']}")
                 
+                stats = question.get('item_stats')
+                if stats:
+                    st.caption(
+                        f"채점 통계 ({stats['exam']}, {stats['graded_at']}, 응답 {stats['responses']:,}명): "
+                        f"정답률 {stats['p_value']:.0%} · 변별도 "
+                        + (f"{stats['discrimination']:.2f}" if stats['discrimination'] is not None else "-")
+                    )
+                
                 # 삭제 버튼
                 if st.button(f"삭제", key=f"del_{question['id']}"):
-                    st.session_state.questions = [q for q in st.session_state.questions if q['id'] != question['id']]
+                    bank.delete(question['id'])
                     st.rerun()
     
     # 시험지 생성 탭
     elif menu == "시험지 생성":
         st.header("📋 시험지 생성")
         
-        if not st.session_state.questions:
+        total_questions = bank.count()
+        if total_questions == 0:
             st.info("저장된 문제가 없습니다. 먼저 문제를 출제해주세요.")
             return
         
@@ -463,79 +1052,145 @@ def main():
             exam_time = st.number_input("시험 시간 (분)", min_value=10, max_value=300, value=60)
         
         with col2:
+            selection_method = st.radio(
+                "문제 선택 방법",
+                ["구성표", "랜덤 선택", "수동 선택"]
+            )
+            
+            num_sets = st.number_input(
+                "시험지 세트 수",
+                min_value=1,
+                max_value=50,
+                value=1,
+                help="같은 조건으로 서로 다른 문제를 뽑은 시험지를 여러 벌 만듭니다.",
+                disabled=selection_method == "수동 선택"
+            )
+        
+        if selection_method == "구성표":
+            st.subheader("시험지 구성표")
+            facets = bank.facets()
+            subjects = sorted({f[0] for f in facets})
+            blueprint_rows = st.data_editor(
+                [{
+                    '과목': exam_subject if exam_subject in subjects else "전체",
+                    '유형': "전체",
+                    '난이도': "전체",
+                    '문항 수': min(10, total_questions)
+                }],
+                num_rows="dynamic",
+                column_config={
+                    '과목': st.column_config.SelectboxColumn(options=["전체"] + subjects, required=True),
+                    '유형': st.column_config.SelectboxColumn(options=["전체", "객관식", "주관식", "O/X"], required=True),
+                    '난이도': st.column_config.SelectboxColumn(options=["전체", "쉬움", "보통", "어려움"], required=True),
+                    '문항 수': st.column_config.NumberColumn(min_value=1, max_value=200, step=1, required=True)
+                },
+                use_container_width=True,
+                key="blueprint"
+            )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                use_target = st.checkbox("목표 평균 난이도 지정", help="난이도가 '전체'인 행의 난이도 배분을 조정합니다.")
+                target_difficulty = st.slider(
+                    "목표 평균 난이도 (쉬움 1 ~ 어려움 3)",
+                    min_value=1.0,
+                    max_value=3.0,
+                    value=2.0,
+                    step=0.1,
+                    disabled=not use_target
+                )
+            with col2:
+                exclude_recent_days = st.number_input(
+                    "최근 출제 문제 제외 (일)",
+                    min_value=0,
+                    max_value=365,
+                    value=0,
+                    help="최근 이 기간 안에 시험지에 출제된 문제는 뽑지 않습니다. 0이면 제외하지 않습니다."
+                )
+        
+        elif selection_method == "랜덤 선택":
             num_questions = st.number_input(
                 "문제 수", 
                 min_value=1, 
-                max_value=len(st.session_state.questions), 
-                value=min(10, len(st.session_state.questions))
-            )
-            
-            selection_method = st.radio(
-                "문제 선택 방법",
-                ["랜덤 선택", "수동 선택"]
+                max_value=total_questions, 
+                value=min(10, total_questions)
             )
         
-        if selection_method == "수동 선택":
+        else:
             st.subheader("문제 선택")
-            selected_questions = []
-            
-            for question in st.session_state.questions:
-                if st.checkbox(
-                    f"문제 {question['id']}: {question['subject']} - {question['question'][:50]}...",
-                    key=f"select_{question['id']}"
-                ):
-                    selected_questions.append(question)
+            selected_ids_text = st.text_input(
+                "문제 번호 (쉼표로 구분)",
+                placeholder="예: 3, 15, 27 - 번호는 문제 은행에서 확인할 수 있습니다."
+            )
         
         if st.button("시험지 생성", type="primary"):
-            if selection_method == "랜덤 선택":
-                selected = random.sample(st.session_state.questions, min(num_questions, len(st.session_state.questions)))
-            else:
-                selected = selected_questions[:num_questions]
+            try:
+                if selection_method == "구성표":
+                    blueprint = make_blueprint(
+                        [
+                            {
+                                'subject': None if row['과목'] == "전체" else row['과목'],
+                                'type': None if row['유형'] == "전체" else row['유형'],
+                                'difficulty': None if row['난이도'] == "전체" else row['난이도'],
+                                'count': int(row['문항 수'] or 0)
+                            }
+                            for row in blueprint_rows
+                        ],
+                        target_difficulty=target_difficulty if use_target else None,
+                        exclude_recent_days=exclude_recent_days
+                    )
+                    exam_sets = assemble_exams(bank, blueprint, num_sets)
+                elif selection_method == "랜덤 선택":
+                    # 과목명을 입력한 경우 해당 과목 문제에서만 선택
+                    blueprint = make_blueprint([{'count': num_questions}], subject=exam_subject or None)
+                    exam_sets = assemble_exams(bank, blueprint, num_sets)
+                else:
+                    exam_sets = [[int(i) for i in selected_ids_text.replace(" ", "").split(",") if i.isdigit()]]
+            except ValueError as e:
+                st.error(str(e))
+                return
             
-            if selected:
-                st.session_state.current_exam = {
-                    'title': exam_title,
+            questions_by_id = {q['id']: q for q in bank.get_many({i for ids in exam_sets for i in ids})}
+            created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            exams = [
+                {
+                    'title': exam_title if len(exam_sets) == 1 else f"{exam_title} ({n}세트)",
                     'subject': exam_subject,
                     'time': exam_time,
-                    'questions': selected,
-                    'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    'questions': [questions_by_id[i] for i in ids if i in questions_by_id],
+                    'created_at': created_at
                 }
-                
-                st.success("시험지가 생성되었습니다!")
-                
-                # 시험지 미리보기
-                st.markdown("---")
-                st.subheader("📄 시험지 미리보기")
-                
-                st.markdown(f"""
-                # {exam_title}
-                **과목:** {exam_subject}  
-                **시험시간:** {exam_time}분  
-                **총 문항:** {len(selected)}문제  
-                **작성일:** {datetime.now().strftime("%Y년 %m월 %d일")}
-                
-                ---
-                """)
-                
-                for i, question in enumerate(selected, 1):
-                    st.markdown(f"**{i}. {question['question']}**")
-                    
-                    if question['type'] == '객관식':
-                        for j, option in enumerate(question['options']):
-                            if option:
-                                st.markdown(f"　{['①', '②', '③', '④'][j]} {option}")
-                    
-                    st.markdown("")
-                
-                # 정답지
-                with st.expander("정답지 보기"):
-                    for i, question in enumerate(selected, 1):
-                        if question['type'] == '객관식':
-                            st.write(f"{i}. {question['correct_answer']}")
-                        elif question['type'] == 'O/X':
-                            st.write(f"{i}. {question['correct_answer']}")
-                        else:
-                            st.write(f"{i}. {question['answer']}")
+                for n, ids in enumerate(exam_sets, 1)
+            ]
+            
+            if exams[0]['questions']:
+                bank.record_usage(questions_by_id)
+                st.session_state.exam_sets = exams
+                st.session_state.exam_variants = None
+                st.session_state.print_file = None
+                st.session_state.current_exam = exams[0]
+                st.success(f"시험지 {len(exams)}세트가 생성되었습니다!")
+            else:
+                st.error("선택된 문제가 없습니다.")
+        
+        if st.session_state.exam_sets:
+            exams = st.session_state.exam_sets
+            if len(exams) > 1:
+                set_number = st.selectbox("미리볼 세트", range(1, len(exams) + 1), format_func=lambda n: f"{n}세트")
+                st.session_state.current_exam = exams[set_number - 1]
+            render_exam_preview(st.session_state.current_exam)
+            render_variant_builder(st.session_state.current_exam)
+            render_print_export(st.session_state.current_exam, exams)
+    
+    # 채점 탭
+    elif menu == "채점":
+        st.header("📝 채점")
+        render_grading(bank)
+    
+    # 요청 모니터링 탭
+    elif menu == "요청 모니터링":
+        st.header("📈 요청 모니터링")
+        render_call_metrics()
     
     # 설정 탭
     elif menu == "설정":
@@ -547,55 +1202,174 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("전체 문제 삭제"):
-                st.session_state.questions = []
-                st.success("모든 문제가 삭제되었습니다.")
+            # 문제 은행은 모든 세션과 프로세스가 함께 쓰므로 한 번 더 확인한 뒤 삭제
+            confirm_clear = st.checkbox(
+                f"문제 은행의 문제 {bank.count():,}개를 영구 삭제합니다 (모든 사용자에게 적용)",
+                key="confirm_clear_bank"
+            )
+            st.button("문제 은행 전체 삭제", type="primary", disabled=not confirm_clear,
+                      on_click=clear_bank, args=(bank,))
+            if st.session_state.pop('bank_cleared', False):
+                st.success("문제 은행의 모든 문제가 삭제되었습니다.")
         
         with col2:
-            # JSON 파일로 다운로드
-            if st.session_state.questions:
-                questions_json = json.dumps(st.session_state.questions, ensure_ascii=False, indent=2)
-                st.download_button(
-                    label="문제 데이터 다운로드",
-                    data=questions_json,
-                    file_name="questions.json",
-                    mime="application/json"
-                )
+            # 파일로 내보내기 (문제를 나누어 읽으면서 바로 기록하므로 문제 수와 무관하게 메모리 일정)
+            if bank.count():
+                export_format = st.selectbox("내보내기 형식", list(EXPORT_FORMATS))
+                if st.button("내보내기 파일 만들기"):
+                    with st.spinner("문제 데이터를 내보내는 중입니다..."):
+                        path, count = export_to_file(bank, export_format)
+                    st.session_state.export_file = path
+                    st.success(f"{count}개의 문제를 내보냈습니다.")
+                
+                path = st.session_state.export_file
+                if path and os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        st.download_button(
+                            label="문제 데이터 다운로드",
+                            data=f,
+                            file_name=os.path.basename(path),
+                            mime="application/octet-stream"
+                        )
         
         # 파일 업로드
         st.subheader("문제 데이터 불러오기")
-        uploaded_file = st.file_uploader("JSON 파일 선택", type=['json'])
+        uploaded_file = st.file_uploader(
+            "파일 선택 (JSON, JSON Lines, gzip/zstd 압축 가능)",
+            type=['json', 'jsonl', 'gz', 'zst']
+        )
         
-        if uploaded_file is not None:
+        if uploaded_file is not None and st.button("불러오기"):
+            progress = st.progress(0.0, text="문제를 불러오는 중입니다...")
+            
+            def on_progress(stats):
+                progress.progress(
+                    min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0),
+                    text=f"{stats['imported']}개 저장 중..."
+                )
+            
             try:
-                questions_data = json.load(uploaded_file)
-                st.session_state.questions.extend(questions_data)
-                st.success(f"{len(questions_data)}개의 문제를 불러왔습니다.")
-                st.rerun()
+                stats = import_records(
+                    bank, iter_records(uploaded_file),
+                    threshold=st.session_state.dedup_threshold,
+                    on_progress=on_progress
+                )
+                progress.empty()
+                st.success(
+                    f"{stats['imported']}개의 문제를 불러왔습니다. "
+                    f"(유사 중복 {stats['duplicates']}개, 형식 오류 {stats['invalid']}개 제외)"
+                )
+                if stats['errors']:
+                    with st.expander("형식 오류 보기"):
+                        for error in stats['errors']:
+                            st.write(error)
             except Exception as e:
+                progress.empty()
                 st.error(f"파일 로드 중 오류가 발생했습니다: {e}")
         
-        # 통계
-        if st.session_state.questions:
-            st.subheader("문제 통계")
-            
-            total_questions = len(st.session_state.questions)
-            subjects = [q['subject'] for q in st.session_state.questions]
-            types = [q['type'] for q in st.session_state.questions]
-            difficulties = [q['difficulty'] for q in st.session_state.questions]
-            
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("총 문제 수", total_questions)
-            
-            with col2:
-                most_common_subject = max(set(subjects), key=subjects.count)
-                st.metric("가장 많은 과목", most_common_subject)
-            
-            with col3:
-                most_common_type = max(set(types), key=types.count)
-                st.metric("가장 많은 유형", most_common_type)
+        # 중복 검사
+        st.subheader("유사 중복 검사")
+        st.session_state.dedup_threshold = st.slider(
+            "중복 판정 유사도",
+            min_value=0.5,
+            max_value=1.0,
+            value=st.session_state.dedup_threshold,
+            step=0.05,
+            help="AI 생성 및 파일 불러오기 시 이 값 이상으로 비슷한 문제를 중복으로 판정합니다."
+        )
+        
+        # 응답 캐시
+        st.subheader("응답 캐시")
+        cache = get_response_cache()
+        cache_stats = cache.stats()
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("캐시 적중", cache_stats['hits'])
+        with col2:
+            st.metric("캐시 미적중", cache_stats['misses'])
+        with col3:
+            st.metric("적중률", f"{cache_stats['hit_rate']:.0%}")
+        with col4:
+            st.metric("저장된 응답", f"{cache_stats['entries']}개 ({cache_stats['size'] / 1024 / 1024:.1f}MB)")
+        
+        if st.button("응답 캐시 비우기"):
+            cache.clear()
+            st.success("응답 캐시를 비웠습니다.")
+            st.rerun()
+        
+        # 요청 한도
+        st.subheader("API 요청 한도")
+        st.caption("같은 API 키를 쓰는 모든 사용자가 이 한도를 함께 사용합니다. 한도를 넘는 요청은 실패하지 않고 차례를 기다립니다.")
+        limiter = get_rate_limiter()
+        
+        provider_names = {'openai': "OpenAI", 'anthropic': "Anthropic", 'gemini': "Gemini"}
+        with st.form("rate_limits"):
+            columns = st.columns(len(provider_names))
+            new_limits = {}
+            for column, (provider, name) in zip(columns, provider_names.items()):
+                limits = limiter.limits(provider)
+                with column:
+                    new_limits[provider] = (
+                        st.number_input(f"{name} 분당 요청 수", min_value=1, value=limits['rpm']),
+                        st.number_input(f"{name} 분당 토큰 수", min_value=1000, value=limits['tpm'], step=1000)
+                    )
+            if st.form_submit_button("한도 저장"):
+                for provider, (rpm, tpm) in new_limits.items():
+                    limiter.set_limits(provider, rpm, tpm)
+                st.success("요청 한도를 저장했습니다.")
+        
+        limiter_status = limiter.status()
+        if limiter_status:
+            st.dataframe(
+                [
+                    {
+                        '제공업체': provider_names.get(item['provider'], item['provider']),
+                        'API 키': item['key'].split(":")[1],
+                        '대기 중인 요청': item['queued'],
+                        '남은 요청 수': f"{item['requests_available']}/{item['rpm']}",
+                        '남은 토큰': f"{item['tokens_available']:,}/{item['tpm']:,}",
+                        '오늘 요청 수': item['requests_today'],
+                        '오늘 사용 토큰(추정)': f"{item['tokens_today']:,}",
+                        '오늘 대기 시간': f"{item['wait_seconds_today']:.0f}초"
+                    }
+                    for item in limiter_status
+                ],
+                hide_index=True
+            )
+            st.caption("토큰 한도와 사용량은 요청 전에 프롬프트 길이와 최대 응답 토큰으로 추정한 값이며, "
+                       "실제 응답의 사용량으로 보정하지 않으므로 근삿값입니다.")
+        
+        # 제공업체 응답 통계 (장애 조치/헤징 순서 결정에 사용)
+        st.subheader("제공업체 응답 통계")
+        provider_stats = get_provider_stats().summary([p.name for p in PROVIDERS.values()])
+        if any(row['requests'] for row in provider_stats):
+            def seconds(value):
+                return f"{value:.1f}초" if value is not None else "-"
+            st.dataframe(
+                [
+                    {
+                        '제공업체': label,
+                        '상태': "정상" if row['healthy'] else "일시 제외",
+                        '최근 요청 수': row['requests'],
+                        '오류율': f"{row['error_rate']:.0%}",
+                        '응답 p50': seconds(row['generate_p50']),
+                        '응답 p95': seconds(row['generate_p95']),
+                        '첫 조각 p50 (스트리밍)': seconds(row['stream_p50']),
+                        '첫 조각 p95 (스트리밍)': seconds(row['stream_p95'])
+                    }
+                    for label, row in zip(PROVIDERS, provider_stats)
+                ],
+                hide_index=True
+            )
+        else:
+            st.caption("아직 이 서버에서 보낸 요청이 없습니다.")
+        
+    
+    # 문제 통계 탭
+    elif menu == "문제 통계":
+        st.header("📊 문제 통계")
+        render_bank_statistics(bank)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file